@@ -0,0 +1,82 @@
+import time
+
+class AnimationClock:
+    def __init__(self, widget, on_step, on_complete=None, get_speed=None, max_fps=30):
+        self.widget = widget
+        self.on_step = on_step
+        self.on_complete = on_complete
+        self.get_speed = get_speed
+        self.max_fps = max_fps
+        
+        self.speed = 1.0
+        self.step = 0
+        self.total_steps = 0
+        self.running = False
+        self.after_id = None
+        
+        self.last_tick = 0.0
+        self.last_frame = 0.0
+        self.accumulator = 0.0
+        self.fps = 0.0
+        self.frames_rendered = 0
+        self.frames_skipped = 0
+        self.last_render_time = 0.0
+        
+    def start(self, step, total_steps):
+        self.step = step
+        self.total_steps = total_steps
+        # Show the first step right away rather than after a full period
+        self.accumulator = 1.0
+        self.running = True
+        self.last_tick = time.perf_counter()
+        self.last_frame = 0.0
+        self.schedule()
+        
+    def stop(self):
+        self.running = False
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+            self.after_id = None
+            
+    def schedule(self):
+        self.after_id = self.widget.after(max(1, int(1000 / self.max_fps)), self.tick)
+        
+    def tick(self):
+        self.after_id = None
+        if not self.running:
+            return
+            
+        if self.get_speed:
+            self.speed = self.get_speed()
+            
+        now = time.perf_counter()
+        elapsed = now - self.last_tick
+        self.last_tick = now
+        
+        # Advance by however many steps are due since the last frame. When
+        # rendering falls behind only the latest step is drawn.
+        self.accumulator += elapsed * self.speed
+        due = int(self.accumulator)
+        if due:
+            self.accumulator -= due
+            target = min(self.step + due, self.total_steps)
+            self.frames_skipped += max(0, target - self.step - 1)
+            self.step = target
+            
+            t0 = time.perf_counter()
+            self.on_step(self.step)
+            self.last_render_time = time.perf_counter() - t0
+            self.frames_rendered += 1
+            
+            if self.last_frame:
+                fps = 1.0 / max(now - self.last_frame, 1e-6)
+                self.fps = fps if not self.fps else 0.8 * self.fps + 0.2 * fps
+            self.last_frame = now
+            
+        if self.step >= self.total_steps:
+            self.running = False
+            if self.on_complete:
+                self.on_complete()
+            return
+            
+        self.schedule()
@@ -0,0 +1,356 @@
+import argparse
+import multiprocessing
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+FRAME_NAME = "frame_%06d"
+
+class Value:
+    # Stand-in for the Tk variables the GUI classes read from
+    def __init__(self, value):
+        self.value = value
+        
+    def get(self):
+        return self.value
+        
+    def set(self, value):
+        self.value = value
+
+
+class NullWidget:
+    def config(self, **kwargs):
+        pass
+
+
+def save_frame(agg, path):
+    from PIL import Image
+    
+    agg.draw()
+    image = Image.frombuffer("RGBA", agg.get_width_height(), agg.buffer_rgba())
+    if path.endswith(".gif"):
+        # Quantizing and encoding here, in the workers, leaves stitching a
+        # GIF with nothing to do but copy bytes
+        image.convert("RGB").quantize(method=Image.Quantize.FASTOCTREE).save(path)
+    else:
+        # Fast compression: most of these files only live until they are stitched
+        image.save(path, compress_level=1)
+
+
+def make_figure(figsize, dpi):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    
+    fig = Figure(figsize=figsize, dpi=dpi)
+    return fig, FigureCanvasAgg(fig)
+
+
+class CachedGraph:
+    # Redrawing the whole graph with networkx every frame dominated export
+    # time. Each node group, edge and label is drawn once instead, and later
+    # frames only recolour, show or hide it.
+    def __init__(self, ax):
+        self.ax = ax
+        self.nodes = {}
+        self.edges = {}
+        self.texts = {}
+        self.empty = ax.text(0.5, 0.5, "Select a scenario to visualize", horizontalalignment='center',
+                             verticalalignment='center', transform=ax.transAxes)
+        ax.set_axis_off()
+        
+    def draw(self, G, pos, node_colors, edge_colors, labels, scenario):
+        import networkx as nx
+        from deadlock_visualizer import NODE_STYLES, EDGE_STYLES
+        
+        shown = set()
+        for node_type, style in NODE_STYLES.items():
+            nodes = tuple(n for n, d in G.nodes(data=True) if d.get('type') == node_type)
+            if not nodes:
+                continue
+            key = (nodes, tuple(tuple(pos[n]) for n in nodes))
+            artist = self.nodes.get(key)
+            if artist is None:
+                artist = self.nodes[key] = nx.draw_networkx_nodes(G, pos, nodelist=list(nodes), ax=self.ax, **style)
+            artist.set_facecolor([node_colors.get(n, 'blue') for n in nodes])
+            shown.add(artist)
+            
+        for u, v, d in G.edges(data=True):
+            edge_type = d.get('type')
+            if edge_type not in EDGE_STYLES:
+                continue
+            key = (u, v, edge_type, tuple(pos[u]), tuple(pos[v]))
+            patches = self.edges.get(key)
+            if patches is None:
+                patches = self.edges[key] = nx.draw_networkx_edges(G, pos, edgelist=[(u, v)], ax=self.ax,
+                                                                   **EDGE_STYLES[edge_type])
+            for patch in patches:
+                patch.set_color(edge_colors.get((u, v), 'black'))
+                shown.add(patch)
+                
+        for node, label in labels.items() if G.nodes() else ():
+            key = (node, label, tuple(pos[node]))
+            text = self.texts.get(key)
+            if text is None:
+                text = self.texts[key] = nx.draw_networkx_labels(G, pos, labels={node: label}, font_size=10,
+                                                                 ax=self.ax)[node]
+            shown.add(text)
+            
+        for artist in (*self.nodes.values(), *self.texts.values(), *(p for ps in self.edges.values() for p in ps)):
+            artist.set_visible(artist in shown)
+        self.empty.set_visible(not G.nodes())
+        self.ax.set_title(f"Resource Allocation Graph - {scenario}" if G.nodes() else "No graph data")
+
+
+def offscreen_deadlock_renderer(scenario, seed, processes, resources, steps, dpi):
+    from deadlock_visualizer import DeadlockVisualizer
+    from deadlock_recovery import STRATEGIES
+    
+    class OffscreenDeadlockVisualizer(DeadlockVisualizer):
+        # Plain values and an Agg figure stand in for the Tk variables and
+        # widgets, so the scenarios run unchanged in a worker process
+        def create_variables(self):
+            self.animation_speed = Value(1.0)
+            self.current_scenario = Value(scenario)
+            self.workload_seed = Value(seed)
+            self.workload_processes = Value(processes)
+            self.workload_resources = Value(resources)
+            self.recovery_strategy = Value(STRATEGIES[0])
+            self.show_wfg = Value(False)
+            self.description = ""
+            
+        def create_widgets(self):
+            self.fig, self.agg = make_figure((8, 6), dpi)
+            self.ax = self.fig.add_axes([0.02, 0.15, 0.96, 0.8])
+            self.caption = self.fig.text(0.02, 0.02, "", fontsize=9, va='bottom')
+            self.graph = CachedGraph(self.ax)
+            self.step_label = NullWidget()
+            
+        def load_scenario(self, scenario_name):
+            self.workload_steps = steps
+            self.scenarios[scenario_name]()
+            
+        def update_graph(self):
+            self.graph.draw(self.G, self.pos, self.node_colors, self.edge_colors, self.labels,
+                            self.current_scenario.get())
+            
+        def update_description(self, text):
+            self.description = text
+            
+        def update_conditions(self, conditions):
+            pass
+            
+        def frame_count(self):
+            return self.total_steps + 1
+            
+        def render(self, index):
+            self.update_step(index)
+            self.caption.set_text(textwrap.fill(self.description, 110))
+            
+    return OffscreenDeadlockVisualizer(None)
+
+
+class TimelineRenderer:
+    # The timeline only grows to the right, so every bar and label is drawn
+    # once and each frame moves the edge of the view. Before the first second
+    # the axis is wider than the elapsed time, and a patch between the bars
+    # and the grid covers what has not happened yet.
+    def __init__(self, thread_history, frames, dpi):
+        from matplotlib.patches import Rectangle
+        
+        self.frames = frames
+        self.makespan = max((end for events in thread_history.values() for _, end, _ in events
+                             if end is not None), default=1.0)
+        self.fig, self.agg = make_figure((8, 4), dpi)
+        ax = self.ax = self.fig.add_subplot(111)
+        self.labels = []
+        
+        if not thread_history:
+            ax.set_title("No thread activity data")
+            ax.text(0.5, 0.5, "Start simulation to see thread activity", horizontalalignment='center',
+                    verticalalignment='center', transform=ax.transAxes)
+            self.future = None
+            return
+            
+        for thread_id, events in thread_history.items():
+            spans = [(start, (end if end is not None else self.makespan) - start) for start, end, _ in events]
+            ax.broken_barh(spans, (thread_id - 0.25, 0.5), facecolors='#2980B9', alpha=0.7)
+            for start, end, task_id in events:
+                end = end if end is not None else self.makespan
+                if end - start > 0.3:
+                    text = ax.text(start, thread_id, f"Task {task_id}", ha='center', va='center', color='white',
+                                   fontsize=8, clip_on=True)
+                    self.labels.append((start, end, text))
+                    
+        ax.set_yticks(list(thread_history))
+        ax.set_yticklabels([f"Thread {thread_id}" for thread_id in thread_history])
+        ax.set_xlabel("Time (seconds)")
+        ax.set_title("Thread Activity Timeline")
+        ax.grid(True, axis='x', linestyle='--', alpha=0.7)
+        self.future = ax.add_patch(Rectangle((0, 0), 0, 1, transform=ax.get_xaxis_transform(),
+                                             facecolor=ax.get_facecolor(), edgecolor='none', zorder=1.2))
+                                             
+    def frame_count(self):
+        return self.frames
+        
+    def render(self, index):
+        if self.future is None:
+            return
+        now = self.makespan * index / max(self.frames - 1, 1)
+        self.ax.set_xlim(0, max(now, 1))
+        self.future.set_x(now)
+        self.future.set_width(max(0, 1 - now))
+        for start, end, text in self.labels:
+            end = min(end, now)
+            text.set_visible(end - start > 0.3)
+            text.set_x(start + (end - start) / 2)
+
+
+def make_renderer(job):
+    kind, params = job
+    if kind == "deadlock":
+        return offscreen_deadlock_renderer(**params)
+    return TimelineRenderer(**params)
+
+
+def render_range(job, start, stop, frame_dir, ext=".png"):
+    import matplotlib
+    matplotlib.use("Agg")
+    
+    renderer = make_renderer(job)
+    for index in range(start, stop):
+        renderer.render(index)
+        save_frame(renderer.agg, os.path.join(frame_dir, FRAME_NAME % index + ext))
+    return stop - start
+
+
+def split_range(total, parts):
+    parts = max(1, min(parts, total))
+    bounds = [total * i // parts for i in range(parts + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+
+def gif_frame(data):
+    # Splits a single-image GIF into its colour table, the size bits that
+    # describe the table, and the image block that follows
+    flags = data[10]
+    pos = 13
+    table = b""
+    if flags & 0x80:
+        table = data[pos:pos + (3 << ((flags & 7) + 1))]
+        pos += len(table)
+    while data[pos:pos + 1] == b"!":
+        pos += 2
+        while data[pos]:
+            pos += data[pos] + 1
+        pos += 1
+    return flags & 7, table, data[pos:data.rindex(b";")]
+
+
+def stitch_gif(paths, output, fps):
+    delay = struct.pack("<H", max(1, round(100 / fps)))
+    with open(output, "wb") as out:
+        for index, path in enumerate(paths):
+            with open(path, "rb") as f:
+                data = f.read()
+            if index == 0:
+                out.write(b"GIF89a" + data[6:10] + b"\x70\x00\x00")
+                out.write(b"!\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00")
+            size, table, image = gif_frame(data)
+            out.write(b"!\xf9\x04\x00" + delay + b"\x00\x00")
+            # Each frame keeps its own palette as a local colour table
+            packed = image[9] | 0x80 | size if table and not image[9] & 0x80 else image[9]
+            out.write(image[:9] + bytes([packed]) + table + image[10:])
+        out.write(b";")
+
+
+def stitch(frame_dir, num_frames, output, fps):
+    ext = os.path.splitext(output)[1].lower()
+    
+    if ext == ".gif":
+        stitch_gif([os.path.join(frame_dir, FRAME_NAME % i + ext) for i in range(num_frames)], output, fps)
+    elif ext == ".mp4":
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg is required for MP4 export; export a .gif or a PNG directory instead")
+        subprocess.run([ffmpeg, "-y", "-loglevel", "error", "-framerate", str(fps),
+                        "-i", os.path.join(frame_dir, FRAME_NAME + ".png"), "-pix_fmt", "yuv420p",
+                        "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", output], check=True)
+
+
+def export_frames(job, num_frames, output, fps=10, workers=None, on_progress=None):
+    workers = workers or os.cpu_count() or 1
+    t0 = time.perf_counter()
+    rendered = 0
+    
+    ext = os.path.splitext(output)[1].lower()
+    stitched = ext in (".gif", ".mp4")
+    
+    with tempfile.TemporaryDirectory(prefix="mtds_frames_") as temp_dir:
+        # A PNG directory is written in place instead of being moved there
+        frame_dir = temp_dir if stitched else output
+        os.makedirs(frame_dir, exist_ok=True)
+        # Each worker renders one contiguous range so that scenarios which
+        # build on the previous step only replay their history once.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [pool.submit(render_range, job, start, stop, frame_dir, ".gif" if ext == ".gif" else ".png")
+                       for start, stop in split_range(num_frames, workers)]
+            for future in as_completed(futures):
+                rendered += future.result()
+                if on_progress:
+                    on_progress(rendered, num_frames)
+        render_time = time.perf_counter() - t0
+        
+        if stitched:
+            stitch(frame_dir, num_frames, output, fps)
+        
+    total_time = time.perf_counter() - t0
+    return {
+        "frames": num_frames,
+        "workers": workers,
+        "render_s": render_time,
+        "total_s": total_time,
+        "frames_per_s": num_frames / render_time if render_time else 0.0,
+    }
+
+
+def export_deadlock_scenario(scenario, output, fps=10, workers=None, seed=0, processes=6,
+                             resources=5, steps=0, dpi=80, on_progress=None):
+    params = {"scenario": scenario, "seed": seed, "processes": processes, "resources": resources,
+              "steps": steps, "dpi": dpi}
+    num_frames = offscreen_deadlock_renderer(**params).frame_count()
+    return export_frames(("deadlock", params), num_frames, output, fps, workers, on_progress)
+
+
+def export_timeline(thread_history, output, frames=100, fps=10, workers=None, dpi=80, on_progress=None):
+    params = {"thread_history": thread_history, "frames": frames, "dpi": dpi}
+    return export_frames(("timeline", params), frames, output, fps, workers, on_progress)
+
+
+def format_export_report(report, output):
+    return (f"Exported {report['frames']} frames to {output} with {report['workers']} workers: "
+            f"rendered in {report['render_s']:.1f} s ({report['frames_per_s']:.0f} frames/s), "
+            f"{report['total_s']:.1f} s in total")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render a deadlock scenario offscreen to a GIF, MP4 or PNG directory")
+    parser.add_argument("scenario")
+    parser.add_argument("output")
+    parser.add_argument("--steps", type=int, default=0, help="events for the Random Workload scenario")
+    parser.add_argument("--processes", type=int, default=6)
+    parser.add_argument("--resources", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fps", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--dpi", type=int, default=80)
+    args = parser.parse_args()
+    
+    report = export_deadlock_scenario(args.scenario, args.output, args.fps, args.workers, args.seed,
+                                      args.processes, args.resources, args.steps, args.dpi)
+    print(format_export_report(report, args.output))
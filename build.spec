@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    hiddenimports=['thread_simulator', 'deadlock_visualizer', 'realtime_simulator', 'raster_view', 'inversion_simulator'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
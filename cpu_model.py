@@ -0,0 +1,183 @@
+import argparse
+import heapq
+import random
+from collections import deque
+
+class CoreModel:
+    # Times are in seconds. With the GIL only one thread executes at a time
+    # and it is handed over every `gil_interval`, as CPython does.
+    def __init__(self, cores=8, quantum=0.01, switch_cost=20e-6, migration_penalty=200e-6,
+                 gil=False, gil_interval=0.005, seed=0):
+        self.cores = cores
+        self.quantum = quantum
+        self.switch_cost = switch_cost
+        self.migration_penalty = migration_penalty
+        self.gil = gil
+        self.gil_interval = gil_interval
+        self.seed = seed
+        
+    def describe(self):
+        text = (f"{self.cores} cores, {self.quantum * 1000:g} ms quantum, {self.switch_cost * 1e6:g} us switch, "
+                f"{self.migration_penalty * 1e6:g} us migration")
+        return text + (", GIL" if self.gil else "")
+
+
+class WorkerState:
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.task_id = None
+        self.remaining = 0.0
+        self.task_start = None
+        self.last_core = None
+        self.queued_at = 0.0
+
+
+class CPUResult:
+    def __init__(self, model, workers):
+        self.model = model
+        self.workers = workers
+        self.history = {i: [] for i in range(workers)}
+        self.cpu_time = [0.0] * workers
+        self.ready_time = [0.0] * workers
+        self.core_work = [0.0] * model.cores
+        self.core_overhead = [0.0] * model.cores
+        self.switches = 0
+        self.migrations = 0
+        self.slices = 0
+        self.makespan = 0.0
+        self.work = 0.0
+        
+    def ideal_makespan(self):
+        # Perfect packing with free switches, ignoring task granularity
+        lanes = 1 if self.model.gil else min(self.workers, self.model.cores)
+        return self.work / lanes if lanes else 0.0
+        
+    def summary(self):
+        capacity = self.model.cores * self.makespan
+        stretches = [(end - start) / duration for events in self.history.values()
+                     for (start, end, _), duration in events if duration]
+        return {
+            "makespan": self.makespan,
+            "ideal_makespan": self.ideal_makespan(),
+            "slowdown": self.makespan / self.ideal_makespan() if self.ideal_makespan() else 0.0,
+            "core_utilization": (sum(self.core_work) + sum(self.core_overhead)) / capacity if capacity else 0.0,
+            "useful_utilization": sum(self.core_work) / capacity if capacity else 0.0,
+            "overhead": sum(self.core_overhead),
+            "switches": self.switches,
+            "migrations": self.migrations,
+            "slices": self.slices,
+            "mean_stretch": sum(stretches) / len(stretches) if stretches else 0.0,
+            "ready_time": sum(self.ready_time),
+        }
+        
+    def thread_history(self):
+        return {worker: [span for span, _ in events] for worker, events in self.history.items()}
+
+
+def simulate_cpu(durations, workers, model):
+    # Discrete-event model of `workers` threads pulling CPU-bound tasks from
+    # one queue and sharing `model.cores` cores round-robin. A core pays the
+    # switch cost whenever it changes thread, and a thread that lands on a
+    # different core than last time re-warms its cache.
+    rng = random.Random(model.seed)
+    result = CPUResult(model, workers)
+    result.work = sum(durations)
+    tasks = deque(enumerate(durations))
+    states = [WorkerState(i) for i in range(workers)]
+    run_queue = deque()
+    quantum = model.gil_interval if model.gil else model.quantum
+    slots = 1 if model.gil else model.cores
+    last_thread = [None] * model.cores
+    events = []
+    idle = []
+    
+    def take_task(state):
+        if not tasks:
+            return False
+        state.task_id, state.remaining = tasks.popleft()
+        state.task_start = None
+        return True
+        
+    def dispatch(slot, now):
+        if not run_queue:
+            idle.append(slot)
+            return
+        state = run_queue.popleft()
+        result.ready_time[state.worker_id] += now - state.queued_at
+        
+        # Under the GIL the OS still places the thread on any core
+        core = rng.randrange(model.cores) if model.gil else slot
+        overhead = 0.0
+        if last_thread[core] is not state.worker_id:
+            overhead += model.switch_cost
+            result.switches += 1
+        if state.last_core is not None and state.last_core != core:
+            # Re-warming the cache is time lost on the core, not task progress
+            overhead += model.migration_penalty
+            result.migrations += 1
+        last_thread[core] = state.worker_id
+        state.last_core = core
+        
+        start = now + overhead
+        if state.task_start is None:
+            state.task_start = start
+        run = min(quantum, state.remaining)
+        result.core_overhead[core] += overhead
+        result.core_work[core] += run
+        result.slices += 1
+        heapq.heappush(events, (start + run, result.slices, slot, state, run))
+        
+    for state in states:
+        if take_task(state):
+            run_queue.append(state)
+    for slot in range(slots):
+        dispatch(slot, 0.0)
+        
+    while events:
+        now, _, slot, state, run = heapq.heappop(events)
+        state.remaining -= run
+        result.cpu_time[state.worker_id] += run
+        if state.remaining <= 1e-12:
+            result.history[state.worker_id].append(((state.task_start, now, state.task_id), durations[state.task_id]))
+            result.makespan = max(result.makespan, now)
+            runnable = take_task(state)
+        else:
+            runnable = True
+        if runnable:
+            state.queued_at = now
+            run_queue.append(state)
+            
+        # The freed slot goes first so that a thread with nobody waiting
+        # behind it keeps its core; anything left over wakes idle slots
+        dispatch(slot, now)
+        while idle and run_queue:
+            dispatch(idle.pop(), now)
+            
+    return result
+
+
+def format_summary(summary, model, workers):
+    return (f"{workers} workers on {model.describe()}: makespan {summary['makespan']:.2f} s "
+            f"(ideal {summary['ideal_makespan']:.2f} s, {summary['slowdown']:.2f}x), "
+            f"cores {summary['core_utilization'] * 100:.0f}% busy / {summary['useful_utilization'] * 100:.0f}% useful, "
+            f"{summary['switches']} context switches and {summary['migrations']} migrations "
+            f"({summary['overhead'] * 1000:.1f} ms), tasks stretched {summary['mean_stretch']:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare worker pool sizes on a simulated multi-core CPU")
+    parser.add_argument("--cores", type=int, default=8)
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--quantum-ms", type=float, default=10.0)
+    parser.add_argument("--switch-us", type=float, default=20.0)
+    parser.add_argument("--migration-us", type=float, default=200.0)
+    parser.add_argument("--gil", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    durations = [rng.uniform(0.5, 2.0) for _ in range(args.tasks)]
+    model = CoreModel(args.cores, args.quantum_ms / 1000, args.switch_us / 1e6, args.migration_us / 1e6,
+                      args.gil, seed=args.seed)
+    for workers in (1, args.cores // 2 or 1, args.cores, 2 * args.cores, 8 * args.cores):
+        print(format_summary(simulate_cpu(durations, workers, model).summary(), model, workers))
@@ -0,0 +1,189 @@
+import networkx as nx
+
+def strongly_connected_components(graph):
+    # Iterative Tarjan over a {node: successors} mapping, linear in nodes
+    # plus edges and safe for wait chains longer than the recursion limit.
+    index = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+    
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph.get(root, ())))]
+        
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = lowlink[successor] = counter
+                    counter += 1
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(graph.get(successor, ()))))
+                    break
+                if successor in on_stack:
+                    lowlink[node] = min(lowlink[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+                    
+    return components
+
+
+def wait_for_projection(G):
+    # Collapse a resource allocation graph to process -> process edges:
+    # P waits for Q when P requests a resource that is allocated to Q.
+    wait_for = {}
+    for u, v, d in G.edges(data=True):
+        if d.get('type') == 'request':
+            for _, owner, e in G.out_edges(v, data=True):
+                if e.get('type') == 'allocation' and owner != u:
+                    wait_for.setdefault(u, set()).add(owner)
+    return wait_for
+
+
+def deadlocked_sets(wait_for):
+    return [c for c in strongly_connected_components(wait_for)
+            if len(c) > 1 or c[0] in wait_for.get(c[0], ())]
+
+
+class DeadlockDetector:
+    def __init__(self):
+        # Single-instance resources: each resource has at most one holder and
+        # each blocked process waits on exactly one resource.
+        self.holders = {}
+        self.held = {}
+        self.waiting = {}
+        self.waiters = {}
+        # Maintained wait-for projection: blocked process -> current owner
+        self.wait_for = {}
+        self.deadlocks = []
+        
+    def add_process(self, process):
+        self.held.setdefault(process, set())
+        
+    def add_resource(self, resource):
+        self.waiters.setdefault(resource, [])
+        
+    def is_blocked(self, process):
+        return process in self.waiting
+        
+    def request(self, process, resource):
+        self.add_process(process)
+        self.add_resource(resource)
+        
+        owner = self.holders.get(resource)
+        if owner is None:
+            self.holders[resource] = process
+            self.held[process].add(resource)
+            return None
+        if owner == process:
+            return None
+            
+        self.waiting[process] = resource
+        self.waiters[resource].append(process)
+        self.wait_for[process] = owner
+        
+        cycle = self.find_cycle_from(process)
+        if cycle:
+            self.deadlocks.append(cycle)
+        return cycle
+        
+    def release(self, process, resource):
+        if self.holders.get(resource) != process:
+            return None
+            
+        self.held[process].discard(resource)
+        del self.holders[resource]
+        
+        queue = self.waiters.get(resource)
+        if queue:
+            next_process = queue.pop(0)
+            del self.waiting[next_process]
+            del self.wait_for[next_process]
+            self.holders[resource] = next_process
+            self.held[next_process].add(resource)
+            for waiter in queue:
+                self.wait_for[waiter] = next_process
+            return next_process
+        return None
+        
+    def cancel_request(self, process):
+        resource = self.waiting.pop(process, None)
+        if resource is not None:
+            self.waiters[resource].remove(process)
+            del self.wait_for[process]
+        return resource
+        
+    def abort(self, process):
+        self.cancel_request(process)
+        
+        granted = []
+        for resource in list(self.held.get(process, ())):
+            next_process = self.release(process, resource)
+            if next_process is not None:
+                granted.append((next_process, resource))
+        return granted
+            
+    def find_cycle_from(self, process):
+        # Only the new request edge can close a cycle, so it is enough to
+        # follow the wait chain starting at the requesting process.
+        wait_for = self.wait_for
+        path = [process]
+        seen = {process}
+        current = process
+        while current in wait_for:
+            owner = wait_for[current]
+            if owner == process:
+                return path
+            if owner in seen:
+                return None
+            path.append(owner)
+            seen.add(owner)
+            current = owner
+        return None
+        
+    def deadlocked_sets(self):
+        return deadlocked_sets({p: (q,) for p, q in self.wait_for.items()})
+        
+    def wait_for_graph(self):
+        G = nx.DiGraph()
+        for process in self.held:
+            G.add_node(process, type='process')
+        for process, owner in self.wait_for.items():
+            G.add_edge(process, owner, type='wait')
+        return G
+        
+    def deadlocked_resources(self, cycle):
+        return [self.waiting[p] for p in cycle if p in self.waiting]
+        
+    def to_graph(self):
+        G = nx.DiGraph()
+        for process in self.held:
+            G.add_node(process, type='process')
+        for resource in self.waiters:
+            G.add_node(resource, type='resource')
+        for resource, process in self.holders.items():
+            G.add_edge(resource, process, type='allocation')
+        for process, resource in self.waiting.items():
+            G.add_edge(process, resource, type='request')
+        return G
@@ -0,0 +1,248 @@
+import argparse
+import bisect
+import copy
+import random
+import time
+
+from deadlock_detector import DeadlockDetector
+from rag_workload import RAGWorkloadGenerator
+
+TERMINATION = "Process Termination"
+PREEMPTION = "Resource Preemption"
+ROLLBACK = "Rollback"
+STRATEGIES = [TERMINATION, PREEMPTION, ROLLBACK]
+
+class ProcessState:
+    def __init__(self, name, priority=1):
+        self.name = name
+        self.priority = priority
+        self.progress = 0
+        self.checkpoint = 0
+        # Every checkpoint still on record, oldest first; checkpoint is the last
+        self.checkpoints = [0]
+        self.acquired = {}
+
+
+class RecoverySimulator:
+    def __init__(self, detector=None, held_weight=1.0, work_weight=1.0, priority_weight=1.0,
+                 checkpoint_interval=5):
+        self.detector = detector if detector is not None else DeadlockDetector()
+        self.held_weight = held_weight
+        self.work_weight = work_weight
+        self.priority_weight = priority_weight
+        self.checkpoint_interval = checkpoint_interval
+        self.processes = {}
+        
+        self.deadlocks = 0
+        self.victims = []
+        self.work_lost = 0
+        self.recovery_times = []
+        
+    def process(self, name, priority=None):
+        state = self.processes.get(name)
+        if state is None:
+            state = self.processes[name] = ProcessState(name, priority if priority is not None else 1)
+            self.detector.add_process(name)
+        elif priority is not None:
+            state.priority = priority
+        return state
+        
+    def run(self, name, work=1):
+        state = self.process(name)
+        state.progress += work
+        if state.progress - state.checkpoint >= self.checkpoint_interval:
+            state.checkpoint = state.progress
+            state.checkpoints.append(state.progress)
+            
+    def request(self, name, resource):
+        state = self.process(name)
+        cycle = self.detector.request(name, resource)
+        if self.detector.holders.get(resource) == name and resource not in state.acquired:
+            state.acquired[resource] = state.progress
+        return cycle
+        
+    def release(self, name, resource):
+        self.process(name).acquired.pop(resource, None)
+        self.granted(self.detector.release(name, resource), resource)
+        
+    def granted(self, name, resource):
+        if name is not None:
+            state = self.process(name)
+            state.acquired[resource] = state.progress
+            
+    def deadlocked_sets(self):
+        return [set(c) for c in self.detector.deadlocked_sets()]
+        
+    def preemption_target(self, name, component):
+        # Preempt the most recently acquired resource that another member of
+        # the deadlocked set is waiting for, which loses the least work.
+        state = self.processes[name]
+        wanted = {self.detector.waiting.get(p) for p in component}
+        candidates = [r for r in self.detector.held[name] if r in wanted]
+        return max(candidates, key=lambda r: state.acquired.get(r, 0))
+        
+    def rollback_point(self, name, component):
+        # A checkpoint taken after the victim acquired everything it holds
+        # would release nothing, and replaying from it repeats the request
+        # that closed the cycle. Go back to the latest checkpoint before it
+        # acquired a resource that the rest of the cycle is waiting for.
+        state = self.processes[name]
+        acquired_at = state.acquired.get(self.preemption_target(name, component), 0)
+        return state.checkpoints[bisect.bisect_right(state.checkpoints, acquired_at) - 1]
+        
+    def lost_work(self, name, strategy, component):
+        state = self.processes[name]
+        if strategy == TERMINATION:
+            return state.progress
+        if strategy == ROLLBACK:
+            return state.progress - self.rollback_point(name, component)
+        resource = self.preemption_target(name, component)
+        return state.progress - state.acquired.get(resource, 0)
+        
+    def cost(self, name, strategy, component):
+        state = self.processes[name]
+        return (self.held_weight * len(self.detector.held[name])
+                + self.work_weight * self.lost_work(name, strategy, component)
+                + self.priority_weight * state.priority)
+                
+    def select_victim(self, component, strategy):
+        # With single-instance resources every process waits on at most one
+        # other, so each deadlocked set is a single cycle and the cheapest
+        # member breaks it. Overlapping cycles in a larger set are handled by
+        # recomputing the sets after each victim.
+        return min(sorted(component), key=lambda name: self.cost(name, strategy, component))
+        
+    def rewind(self, name, progress):
+        state = self.processes[name]
+        self.detector.cancel_request(name)
+        for resource, acquired_at in sorted(state.acquired.items(), key=lambda item: item[1]):
+            if acquired_at >= progress:
+                self.release(name, resource)
+        state.progress = progress
+        state.checkpoint = min(state.checkpoint, progress)
+        del state.checkpoints[bisect.bisect_right(state.checkpoints, progress):]
+        if state.checkpoints[-1] < state.checkpoint:
+            state.checkpoints.append(state.checkpoint)
+        
+    def apply(self, name, strategy, component):
+        state = self.processes[name]
+        lost = self.lost_work(name, strategy, component)
+        
+        if strategy == TERMINATION:
+            for granted_name, resource in self.detector.abort(name):
+                self.granted(granted_name, resource)
+            state.acquired = {}
+            state.progress = 0
+            state.checkpoint = 0
+            state.checkpoints = [0]
+        elif strategy == ROLLBACK:
+            self.rewind(name, self.rollback_point(name, component))
+        else:
+            resource = self.preemption_target(name, component)
+            self.rewind(name, state.acquired.get(resource, 0))
+            
+        return lost
+        
+    def remaining_cycles(self, names):
+        components = []
+        for name in names:
+            if any(name in c for c in components):
+                continue
+            cycle = self.detector.find_cycle_from(name)
+            if cycle:
+                components.append(set(cycle))
+        return components
+        
+    def recover(self, strategy, cycle=None):
+        t0 = time.perf_counter()
+        victims = []
+        lost = 0
+        
+        # A freshly detected cycle only needs its own members rechecked;
+        # otherwise find every deadlocked set in the wait-for graph.
+        components = [set(cycle)] if cycle else self.deadlocked_sets()
+        while components:
+            affected = set()
+            for component in components:
+                victim = self.select_victim(component, strategy)
+                lost += self.apply(victim, strategy, component)
+                victims.append(victim)
+                affected.update(component)
+            components = self.remaining_cycles(sorted(affected))
+            
+        elapsed = time.perf_counter() - t0
+        if victims:
+            self.deadlocks += 1
+            self.victims.extend(victims)
+            self.work_lost += lost
+            self.recovery_times.append(elapsed)
+        return victims, lost, elapsed
+
+
+def simulate_recovery(strategy, num_processes=50, num_resources=30, num_events=20000,
+                      request_probability=0.6, cycle_density=0.2, seed=0, checkpoint_interval=5):
+    rng = random.Random(seed)
+    generator = RAGWorkloadGenerator(num_processes, num_resources, request_probability, cycle_density, seed)
+    simulator = RecoverySimulator(checkpoint_interval=checkpoint_interval)
+    for name in generator.processes:
+        simulator.process(name, priority=rng.randint(1, 10))
+    for resource in generator.resources:
+        simulator.detector.add_resource(resource)
+        
+    for _ in range(num_events):
+        event = generator.next_event(rng, simulator.detector)
+        if event is None:
+            continue
+        op, name, resource = event
+        simulator.run(name)
+        if op == 'request':
+            cycle = simulator.request(name, resource)
+            if cycle:
+                simulator.recover(strategy, cycle)
+        elif op == 'release':
+            simulator.release(name, resource)
+            
+    return {
+        "strategy": strategy,
+        "deadlocks": simulator.deadlocks,
+        "victims": len(simulator.victims),
+        "work_lost": simulator.work_lost,
+        "work_kept": sum(state.progress for state in simulator.processes.values()),
+        "recovery_ms_total": sum(simulator.recovery_times) * 1000,
+        "recovery_ms_mean": (sum(simulator.recovery_times) / len(simulator.recovery_times) * 1000
+                             if simulator.recovery_times else 0.0),
+    }
+
+
+def compare_strategies(simulator):
+    results = []
+    for strategy in STRATEGIES:
+        trial = copy.deepcopy(simulator)
+        victims, lost, elapsed = trial.recover(strategy)
+        results.append({"strategy": strategy, "victims": victims, "work_lost": lost,
+                        "recovery_ms": elapsed * 1000, "simulator": trial})
+    return results
+
+
+def format_comparison(results):
+    lines = [f"{'Strategy':<22}{'Deadlocks':>10}{'Victims':>9}{'Work lost':>11}{'Recover ms':>12}"]
+    for r in results:
+        lines.append(f"{r['strategy']:<22}{r['deadlocks']:>10}{r['victims']:>9}{r['work_lost']:>11}"
+                     f"{r['recovery_ms_total']:>12.2f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare deadlock recovery strategies on a random workload")
+    parser.add_argument("--processes", type=int, default=50)
+    parser.add_argument("--resources", type=int, default=30)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--cycle-density", type=float, default=0.2)
+    parser.add_argument("--checkpoint-interval", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    print(format_comparison([simulate_recovery(strategy, args.processes, args.resources, args.events,
+                                               cycle_density=args.cycle_density, seed=args.seed,
+                                               checkpoint_interval=args.checkpoint_interval)
+                             for strategy in STRATEGIES]))
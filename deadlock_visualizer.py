@@ -1,25 +1,39 @@
 import tkinter as tk
-from tkinter import ttk
-import time
+from tkinter import ttk, filedialog
 import threading
 import random
 import numpy as np
 import matplotlib
 matplotlib.use("TkAgg")  
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import networkx as nx
 
+from animation_clock import AnimationClock
+from deadlock_detector import DeadlockDetector, wait_for_projection, deadlocked_sets
+from rag_workload import RAGWorkloadGenerator, apply_event, run_stress, format_report, encode_events, decode_events
+from instrumented_lock import default_graph
+from lock_order import default_checker
+from deadlock_recovery import RecoverySimulator, STRATEGIES, compare_strategies, simulate_recovery, format_comparison
+from animation_export import export_deadlock_scenario, format_export_report
+from raster_view import RasterView
+
+NODE_STYLES = {
+    'process': {'node_shape': 'o', 'node_size': 500},
+    'resource': {'node_shape': 's', 'node_size': 400},
+}
+EDGE_STYLES = {
+    'allocation': {'width': 2},
+    'request': {'width': 2, 'style': 'dashed'},
+    'order': {'width': 2, 'arrowsize': 15, 'connectionstyle': 'arc3,rad=0.1'},
+}
+
 class DeadlockVisualizer:
     def __init__(self, parent):
         self.parent = parent
-        self.frame = ttk.Frame(parent)
         
 
         self.running = False
         self.paused = False
-        self.animation_speed = tk.DoubleVar(value=1.0)
-        self.current_scenario = tk.StringVar(value="Basic Deadlock")
+        self.create_variables()
         
 
         self.G = nx.DiGraph()
@@ -29,23 +43,49 @@ class DeadlockVisualizer:
         self.labels = {}
         
 
-        self.animation_thread = None
+        self.clock = None
         self.current_step = 0
         self.total_steps = 0
         self.scenarios = {
             "Basic Deadlock": self.scenario_basic_deadlock,
             "Hold and Wait": self.scenario_hold_and_wait,
             "Circular Wait": self.scenario_circular_wait,
-            "Resource Hierarchy": self.scenario_resource_hierarchy
+            "Resource Hierarchy": self.scenario_resource_hierarchy,
+            "Random Workload": self.scenario_random_workload,
+            "Live Threads": self.scenario_live_threads,
+            "Lock Order": self.scenario_lock_order
         }
         
-
+        self.workload_events = []
+        self.workload_steps = 0
+        self.workload_detector = None
+        self.workload_detector_step = 0
+        self.stress_thread = None
+        self.live_poll_id = None
+        self.resume_playing = False
+        self.lock_order_violations = []
+        self.recovery_thread = None
+        
+        
+        self.create_widgets()
+        
+        self.load_scenario(self.current_scenario.get())
+        
+    def create_variables(self):
+        self.animation_speed = tk.DoubleVar(value=1.0)
+        self.current_scenario = tk.StringVar(value="Basic Deadlock")
+        self.workload_seed = tk.IntVar(value=0)
+        self.workload_processes = tk.IntVar(value=6)
+        self.workload_resources = tk.IntVar(value=5)
+        self.recovery_strategy = tk.StringVar(value=STRATEGIES[0])
+        self.show_wfg = tk.BooleanVar(value=False)
+        
+    def create_widgets(self):
+        self.frame = ttk.Frame(self.parent)
         self.create_control_panel()
         self.create_visualization_area()
         self.create_info_panel()
         
-        self.load_scenario(self.current_scenario.get())
-        
     def create_control_panel(self):
         control_frame = ttk.Frame(self.frame, padding=10)
         control_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -58,10 +98,10 @@ class DeadlockVisualizer:
         scenario_combo.grid(row=0, column=1, padx=5, pady=5, sticky=tk.W)
         scenario_combo.bind("<<ComboboxSelected>>", lambda e: self.load_scenario(self.current_scenario.get()))
         
-        speed_label = ttk.Label(control_frame, text="Speed:")
+        speed_label = ttk.Label(control_frame, text="Steps/s:")
         speed_label.grid(row=0, column=2, padx=5, pady=5, sticky=tk.W)
         
-        speed_scale = ttk.Scale(control_frame, from_=0.5, to=2.0, variable=self.animation_speed, 
+        speed_scale = ttk.Scale(control_frame, from_=0.5, to=60.0, variable=self.animation_speed, 
                                orient=tk.HORIZONTAL, length=100)
         speed_scale.grid(row=0, column=3, padx=5, pady=5, sticky=tk.W)
         
@@ -74,14 +114,51 @@ class DeadlockVisualizer:
         self.reset_button = ttk.Button(control_frame, text="Reset", command=self.reset_animation)
         self.reset_button.grid(row=0, column=6, padx=5, pady=5)
         
+        seed_label = ttk.Label(control_frame, text="Seed:")
+        seed_label.grid(row=1, column=0, padx=5, pady=5, sticky=tk.W)
+        
+        seed_spinbox = ttk.Spinbox(control_frame, from_=0, to=999999, textvariable=self.workload_seed, width=8)
+        seed_spinbox.grid(row=1, column=1, padx=5, pady=5, sticky=tk.W)
+        
+        processes_label = ttk.Label(control_frame, text="Processes:")
+        processes_label.grid(row=1, column=2, padx=5, pady=5, sticky=tk.W)
+        
+        processes_spinbox = ttk.Spinbox(control_frame, from_=2, to=64, textvariable=self.workload_processes, width=5)
+        processes_spinbox.grid(row=1, column=3, padx=5, pady=5, sticky=tk.W)
+        
+        resources_label = ttk.Label(control_frame, text="Resources:")
+        resources_label.grid(row=1, column=4, padx=5, pady=5, sticky=tk.W)
+        
+        resources_spinbox = ttk.Spinbox(control_frame, from_=1, to=64, textvariable=self.workload_resources, width=5)
+        resources_spinbox.grid(row=1, column=5, padx=5, pady=5, sticky=tk.W)
+        
+        self.stress_button = ttk.Button(control_frame, text="Stress Test", command=self.run_stress_test)
+        self.stress_button.grid(row=1, column=6, padx=5, pady=5)
+        
+        recovery_label = ttk.Label(control_frame, text="Recovery:")
+        recovery_label.grid(row=2, column=0, padx=5, pady=5, sticky=tk.W)
+        
+        recovery_combo = ttk.Combobox(control_frame, textvariable=self.recovery_strategy, 
+                                     values=STRATEGIES, state="readonly", width=20)
+        recovery_combo.grid(row=2, column=1, columnspan=3, padx=5, pady=5, sticky=tk.W)
+        recovery_combo.bind("<<ComboboxSelected>>", lambda e: self.update_step(self.current_step))
+        
+        self.compare_button = ttk.Button(control_frame, text="Compare Recovery", command=self.run_recovery_comparison)
+        self.compare_button.grid(row=2, column=4, columnspan=3, padx=5, pady=5, sticky=tk.W)
+        
+        self.export_button = ttk.Button(control_frame, text="Export", command=self.export_animation)
+        self.export_button.grid(row=2, column=7, padx=5, pady=5)
+        
+        wfg_check = ttk.Checkbutton(control_frame, text="Wait-For Graph", variable=self.show_wfg, 
+                                   command=self.toggle_wait_for_graph)
+        wfg_check.grid(row=2, column=8, padx=5, pady=5)
+        
     def create_visualization_area(self):
         viz_frame = ttk.Frame(self.frame, padding=10)
         viz_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        self.fig = Figure(figsize=(8, 6), dpi=100)
-        self.ax = self.fig.add_subplot(111)
-        self.canvas = FigureCanvasTkAgg(self.fig, master=viz_frame)
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.graph_view = RasterView(viz_frame, figsize=(8, 6), dpi=100)
+        self.graph_view.widget.pack(fill=tk.BOTH, expand=True)
         
         self.update_graph()
         
@@ -97,6 +174,12 @@ class DeadlockVisualizer:
         self.step_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         self.step_scale.bind("<ButtonRelease-1>", self.on_step_change)
         
+        self.fps_label = ttk.Label(step_frame, text="0.0 FPS", width=10)
+        self.fps_label.pack(side=tk.LEFT, padx=5)
+        
+        self.clock = AnimationClock(self.frame, self.advance_animation, self.animation_complete,
+                                    get_speed=self.animation_speed.get)
+        
     def create_info_panel(self):
         info_frame = ttk.LabelFrame(self.frame, text="Deadlock Conditions", padding=10)
         info_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -135,49 +218,80 @@ class DeadlockVisualizer:
         self.desc_text.config(state=tk.DISABLED)
         
     def update_graph(self):
-        self.ax.clear()
+        # The render thread gets copies so the next animation step can change
+        # the graph while this frame is still being drawn
+        self.graph_view.render(self.render_graph, self.G.copy(), dict(self.pos), dict(self.node_colors),
+                               dict(self.edge_colors), dict(self.labels), self.current_scenario.get(),
+                               self.show_wfg.get())
+        
+    def render_graph(self, fig, G, pos, node_colors, edge_colors, labels, scenario, show_wfg):
+        fig.clear()
+        if show_wfg:
+            ax = fig.add_subplot(121)
+            self.draw_wait_for_graph(fig.add_subplot(122), G, pos, labels)
+        else:
+            ax = fig.add_subplot(111)
+        self.draw_graph(ax, G, pos, node_colors, edge_colors, labels, scenario)
+        
+    def draw_graph(self, ax, G, pos, node_colors, edge_colors, labels, scenario):
+        ax.clear()
         
-        if not self.G.nodes():
-            self.ax.set_title("No graph data")
-            self.ax.text(0.5, 0.5, "Select a scenario to visualize", 
+        if not G.nodes():
+            ax.set_title("No graph data")
+            ax.text(0.5, 0.5, "Select a scenario to visualize", 
                         horizontalalignment='center', verticalalignment='center',
-                        transform=self.ax.transAxes)
+                        transform=ax.transAxes)
         else:
-            process_nodes = [n for n, d in self.G.nodes(data=True) if d.get('type') == 'process']
-            resource_nodes = [n for n, d in self.G.nodes(data=True) if d.get('type') == 'resource']
-            
-              Draw processes (circles)
-            if process_nodes:
-                nx.draw_networkx_nodes(self.G, self.pos, nodelist=process_nodes, 
-                                      node_color=[self.node_colors.get(n, 'blue') for n in process_nodes],
-                                      node_shape='o', node_size=500, ax=self.ax)
-            
-            if resource_nodes:
-                nx.draw_networkx_nodes(self.G, self.pos, nodelist=resource_nodes, 
-                                      node_color=[self.node_colors.get(n, 'blue') for n in resource_nodes],
-                                      node_shape='s', node_size=400, ax=self.ax)
-            
-            allocation_edges = [(u, v) for u, v, d in self.G.edges(data=True) if d.get('type') == 'allocation']
-            request_edges = [(u, v) for u, v, d in self.G.edges(data=True) if d.get('type') == 'request']
-            
-            if allocation_edges:
-                nx.draw_networkx_edges(self.G, self.pos, edgelist=allocation_edges, 
-                                      edge_color=[self.edge_colors.get((u, v), 'black') for u, v in allocation_edges],
-                                      width=2, ax=self.ax)
-            
-            if request_edges:
-                nx.draw_networkx_edges(self.G, self.pos, edgelist=request_edges, 
-                                      edge_color=[self.edge_colors.get((u, v), 'black') for u, v in request_edges],
-                                      width=2, style='dashed', ax=self.ax)
-            
-            if self.labels:
-                nx.draw_networkx_labels(self.G, self.pos, labels=self.labels, font_size=10, ax=self.ax)
-            
-            self.ax.set_title(f"Resource Allocation Graph - {self.current_scenario.get()}")
-            
-        self.ax.set_axis_off()
+            for node_type, style in NODE_STYLES.items():
+                nodes = [n for n, d in G.nodes(data=True) if d.get('type') == node_type]
+                if nodes:
+                    nx.draw_networkx_nodes(G, pos, nodelist=nodes, node_color=[node_colors.get(n, 'blue') for n in nodes],
+                                           ax=ax, **style)
+                                           
+            for edge_type, style in EDGE_STYLES.items():
+                edges = [(u, v) for u, v, d in G.edges(data=True) if d.get('type') == edge_type]
+                if edges:
+                    nx.draw_networkx_edges(G, pos, edgelist=edges,
+                                           edge_color=[edge_colors.get(e, 'black') for e in edges], ax=ax, **style)
+                                           
+            if labels:
+                nx.draw_networkx_labels(G, pos, labels=labels, font_size=10, ax=ax)
+            
+            ax.set_title(f"Resource Allocation Graph - {scenario}")
+            
+        ax.set_axis_off()
+        
+    def toggle_wait_for_graph(self):
+        self.update_graph()
         
-        self.canvas.draw()
+    def draw_wait_for_graph(self, ax, G, pos, labels):
+        ax.clear()
+        
+        wait_for = wait_for_projection(G)
+        W = nx.DiGraph()
+        W.add_nodes_from(n for n, d in G.nodes(data=True) if d.get('type') == 'process')
+        for process, owners in wait_for.items():
+            for owner in owners:
+                W.add_edge(process, owner)
+                
+        deadlocked = deadlocked_sets(wait_for)
+        in_deadlock = {p for component in deadlocked for p in component}
+        
+        if W.nodes():
+            nx.draw_networkx_nodes(W, pos, node_shape='o', node_size=500, ax=ax,
+                                  node_color=['#E74C3C' if n in in_deadlock else '#3498DB' for n in W.nodes()])
+            nx.draw_networkx_edges(W, pos, width=2, arrowsize=15, ax=ax,
+                                  edge_color=['#E74C3C' if u in in_deadlock and v in in_deadlock else 'black'
+                                              for u, v in W.edges()])
+            nx.draw_networkx_labels(W, pos, labels={n: labels.get(n, n) for n in W.nodes()},
+                                   font_size=10, ax=ax)
+            
+        if deadlocked:
+            summary = "Deadlocked: " + "; ".join("{" + ", ".join(sorted(c)) + "}" for c in deadlocked)
+        else:
+            summary = "No deadlocked set"
+        ax.set_title(f"Wait-For Graph - {W.number_of_nodes()} nodes, {W.number_of_edges()} edges\n{summary}")
+        ax.set_axis_off()
         
     def update_conditions(self, conditions):
         for condition, value in conditions.items():
@@ -194,6 +308,10 @@ class DeadlockVisualizer:
         self.desc_text.config(state=tk.DISABLED)
         
     def load_scenario(self, scenario_name):
+        if self.live_poll_id:
+            self.frame.after_cancel(self.live_poll_id)
+            self.live_poll_id = None
+            
         self.reset_animation()
         
         self.G = nx.DiGraph()
@@ -211,8 +329,13 @@ class DeadlockVisualizer:
         self.step_scale.config(to=self.total_steps)
         self.step_label.config(text=f"Step: {self.current_step} / {self.total_steps}")
         
+        if scenario_name == "Live Threads":
+            self.poll_live_graph()
+        
     def play_animation(self):
-        if self.running:
+        if self.running and not self.paused:
+            return
+        if self.current_step >= self.total_steps:
             return
             
         self.running = True
@@ -221,21 +344,19 @@ class DeadlockVisualizer:
         self.play_button.config(state=tk.DISABLED)
         self.pause_button.config(state=tk.NORMAL)
         
-        self.animation_thread = threading.Thread(target=self.animation_loop, daemon=True)
-        self.animation_thread.start()
+        self.clock.start(self.current_step, self.total_steps)
         
     def pause_animation(self):
         self.paused = True
+        self.clock.stop()
         self.play_button.config(state=tk.NORMAL)
         self.pause_button.config(state=tk.DISABLED)
         
     def reset_animation(self):
         self.running = False
         self.paused = False
+        self.clock.stop()
         
-        if self.animation_thread and self.animation_thread.is_alive():
-            self.animation_thread.join(0.1)
-            
         self.current_step = 0
         self.step_var.set(0)
         
@@ -248,21 +369,12 @@ class DeadlockVisualizer:
             self.step_scale.config(to=self.total_steps)
             self.step_label.config(text=f"Step: {self.current_step} / {self.total_steps}")
         
-    def animation_loop(self):
-        while self.running and self.current_step < self.total_steps:
-            if not self.paused:
-                self.current_step += 1
-                self.step_var.set(self.current_step)
-                
-                self.frame.after(0, self.update_step, self.current_step)
-                
-                time.sleep(1.0 / self.animation_speed.get())
-            else:
-                time.sleep(0.1)
-                
-        if self.current_step >= self.total_steps:
-            self.frame.after(0, self.animation_complete)
-            
+    def advance_animation(self, step):
+        self.current_step = step
+        self.step_var.set(step)
+        self.update_step(step)
+        self.fps_label.config(text=f"{self.clock.fps:.1f} FPS")
+        
     def animation_complete(self):
         self.running = False
         self.play_button.config(state=tk.NORMAL)
@@ -272,6 +384,7 @@ class DeadlockVisualizer:
         step = self.step_var.get()
         if step != self.current_step:
             self.current_step = step
+            self.clock.step = step
             self.update_step(step)
             
     def update_step(self, step):
@@ -287,6 +400,10 @@ class DeadlockVisualizer:
             self.update_circular_wait_step(step)
         elif scenario == "Resource Hierarchy":
             self.update_resource_hierarchy_step(step)
+        elif scenario == "Random Workload":
+            self.update_random_workload_step(step)
+        elif scenario == "Lock Order":
+            self.update_lock_order_step(step)
             
     def scenario_basic_deadlock(self):
         self.G.add_node('P1', type='process')
@@ -386,7 +503,7 @@ class DeadlockVisualizer:
             self.update_description("Step 5: Deadlock detected! Both processes are waiting for resources held by the other, creating a circular wait. All four conditions for deadlock are now satisfied.")
             
         if step >= 6:
-            self.update_description("Step 6: In a real system, deadlock could be resolved by: 1) Process termination, 2) Resource preemption, or 3) Rollback to a safe state. In this scenario, we simply detect the deadlock.")
+            self.recover_basic_deadlock()
             
         self.update_graph()
         
@@ -725,4 +842,382 @@ class DeadlockVisualizer:
         if step >= 8:
             self.update_description("Step 8: Resource hierarchy is an effective deadlock prevention strategy because it ensures that circular wait can never occur. By requiring processes to request resources in a specific order, we can guarantee that deadlock will not happen, though it may reduce concurrency.")
             
-        self.update_graph()
\ No newline at end of file
+        self.update_graph()
+        
+    def scenario_random_workload(self):
+        generator = RAGWorkloadGenerator(num_processes=self.workload_processes.get(),
+                                         num_resources=self.workload_resources.get(),
+                                         request_probability=0.6,
+                                         cycle_density=0.3,
+                                         seed=self.workload_seed.get())
+        self.workload_events = generator.generate(self.workload_steps or 4 * generator.num_processes)
+        self.workload_detector = None
+        
+        for process in generator.processes:
+            self.G.add_node(process, type='process')
+        for resource in generator.resources:
+            self.G.add_node(resource, type='resource')
+            
+        self.pos = {}
+        for i, process in enumerate(generator.processes):
+            self.pos[process] = (i / max(len(generator.processes) - 1, 1), 1)
+        for i, resource in enumerate(generator.resources):
+            self.pos[resource] = (i / max(len(generator.resources) - 1, 1), 0)
+            
+        self.labels = {node: node for node in self.G.nodes()}
+        
+        for node in self.G.nodes():
+            self.node_colors[node] = '#3498DB'  # Blue
+            
+        self.total_steps = len(self.workload_events)
+        
+        self.update_description(f"This scenario replays a seeded random workload (seed {generator.seed}) of {self.total_steps} request, release and abort events through the deadlock detector. Any cycle the detector finds is highlighted.")
+        
+        self.update_conditions({
+            "Mutual Exclusion": True,
+            "Hold and Wait": False,
+            "No Preemption": True,
+            "Circular Wait": False
+        })
+        
+    def update_random_workload_step(self, step):
+        # Moving forward only replays the new events; moving back starts over
+        if self.workload_detector is None or step < self.workload_detector_step:
+            self.workload_detector = DeadlockDetector()
+            self.workload_detector_step = 0
+            for node, data in self.G.nodes(data=True):
+                if data.get('type') == 'process':
+                    self.workload_detector.add_process(node)
+                else:
+                    self.workload_detector.add_resource(node)
+                    
+        detector = self.workload_detector
+        for event in self.workload_events[self.workload_detector_step:step]:
+            apply_event(detector, event)
+        self.workload_detector_step = step
+            
+        self.G = detector.to_graph()
+        self.edge_colors = {}
+        for u, v, d in self.G.edges(data=True):
+            if d.get('type') == 'allocation':
+                self.edge_colors[(u, v)] = '#2ECC71'  # Green
+            else:
+                self.edge_colors[(u, v)] = '#E74C3C'  # Red
+                
+        for node in self.G.nodes():
+            self.node_colors[node] = '#3498DB'  # Blue
+            
+        deadlocked = set()
+        for process in detector.waiting:
+            if process not in deadlocked:
+                cycle = detector.find_cycle_from(process)
+                if cycle:
+                    deadlocked.update(cycle)
+                    
+        for process in deadlocked:
+            self.node_colors[process] = '#E74C3C'  # Red
+            self.node_colors[detector.waiting[process]] = '#F39C12'  # Orange
+            
+        hold_and_wait = any(detector.held[p] for p in detector.waiting)
+        self.update_conditions({
+            "Mutual Exclusion": True,
+            "Hold and Wait": hold_and_wait,
+            "No Preemption": True,
+            "Circular Wait": bool(deadlocked)
+        })
+        
+        if step >= 1:
+            op, process, resource = self.workload_events[step - 1]
+            if op == 'abort':
+                text = f"Step {step}: {process} is aborted and releases everything it holds."
+            else:
+                text = f"Step {step}: {process} {op}s {resource}."
+            if deadlocked:
+                text += f" Deadlock detected among {', '.join(sorted(deadlocked))}."
+            self.update_description(text)
+            
+        self.update_graph()
+        
+    def run_stress_test(self):
+        if self.stress_thread and self.stress_thread.is_alive():
+            return
+            
+        self.stress_button.config(state=tk.DISABLED)
+        self.update_description("Running stress test...")
+        
+        self.stress_thread = threading.Thread(target=self.stress_test_worker, daemon=True)
+        self.stress_thread.start()
+        
+    def stress_test_worker(self):
+        # Scale the workload well beyond the visualized graph
+        generator = RAGWorkloadGenerator(num_processes=self.workload_processes.get() * 50,
+                                         num_resources=self.workload_resources.get() * 50,
+                                         request_probability=0.6,
+                                         cycle_density=0.2,
+                                         seed=self.workload_seed.get())
+        events = generator.generate(100000)
+        report = run_stress(events)
+        
+        text = (f"Stress test: {generator.num_processes} processes, {generator.num_resources} resources, "
+                f"seed {generator.seed}\n" + format_report(report))
+        self.frame.after(0, self.stress_test_complete, text)
+        
+    def stress_test_complete(self, text):
+        self.stress_button.config(state=tk.NORMAL)
+        self.update_description(text)
+        
+    def scenario_live_threads(self):
+        self.total_steps = 0
+        
+        self.update_description("This view shows the live wait-for graph recorded by instrumented locks. Enable Shared Locks in the Thread Simulator and start a run, or trace a Python program from there; lock owners and waiting threads appear here as they happen, and any deadlock caught by the watchdog is highlighted.")
+        
+        self.update_conditions({
+            "Mutual Exclusion": True,
+            "Hold and Wait": False,
+            "No Preemption": True,
+            "Circular Wait": False
+        })
+        
+    def poll_live_graph(self):
+        self.G = default_graph.to_graph()
+        
+        process_nodes = sorted(n for n, d in self.G.nodes(data=True) if d.get('type') == 'process')
+        resource_nodes = sorted(n for n, d in self.G.nodes(data=True) if d.get('type') == 'resource')
+        
+        self.pos = {}
+        for i, node in enumerate(process_nodes):
+            self.pos[node] = (i / max(len(process_nodes) - 1, 1), 1)
+        for i, node in enumerate(resource_nodes):
+            self.pos[node] = (i / max(len(resource_nodes) - 1, 1), 0)
+        self.labels = {node: node for node in self.G.nodes()}
+        
+        self.node_colors = {node: '#3498DB' for node in self.G.nodes()}  # Blue
+        self.edge_colors = {}
+        for u, v, d in self.G.edges(data=True):
+            if d.get('type') == 'allocation':
+                self.edge_colors[(u, v)] = '#2ECC71'  # Green
+            else:
+                self.edge_colors[(u, v)] = '#E74C3C'  # Red
+                
+        deadlocked = set()
+        for cycle in default_graph.find_deadlocks():
+            deadlocked.update(default_graph.name_of(ident) for ident in cycle)
+            
+        for node in deadlocked:
+            if node in self.G:
+                self.node_colors[node] = '#E74C3C'  # Red
+                for _, resource in self.G.out_edges(node):
+                    self.node_colors[resource] = '#F39C12'  # Orange
+                    
+        self.update_conditions({
+            "Mutual Exclusion": True,
+            "Hold and Wait": any(self.G.in_degree(n) and self.G.out_degree(n) for n in process_nodes),
+            "No Preemption": True,
+            "Circular Wait": bool(deadlocked)
+        })
+        
+        self.update_graph()
+        self.live_poll_id = self.frame.after(250, self.poll_live_graph)
+        
+    def scenario_lock_order(self):
+        self.G = default_checker.to_graph()
+        self.lock_order_violations = self.G.graph.pop("violations")
+        
+        self.pos = nx.circular_layout(self.G) if self.G.nodes() else {}
+        self.labels = {node: node for node in self.G.nodes()}
+        
+        for node in self.G.nodes():
+            self.node_colors[node] = '#3498DB'  # Blue
+        for u, v in self.G.edges():
+            self.edge_colors[(u, v)] = 'black'
+            
+        self.total_steps = len(self.lock_order_violations)
+        
+        self.update_description(f"This scenario shows the lock-order graph recorded across Thread Simulator runs with Shared Locks enabled. An edge A -> B means some thread acquired B while holding A. {len(self.lock_order_violations)} potential inversion(s) have been found; step through them to see each one.")
+        
+        self.update_conditions({
+            "Mutual Exclusion": True,
+            "Hold and Wait": bool(self.G.edges()),
+            "No Preemption": True,
+            "Circular Wait": False
+        })
+        
+    def update_lock_order_step(self, step):
+        for node in self.G.nodes():
+            self.node_colors[node] = '#3498DB'  # Blue
+        for u, v in self.G.edges():
+            self.edge_colors[(u, v)] = 'black'
+            
+        if step >= 1:
+            violation = self.lock_order_violations[step - 1]
+            cycle = violation['cycle']
+            for u, v in zip(cycle, cycle[1:] + cycle[:1]):
+                self.node_colors[u] = '#F39C12'  # Orange
+                self.edge_colors[(u, v)] = '#E74C3C'  # Red
+                
+            self.update_description(f"Step {step}: {violation['thread']} acquired {violation['new_edge'][1]} while holding {violation['new_edge'][0]}, but {', '.join(violation['conflicting_threads'])} acquired them in the order {' -> '.join(cycle)}. No deadlock has to occur for this to be reported: if these threads interleave badly they will deadlock.")
+            
+        self.update_conditions({
+            "Mutual Exclusion": True,
+            "Hold and Wait": bool(self.G.edges()),
+            "No Preemption": True,
+            "Circular Wait": step >= 1
+        })
+        
+        self.update_graph()
+        
+    def recover_basic_deadlock(self):
+        # P1 checkpointed just as it took R1, so rolling it back loses less
+        # than rolling back P2, whose only checkpoint since R2 came too late
+        simulator = RecoverySimulator(checkpoint_interval=4)
+        simulator.process('P1', priority=2)
+        simulator.process('P2', priority=1)
+        simulator.run('P1', 4)
+        simulator.request('P1', 'R1')
+        simulator.run('P2', 1)
+        simulator.request('P2', 'R2')
+        simulator.run('P1', 3)
+        simulator.request('P1', 'R2')
+        simulator.run('P2', 4)
+        simulator.request('P2', 'R1')
+        
+        results = compare_strategies(simulator)
+        strategy = self.recovery_strategy.get()
+        chosen = next(r for r in results if r['strategy'] == strategy)
+        victim = chosen['victims'][0]
+        
+        for u, v in list(self.G.edges()):
+            self.G.remove_edge(u, v)
+        for u, v, d in chosen['simulator'].detector.to_graph().edges(data=True):
+            self.G.add_edge(u, v, type=d['type'])
+            
+        for node in self.G.nodes():
+            self.node_colors[node] = '#3498DB'  # Blue
+        self.node_colors[victim] = '#95A5A6'  # Gray
+        
+        summary = "; ".join(f"{r['strategy']}: victim {r['victims'][0]}, {r['work_lost']} work units lost, {r['recovery_ms']:.3f} ms"
+                            for r in results)
+        self.update_description(f"Step 6: Recovery by {strategy.lower()}. The cheapest victim by held resources, work lost and priority is {victim}, which loses {chosen['work_lost']} work units; the deadlock is broken in {chosen['recovery_ms']:.3f} ms. All strategies: {summary}.")
+        
+        self.update_conditions({
+            "Mutual Exclusion": True,
+            "Hold and Wait": any(chosen['simulator'].detector.held[p] for p in chosen['simulator'].detector.waiting),
+            "No Preemption": strategy != STRATEGIES[1],
+            "Circular Wait": False
+        })
+        
+    def run_recovery_comparison(self):
+        if self.recovery_thread and self.recovery_thread.is_alive():
+            return
+            
+        self.compare_button.config(state=tk.DISABLED)
+        self.update_description("Comparing recovery strategies...")
+        
+        self.recovery_thread = threading.Thread(target=self.recovery_comparison_worker, daemon=True)
+        self.recovery_thread.start()
+        
+    def recovery_comparison_worker(self):
+        processes = self.workload_processes.get() * 10
+        resources = self.workload_resources.get() * 10
+        results = [simulate_recovery(strategy, processes, resources, 20000, seed=self.workload_seed.get())
+                   for strategy in STRATEGIES]
+        
+        text = (f"Recovery comparison: {processes} processes, {resources} resources, 20000 events, "
+                f"seed {self.workload_seed.get()}\n" + format_comparison(results))
+        self.frame.after(0, self.recovery_comparison_complete, text)
+        
+    def recovery_comparison_complete(self, text):
+        self.compare_button.config(state=tk.NORMAL)
+        self.update_description(text)
+        
+    def export_animation(self):
+        scenario = self.current_scenario.get()
+        if scenario in ("Live Threads", "Lock Order"):
+            self.update_description("Live Threads and Lock Order reflect this session's threads and cannot be exported.")
+            return
+            
+        output = filedialog.asksaveasfilename(title="Export Scenario", defaultextension=".gif",
+                                              filetypes=[("GIF", "*.gif"), ("MP4", "*.mp4"), ("PNG frames", "*")])
+        if not output:
+            return
+            
+        self.export_button.config(state=tk.DISABLED)
+        self.update_description(f"Exporting {scenario} to {output}...")
+        
+        params = {"seed": self.workload_seed.get(), "processes": self.workload_processes.get(),
+                  "resources": self.workload_resources.get(), "steps": self.workload_steps}
+        threading.Thread(target=self.export_worker, args=(scenario, output, params), daemon=True).start()
+        
+    def export_worker(self, scenario, output, params):
+        try:
+            message = format_export_report(export_deadlock_scenario(scenario, output, **params), output)
+        except Exception as e:
+            message = f"Export failed: {e}"
+        self.frame.after(0, self.export_complete, message)
+        
+    def export_complete(self, message):
+        self.export_button.config(state=tk.NORMAL)
+        self.update_description(message)
+        
+    def suspend(self):
+        self.resume_playing = self.running and not self.paused
+        if self.resume_playing:
+            self.pause_animation()
+        if self.live_poll_id:
+            self.frame.after_cancel(self.live_poll_id)
+            self.live_poll_id = None
+            
+    def resume(self):
+        if self.current_scenario.get() == "Live Threads":
+            self.poll_live_graph()
+        if self.resume_playing:
+            self.resume_playing = False
+            self.play_animation()
+            
+    def session_state(self):
+        meta = {
+            "scenario": self.current_scenario.get(),
+            "step": self.current_step,
+            "seed": self.workload_seed.get(),
+            "processes": self.workload_processes.get(),
+            "resources": self.workload_resources.get(),
+            "workload_steps": self.workload_steps,
+            "recovery_strategy": self.recovery_strategy.get(),
+            "show_wait_for_graph": self.show_wfg.get(),
+            "lock_order": default_checker.to_dict(),
+        }
+        arrays = {}
+        if self.workload_events:
+            arrays["deadlock/workload"] = (encode_events(self.workload_events), False)
+        return meta, arrays
+        
+    def restore_session(self, meta, session):
+        self.current_scenario.set(meta["scenario"])
+        self.workload_seed.set(meta["seed"])
+        self.workload_processes.set(meta["processes"])
+        self.workload_resources.set(meta["resources"])
+        self.workload_steps = meta["workload_steps"]
+        self.recovery_strategy.set(meta["recovery_strategy"])
+        
+        # Lock-order edges recorded in the saved session are merged into this one
+        default_checker.update(meta["lock_order"])
+        
+        if self.show_wfg.get() != meta["show_wait_for_graph"]:
+            self.show_wfg.set(meta["show_wait_for_graph"])
+            self.toggle_wait_for_graph()
+            
+        self.load_scenario(meta["scenario"])
+        
+        # Replay the saved events rather than trusting the generator to
+        # reproduce them exactly
+        workload = session.array("deadlock/workload")
+        if meta["scenario"] == "Random Workload" and workload is not None:
+            self.workload_events = decode_events(workload)
+            self.workload_detector = None
+            self.total_steps = len(self.workload_events)
+            self.step_scale.config(to=self.total_steps)
+            
+        step = min(meta["step"], self.total_steps)
+        self.current_step = step
+        self.step_var.set(step)
+        self.update_step(step)
@@ -0,0 +1,214 @@
+import threading
+import time
+import networkx as nx
+
+get_ident = threading.get_ident
+
+class WaitForGraph:
+    def __init__(self):
+        # Single dict operations are atomic under the GIL, so the hot path
+        # writes these without taking a lock of its own.
+        self.owners = {}
+        self.waiting = {}
+        self.thread_names = {}
+
+    def name_of(self, ident):
+        name = self.thread_names.get(ident)
+        if name is None:
+            for thread in threading.enumerate():
+                if thread.ident == ident:
+                    name = thread.name
+                    break
+            else:
+                name = f"Thread-{ident}"
+            self.thread_names[ident] = name
+        return name
+
+    def snapshot(self):
+        return dict(self.owners), dict(self.waiting)
+
+    def find_deadlocks(self):
+        owners, waiting = self.snapshot()
+        cycles = []
+        visited = set()
+        for start in waiting:
+            if start in visited:
+                continue
+            path = []
+            index = {}
+            current = start
+            while current in waiting and current not in visited and current not in index:
+                index[current] = len(path)
+                path.append(current)
+                current = owners.get(waiting[current])
+            if current in index:
+                cycles.append(path[index[current]:])
+            visited.update(path)
+        return cycles
+
+    def to_graph(self):
+        owners, waiting = self.snapshot()
+        G = nx.DiGraph()
+        for lock_name in set(owners) | set(waiting.values()):
+            G.add_node(lock_name, type='resource')
+        for ident in set(owners.values()) | set(waiting):
+            G.add_node(self.name_of(ident), type='process')
+        for lock_name, ident in owners.items():
+            G.add_edge(lock_name, self.name_of(ident), type='allocation')
+        for ident, lock_name in waiting.items():
+            G.add_edge(self.name_of(ident), lock_name, type='request')
+        return G
+
+    def clear(self):
+        self.owners.clear()
+        self.waiting.clear()
+        self.thread_names.clear()
+
+
+default_graph = WaitForGraph()
+
+
+class InstrumentedLock:
+    lock_factory = threading.Lock
+
+    def __init__(self, name, graph=None, checker=None):
+        self.name = name
+        self.graph = graph if graph is not None else default_graph
+        self.checker = checker
+        self._lock = self.lock_factory()
+        self._owners = self.graph.owners
+
+    def acquire(self, blocking=True, timeout=-1):
+        # Uncontended fast path: no waiting entry is recorded at all
+        if self._lock.acquire(False):
+            self._owners[self.name] = get_ident()
+            if self.checker is not None:
+                self.checker.on_acquire(self.name)
+            return True
+        if not blocking:
+            return False
+
+        ident = get_ident()
+        self.graph.waiting[ident] = self.name
+        try:
+            acquired = self._lock.acquire(True, timeout)
+        finally:
+            self.graph.waiting.pop(ident, None)
+        if acquired:
+            self._owners[self.name] = ident
+            if self.checker is not None:
+                self.checker.on_acquire(self.name)
+        return acquired
+
+    def release(self):
+        if self.checker is not None:
+            self.checker.on_release(self.name)
+        self._owners.pop(self.name, None)
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class InstrumentedRLock(InstrumentedLock):
+    lock_factory = threading.RLock
+
+    def __init__(self, name, graph=None, checker=None):
+        super().__init__(name, graph, checker)
+        self._count = 0
+
+    def acquire(self, blocking=True, timeout=-1):
+        if self._count and self._owners.get(self.name) == get_ident():
+            self._lock.acquire()
+            self._count += 1
+            return True
+        acquired = super().acquire(blocking, timeout)
+        if acquired:
+            self._count = 1
+        return acquired
+
+    def release(self):
+        # Checked up front: a failed release must not touch the owner's count
+        if not self._count or self._owners.get(self.name) != get_ident():
+            raise RuntimeError("cannot release un-acquired lock")
+        self._count -= 1
+        if self._count == 0:
+            if self.checker is not None:
+                self.checker.on_release(self.name)
+            self._owners.pop(self.name, None)
+        self._lock.release()
+
+    def locked(self):
+        return self._count > 0
+
+
+class DeadlockWatchdog:
+    def __init__(self, graph=None, interval=0.1, on_deadlock=None):
+        self.graph = graph if graph is not None else default_graph
+        self.interval = interval
+        self.on_deadlock = on_deadlock
+        self.running = False
+        self.thread = None
+        self.reported = set()
+        self.scan_times = []
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="DeadlockWatchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread and self.thread.is_alive():
+            self.thread.join(self.interval * 2)
+
+    def run(self):
+        while self.running:
+            t0 = time.perf_counter()
+            cycles = self.graph.find_deadlocks()
+            self.scan_times.append(time.perf_counter() - t0)
+            del self.scan_times[:-100]
+
+            current = set()
+            for cycle in cycles:
+                key = frozenset(cycle)
+                current.add(key)
+                if key not in self.reported and self.on_deadlock:
+                    self.on_deadlock([self.graph.name_of(ident) for ident in cycle])
+            self.reported = current
+
+            time.sleep(self.interval)
+
+
+def measure_overhead(iterations=100000):
+    results = {}
+    graph = WaitForGraph()
+    for label, lock in (("Lock", threading.Lock()),
+                        ("InstrumentedLock", InstrumentedLock("bench", graph)),
+                        ("RLock", threading.RLock()),
+                        ("InstrumentedRLock", InstrumentedRLock("bench-r", graph))):
+        acquire = lock.acquire
+        release = lock.release
+        t0 = time.perf_counter_ns()
+        for _ in range(iterations):
+            acquire()
+            release()
+        results[label] = (time.perf_counter_ns() - t0) / iterations
+
+    results["Lock overhead"] = results["InstrumentedLock"] - results["Lock"]
+    results["RLock overhead"] = results["InstrumentedRLock"] - results["RLock"]
+    return results
+
+
+if __name__ == "__main__":
+    for label, ns in measure_overhead().items():
+        print(f"{label:>18}: {ns:8.1f} ns per acquire/release")
@@ -0,0 +1,224 @@
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+from priority_inversion import (PROTOCOLS, PRESETS, ScenarioError, parse_scenario, compare_protocols,
+                                format_comparison, MAX_HORIZON)
+from raster_view import RasterView
+
+THREAD_COLORS = ['#C0392B', '#2980B9', '#27AE60', '#8E44AD', '#D35400', '#16A085', '#2C3E50', '#7F8C8D']
+
+class InversionSimulator:
+    def __init__(self, parent):
+        self.parent = parent
+        self.frame = ttk.Frame(parent)
+        
+        self.protocol = tk.StringVar(value=PROTOCOLS[0])
+        self.horizon = tk.IntVar(value=0)
+        self.preset = tk.StringVar(value=next(iter(PRESETS)))
+        self.threads = []
+        self.results = {}
+        self.run_id = 0
+        self.visible = True
+        
+        self.create_control_panel()
+        self.create_visualization_area()
+        
+        self.load_preset()
+        
+    def create_control_panel(self):
+        control_frame = ttk.Frame(self.frame, padding=10)
+        control_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        preset_label = ttk.Label(control_frame, text="Scenario:")
+        preset_label.grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
+        
+        preset_combo = ttk.Combobox(control_frame, textvariable=self.preset, values=list(PRESETS),
+                                   state="readonly", width=26)
+        preset_combo.grid(row=0, column=1, padx=5, pady=5, sticky=tk.W)
+        preset_combo.bind("<<ComboboxSelected>>", lambda e: self.load_preset())
+        
+        protocol_label = ttk.Label(control_frame, text="Show Protocol:")
+        protocol_label.grid(row=0, column=2, padx=5, pady=5, sticky=tk.W)
+        
+        protocol_combo = ttk.Combobox(control_frame, textvariable=self.protocol, values=PROTOCOLS,
+                                     state="readonly", width=22)
+        protocol_combo.grid(row=0, column=3, padx=5, pady=5, sticky=tk.W)
+        protocol_combo.bind("<<ComboboxSelected>>", lambda e: self.show_protocol())
+        
+        horizon_label = ttk.Label(control_frame, text="Horizon (0 = auto):")
+        horizon_label.grid(row=0, column=4, padx=5, pady=5, sticky=tk.W)
+        
+        horizon_spinbox = ttk.Spinbox(control_frame, from_=0, to=MAX_HORIZON, increment=10,
+                                      textvariable=self.horizon, width=7)
+        horizon_spinbox.grid(row=0, column=5, padx=5, pady=5, sticky=tk.W)
+        
+        self.run_button = ttk.Button(control_frame, text="Run", command=self.run_scenario)
+        self.run_button.grid(row=0, column=6, padx=5, pady=5)
+        
+    def create_visualization_area(self):
+        viz_frame = ttk.Frame(self.frame, padding=10)
+        viz_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        timeline_frame = ttk.LabelFrame(viz_frame, text="Schedule (hatched: holding a mutex, grey: waiting for one, "
+                                        "red outline: running at a raised priority)", padding=10)
+        timeline_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        self.timeline_view = RasterView(timeline_frame, figsize=(8, 4), dpi=100)
+        self.timeline_view.widget.pack(fill=tk.BOTH, expand=True)
+        
+        bottom_frame = ttk.Frame(viz_frame)
+        bottom_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        scenario_frame = ttk.LabelFrame(bottom_frame, text="Threads (name P=priority [R=release] [T=period] [D=deadline]: "
+                                        "run N, lock M, unlock M)", padding=10)
+        scenario_frame.pack(fill=tk.BOTH, expand=True, side=tk.LEFT, padx=(0, 5))
+        
+        self.scenario_text = tk.Text(scenario_frame, height=8, width=50, wrap=tk.NONE, font=('Consolas', 10))
+        self.scenario_text.pack(fill=tk.BOTH, expand=True)
+        
+        analysis_frame = ttk.LabelFrame(bottom_frame, text="Blocking by Protocol", padding=10)
+        analysis_frame.pack(fill=tk.BOTH, expand=True, side=tk.LEFT, padx=(5, 0))
+        
+        self.analysis_text = tk.Text(analysis_frame, height=8, width=70, wrap=tk.NONE, font=('Consolas', 10))
+        self.analysis_text.pack(fill=tk.BOTH, expand=True)
+        self.analysis_text.config(state=tk.DISABLED)
+        
+    def load_preset(self):
+        self.horizon.set(0)
+        self.scenario_text.delete(1.0, tk.END)
+        self.scenario_text.insert(tk.END, PRESETS[self.preset.get()])
+        self.run_scenario()
+        
+    def show_analysis(self, text):
+        self.analysis_text.config(state=tk.NORMAL)
+        self.analysis_text.delete(1.0, tk.END)
+        self.analysis_text.insert(tk.END, text)
+        self.analysis_text.config(state=tk.DISABLED)
+        
+    def run_scenario(self):
+        # Any earlier run still simulating is now stale
+        self.run_id += 1
+        try:
+            threads = parse_scenario(self.scenario_text.get(1.0, tk.END))
+        except ScenarioError as e:
+            self.run_button.config(state=tk.NORMAL)
+            self.show_analysis(f"Invalid scenario: {e}")
+            return
+            
+        # Every protocol runs on the same scenario so the table compares them.
+        # A long horizon on an overloaded scenario takes a while, so simulate
+        # off the Tk thread and drop the answer if a newer run has started.
+        self.results = {}
+        self.run_button.config(state=tk.DISABLED)
+        self.show_analysis("Simulating...")
+        threading.Thread(target=self.scenario_worker, args=(self.run_id, threads, self.horizon.get() or None),
+                         name="Inversion scenario", daemon=True).start()
+        
+    def scenario_worker(self, run_id, threads, horizon):
+        results = compare_protocols(threads, horizon)
+        self.frame.after(0, self.scenario_complete, run_id, threads, results)
+        
+    def scenario_complete(self, run_id, threads, results):
+        if run_id != self.run_id:
+            return
+        self.run_button.config(state=tk.NORMAL)
+        self.threads = threads
+        self.results = results
+        self.show_protocol()
+        
+    def show_protocol(self):
+        if not self.results:
+            return
+        result = self.results[self.protocol.get()]
+        lines = [format_comparison(self.threads, self.results), "", f"{result.protocol} events:"]
+        lines += [f"{time:>5}  {text}" for time, text in result.events] or ["  none"]
+        self.show_analysis("\n".join(lines))
+        self.update_timeline()
+        
+    def update_timeline(self):
+        # Skip redraws while the module is hidden; resume() catches up
+        if not self.visible:
+            return
+            
+        # Results are never changed once a run has finished, so the render
+        # thread can share them
+        self.timeline_view.render(self.render_timeline, self.threads, self.results.get(self.protocol.get()))
+        
+    def render_timeline(self, fig, threads, result):
+        ax = fig.axes[0] if fig.axes else fig.add_subplot(111)
+        self.draw_timeline(ax, threads, result)
+        
+    def draw_timeline(self, ax, threads, result):
+        ax.clear()
+        if result is None:
+            ax.set_title("No schedule")
+            return
+            
+        colors = {thread.name: THREAD_COLORS[i % len(THREAD_COLORS)] for i, thread in enumerate(threads)}
+        threads = sorted(threads, key=lambda t: t.priority)
+        rows = {thread.name: i for i, thread in enumerate(threads)}
+        
+        # One broken_barh call per thread and style keeps long horizons cheap
+        waits = {}
+        for job, mutex, start, end in result.waits:
+            if end > start:
+                waits.setdefault(job.thread.name, []).append((start, end - start))
+        for name, spans in waits.items():
+            ax.broken_barh(spans, (rows[name] - 0.15, 0.3), facecolors='#BDC3C7', edgecolor='#7F8C8D', alpha=0.8)
+            
+        bars = {}
+        for job, start, end, priority, held in result.segments:
+            raised = priority < job.thread.priority
+            bars.setdefault((job.thread.name, bool(held), raised), []).append((start, end - start))
+            if held and (end - start) / result.horizon > 0.05:
+                label = ",".join(held) + (f" P{priority}" if raised else "")
+                ax.text((start + end) / 2, rows[job.thread.name], label, ha='center', va='center', color='white',
+                        fontsize=7, fontweight='bold')
+        for (name, held, raised), spans in bars.items():
+            ax.broken_barh(spans, (rows[name] - 0.3, 0.6), facecolors=colors[name],
+                           edgecolor='red' if raised else 'none', linewidth=2 if raised else 0,
+                           hatch='//' if held else None, alpha=0.85)
+                           
+        if len(result.jobs) <= 400:
+            for job in result.jobs:
+                row = rows[job.thread.name]
+                ax.plot(job.release, row - 0.4, marker='^', color='gray', markersize=4)
+                if job.missed(result.horizon):
+                    ax.plot(job.deadline, row, marker='x', color='black', markersize=8, mew=2)
+                    
+        ax.set_yticks(list(rows.values()))
+        ax.set_yticklabels([f"{thread.name} (P{thread.priority})" for thread in threads])
+        ax.invert_yaxis()
+        ax.set_xlim(0, result.horizon)
+        ax.set_xlabel("Time (ticks)")
+        title = f"{result.protocol}: {len(result.missed_jobs())} of {len(result.jobs)} jobs missed their deadline"
+        if result.deadlocked:
+            title += ", deadlocked"
+        ax.set_title(title)
+        ax.grid(True, axis='x', linestyle='--', alpha=0.7)
+        
+    def session_state(self):
+        meta = {
+            "preset": self.preset.get(),
+            "protocol": self.protocol.get(),
+            "horizon": self.horizon.get(),
+            "scenario": self.scenario_text.get(1.0, tk.END + "-1c"),
+            "summary": self.analysis_text.get(1.0, tk.END + "-1c"),
+        }
+        return meta, {}
+        
+    def restore_session(self, meta, session):
+        self.preset.set(meta["preset"])
+        self.protocol.set(meta["protocol"])
+        self.horizon.set(meta["horizon"])
+        self.scenario_text.delete(1.0, tk.END)
+        self.scenario_text.insert(tk.END, meta["scenario"])
+        self.run_scenario()
+        
+    def suspend(self):
+        self.visible = False
+        
+    def resume(self):
+        self.visible = True
+        self.update_timeline()
\ No newline at end of file
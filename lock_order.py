@@ -0,0 +1,159 @@
+import json
+import threading
+import networkx as nx
+
+class LockOrderChecker:
+    def __init__(self):
+        # Lock names are interned to small integers and the order graph is
+        # kept as an adjacency set per lock.
+        self.ids = {}
+        self.names = []
+        self.after = []
+        self.edge_threads = {}
+        self.chains = set()
+        self.violations = []
+        self.local = threading.local()
+        self.mutex = threading.Lock()
+
+    def lock_id(self, name):
+        lock_id = self.ids.get(name)
+        if lock_id is None:
+            with self.mutex:
+                lock_id = self.ids.get(name)
+                if lock_id is None:
+                    lock_id = len(self.names)
+                    self.names.append(name)
+                    self.after.append(set())
+                    self.ids[name] = lock_id
+        return lock_id
+
+    def held_stack(self):
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+            self.local.chain = 0
+        return stack
+
+    def on_acquire(self, name):
+        stack = self.held_stack()
+        lock_id = self.lock_id(name)
+        chain = hash((self.local.chain, lock_id))
+
+        # A chain of held locks that has been validated before cannot add any
+        # new order edges, which keeps the common case to one set lookup.
+        if stack and chain not in self.chains:
+            with self.mutex:
+                for held_id, _ in stack:
+                    if held_id != lock_id and lock_id not in self.after[held_id]:
+                        self.add_edge(held_id, lock_id)
+                self.chains.add(chain)
+
+        stack.append((lock_id, self.local.chain))
+        self.local.chain = chain
+
+    def on_release(self, name):
+        stack = self.held_stack()
+        lock_id = self.ids.get(name)
+        for i in range(len(stack) - 1, -1, -1):
+            if stack[i][0] == lock_id:
+                break
+        else:
+            return
+
+        chain = stack[i][1]
+        del stack[i]
+        # Locks released out of order leave a stale chain on the entries above
+        for j in range(i, len(stack)):
+            stack[j] = (stack[j][0], chain)
+            chain = hash((chain, stack[j][0]))
+        self.local.chain = chain
+
+    def add_edge(self, first, second):
+        thread_name = threading.current_thread().name
+        self.after[first].add(second)
+        self.edge_threads[(first, second)] = thread_name
+
+        path = self.find_path(second, first)
+        if path:
+            cycle = [self.names[i] for i in path]
+            self.violations.append({
+                "cycle": cycle,
+                "new_edge": (self.names[first], self.names[second]),
+                "thread": thread_name,
+                "conflicting_threads": sorted({self.edge_threads[(a, b)] for a, b in zip(path, path[1:])}),
+            })
+
+    def find_path(self, source, target):
+        parents = {source: None}
+        stack = [source]
+        while stack:
+            node = stack.pop()
+            if node == target:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = parents[node]
+                return path[::-1]
+            for nxt in self.after[node]:
+                if nxt not in parents:
+                    parents[nxt] = node
+                    stack.append(nxt)
+        return None
+
+    def to_graph(self):
+        # Workers keep adding edges while the graph is built, so take a
+        # consistent snapshot first; the violations come with it
+        with self.mutex:
+            names = list(self.names)
+            edges = [(first, second, self.edge_threads.get((first, second)))
+                     for first, seconds in enumerate(self.after) for second in seconds]
+            violations = list(self.violations)
+        G = nx.DiGraph(violations=violations)
+        for name in names:
+            G.add_node(name, type='resource')
+        for first, second, thread_name in edges:
+            G.add_edge(names[first], names[second], type='order', thread=thread_name)
+        return G
+
+    def to_dict(self):
+        with self.mutex:
+            return {
+                "locks": list(self.names),
+                "edges": [[self.names[a], self.names[b], t] for (a, b), t in self.edge_threads.items()],
+                "violations": list(self.violations),
+            }
+
+    def save(self, path):
+        data = self.to_dict()
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+    def update(self, data):
+        for name in data.get("locks", []):
+            self.lock_id(name)
+        with self.mutex:
+            for first, second, thread_name in data.get("edges", []):
+                a, b = self.ids[first], self.ids[second]
+                self.after[a].add(b)
+                self.edge_threads[(a, b)] = thread_name
+            for violation in data.get("violations", []):
+                violation = dict(violation, new_edge=tuple(violation["new_edge"]))
+                if violation not in self.violations:
+                    self.violations.append(violation)
+
+    def load(self, path):
+        with open(path) as f:
+            self.update(json.load(f))
+
+    def clear(self):
+        with self.mutex:
+            self.ids = {}
+            self.names = []
+            self.after = []
+            self.edge_threads = {}
+            self.chains = set()
+            self.violations = []
+        self.local = threading.local()
+
+
+default_checker = LockOrderChecker()
@@ -1,16 +1,32 @@
+import time
+APP_START = time.perf_counter()
+
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog, messagebox
+import argparse
 import os
 import sys
-from PIL import Image, ImageTk
-import matplotlib
-matplotlib.use("TkAgg")  # Set matplotlib backend
+import multiprocessing
+
+from perf_hud import PerfMonitor
+
+# matplotlib, numpy and networkx are imported with the first module that
+# needs them so the shell window can appear straight away
+MODULE_CLASSES = {
+    "thread": ("thread_simulator", "ThreadSimulator"),
+    "deadlock": ("deadlock_visualizer", "DeadlockVisualizer"),
+    "realtime": ("realtime_simulator", "RealTimeSimulator"),
+    "inversion": ("inversion_simulator", "InversionSimulator"),
+}
 
-from thread_simulator import ThreadSimulator
-from deadlock_visualizer import DeadlockVisualizer
+SESSION_EXTENSION = ".mtds"
+# Lock order edges learned in earlier runs, so a violation can be reported
+# the first time the conflicting order shows up rather than only after both
+# orders have been seen in the same session
+LOCK_ORDER_PATH = os.path.join(os.path.expanduser("~"), ".mtds_lock_order.json")
 
 class MultiThreadingApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, profile_seconds=5.0):
         super().__init__()
         
         self.title("Multi-Threading & Deadlock Simulator")
@@ -45,6 +61,18 @@ class MultiThreadingApp(tk.Tk):
         self.load_logo()
         
         self.current_module = None
+        self.modules = {}
+        self.startup_time = None
+        self.switch_times = {}
+        self.session_status = ""
+        self.lock_order_loaded = False
+        
+        self.after_idle(self.record_startup_time)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        self.perf = PerfMonitor(self, profile_seconds=profile_seconds)
+        self.bind('<F12>', self.perf.toggle_overlay)
+        self.bind('<F9>', self.perf.start_profile)
         
     def create_layout(self):
         self.main_container = ttk.PanedWindow(self, orient=tk.HORIZONTAL)
@@ -77,6 +105,49 @@ class MultiThreadingApp(tk.Tk):
                                  command=lambda: self.show_module("deadlock"))
         deadlock_btn.pack(pady=5, padx=10, fill=tk.X)
         
+        realtime_btn = ttk.Button(self.nav_panel, 
+                                 text="Real-Time Scheduler", 
+                                 style='Nav.TButton',
+                                 command=lambda: self.show_module("realtime"))
+        realtime_btn.pack(pady=5, padx=10, fill=tk.X)
+        
+        inversion_btn = ttk.Button(self.nav_panel, 
+                                  text="Priority Inversion", 
+                                  style='Nav.TButton',
+                                  command=lambda: self.show_module("inversion"))
+        inversion_btn.pack(pady=5, padx=10, fill=tk.X)
+        
+        separator = ttk.Separator(self.nav_panel, orient=tk.HORIZONTAL)
+        separator.pack(fill=tk.X, padx=10, pady=5)
+        
+        save_btn = ttk.Button(self.nav_panel, 
+                             text="Save Session", 
+                             style='Nav.TButton',
+                             command=self.save_session)
+        save_btn.pack(pady=5, padx=10, fill=tk.X)
+        
+        open_btn = ttk.Button(self.nav_panel, 
+                             text="Open Session", 
+                             style='Nav.TButton',
+                             command=self.open_session)
+        open_btn.pack(pady=5, padx=10, fill=tk.X)
+        
+        self.timing_label = ttk.Label(self.nav_panel, text="", foreground='gray', font=('Segoe UI', 9))
+        self.timing_label.pack(side=tk.BOTTOM, pady=10, padx=10, anchor=tk.W)
+        
+    def record_startup_time(self):
+        self.startup_time = time.perf_counter() - APP_START
+        self.update_timing_label()
+        
+    def update_timing_label(self, module_name=None):
+        text = f"Startup: {self.startup_time:.2f} s" if self.startup_time is not None else ""
+        if module_name:
+            kind, seconds = self.switch_times[module_name][-1]
+            text += f"\n{kind} {MODULE_CLASSES[module_name][1]}: {seconds * 1000:.0f} ms"
+        if self.session_status:
+            text += f"\n{self.session_status}"
+        self.timing_label.config(text=text + f"\nF12: performance HUD\nF9: profile threads for {self.perf.profile_seconds:g} s")
+        
     def load_logo(self):
         self.logo_canvas = tk.Canvas(self.content_area, bg='white', highlightthickness=0)
         self.logo_canvas.pack(fill=tk.BOTH, expand=True)
@@ -104,21 +175,130 @@ class MultiThreadingApp(tk.Tk):
             fill='#CCCCCC'
         )
         
+    def load_module(self, module_name):
+        import importlib
+        import matplotlib
+        matplotlib.use("TkAgg")  # Set matplotlib backend
+        
+        module_file, class_name = MODULE_CLASSES[module_name]
+        module_class = getattr(importlib.import_module(module_file), class_name)
+        # lock_order pulls in networkx, so its history is read once a module
+        # that uses it has been imported rather than at startup
+        if "lock_order" in sys.modules and not self.lock_order_loaded:
+            self.load_lock_order()
+        return module_class(self.content_area)
+        
+    def load_lock_order(self):
+        from lock_order import default_checker
+        
+        self.lock_order_loaded = True
+        if not os.path.exists(LOCK_ORDER_PATH):
+            return
+        try:
+            default_checker.load(LOCK_ORDER_PATH)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.set_session_status(f"Ignored lock order history: {e}")
+            
+    def on_close(self):
+        if self.lock_order_loaded:
+            from lock_order import default_checker
+            
+            try:
+                default_checker.save(LOCK_ORDER_PATH)
+            except OSError:
+                pass
+        self.destroy()
+        
     def show_module(self, module_name):
-        # Clear content area
-        for widget in self.content_area.winfo_children():
-            widget.destroy()
-        
-        # Show selected module
-        if module_name == "thread":
-            self.current_module = ThreadSimulator(self.content_area)
-        elif module_name == "deadlock":
-            self.current_module = DeadlockVisualizer(self.content_area)
+        t0 = time.perf_counter()
+        
+        module = self.modules.get(module_name)
+        if module is self.current_module and module is not None:
+            return
             
-        # Pack the module's frame
+        # Hide the current module and pause its background work
         if self.current_module:
-            self.current_module.frame.pack(fill=tk.BOTH, expand=True)
+            self.current_module.suspend()
+            self.current_module.frame.pack_forget()
+        else:
+            self.logo_canvas.pack_forget()
+            
+        # Modules are created on first use and kept afterwards
+        cold = module is None
+        if cold:
+            module = self.modules[module_name] = self.load_module(module_name)
+            for method_name, view_name, label in (("update_timeline", "timeline_view", "timeline render"),
+                                                  ("update_graph", "graph_view", "graph render")):
+                self.perf.instrument(module, method_name)
+                if hasattr(module, view_name):
+                    self.perf.watch(getattr(module, view_name), label)
+        else:
+            module.resume()
+            
+        self.current_module = module
+        self.current_module.frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.update_idletasks()
+        self.switch_times.setdefault(module_name, []).append(("Loaded" if cold else "Switched to", time.perf_counter() - t0))
+        self.update_timing_label(module_name)
+        
+    def save_session(self):
+        if not self.modules:
+            messagebox.showinfo("Save Session", "Open a module and run something first.")
+            return
+            
+        path = filedialog.asksaveasfilename(title="Save Session", defaultextension=SESSION_EXTENSION,
+                                            filetypes=[("Simulator session", "*" + SESSION_EXTENSION)])
+        if not path:
+            return
+            
+        from session_store import save_session
+        
+        t0 = time.perf_counter()
+        modules = {}
+        arrays = {}
+        for module_name, module in self.modules.items():
+            meta, module_arrays = module.session_state()
+            modules[module_name] = meta
+            arrays.update(module_arrays)
+        try:
+            size = save_session(path, modules, arrays)
+        except OSError as e:
+            messagebox.showerror("Save Session", f"Could not save {path}: {e}")
+            return
+        self.set_session_status(f"Saved {size / 1024:.0f} KB in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        
+    def open_session(self):
+        path = filedialog.askopenfilename(title="Open Session",
+                                          filetypes=[("Simulator session", "*" + SESSION_EXTENSION), ("All files", "*")])
+        if not path:
+            return
+            
+        from session_store import load_session, SessionFormatError
+        
+        t0 = time.perf_counter()
+        try:
+            session = load_session(path)
+        except (OSError, SessionFormatError) as e:
+            messagebox.showerror("Open Session", f"Could not open {path}: {e}")
+            return
+            
+        for module_name in MODULE_CLASSES:
+            if module_name in session.modules:
+                if module_name not in self.modules:
+                    self.show_module(module_name)
+                self.modules[module_name].restore_session(session.modules[module_name], session)
+                self.show_module(module_name)
+        self.set_session_status(f"Opened session in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        
+    def set_session_status(self, text):
+        self.session_status = text
+        self.update_timing_label()
 
 if __name__ == "__main__":
-    app = MultiThreadingApp()
+    multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser(description="Multi-Threading & Deadlock Simulator")
+    parser.add_argument("--profile-seconds", type=float, default=5.0, help="how long F9 samples every thread")
+    args, _ = parser.parse_known_args()
+    app = MultiThreadingApp(profile_seconds=args.profile_seconds)
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,231 @@
+import argparse
+import queue
+import random
+import threading
+import time
+import urllib.request
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+DEFAULT_PORT = 9464
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+class Histogram:
+    def __init__(self, buckets=WAIT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class WorkerCounters:
+    # Only the owning worker thread writes these, so no lock is needed; the
+    # publisher may read a value that is one task stale, never a torn one.
+    def __init__(self, buckets=WAIT_BUCKETS):
+        self.tasks_completed = 0
+        self.busy_time = 0.0
+        self.queue_wait = Histogram(buckets)
+        self.lock_wait = Histogram(buckets)
+
+
+class SimulatorMetrics:
+    def __init__(self, buckets=WAIT_BUCKETS):
+        self.buckets = buckets
+        self.workers = {}
+        self.deadlocks = 0
+        self.queue_depth = 0
+        self.snapshot = self.build_snapshot()
+        
+    def worker(self, thread_id):
+        # Counters outlive a run so that they stay monotonic across Clear;
+        # the dict is replaced rather than mutated so readers can iterate it
+        counters = self.workers.get(thread_id)
+        if counters is None:
+            counters = WorkerCounters(self.buckets)
+            self.workers = {**self.workers, thread_id: counters}
+        return counters
+        
+    def record_deadlock(self):
+        self.deadlocks += 1
+        
+    def build_snapshot(self):
+        workers = self.workers
+        waits = {}
+        for kind in ("queue", "lock"):
+            counts = [0] * (len(self.buckets) + 1)
+            total = 0.0
+            for counters in workers.values():
+                histogram = getattr(counters, f"{kind}_wait")
+                for i, count in enumerate(list(histogram.counts)):
+                    counts[i] += count
+                total += histogram.sum
+            waits[kind] = (counts, total)
+        return {
+            "time": time.time(),
+            "tasks_completed": sum(c.tasks_completed for c in workers.values()),
+            "queue_depth": self.queue_depth,
+            "busy_time": {thread_id: c.busy_time for thread_id, c in sorted(workers.items())},
+            "wait": waits,
+            "deadlocks": self.deadlocks,
+        }
+        
+    def publish(self, queue_depth=None):
+        if queue_depth is not None:
+            self.queue_depth = queue_depth
+        # A single reference assignment: scrapers see the old or the new
+        # snapshot, never a partially built one
+        self.snapshot = self.build_snapshot()
+
+
+def format_metrics(snapshot, buckets=WAIT_BUCKETS, openmetrics=False):
+    lines = []
+    
+    def family(name, kind, help_text):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        
+    # OpenMetrics names counter families without the _total suffix
+    counter = "mtds_tasks_completed" if openmetrics else "mtds_tasks_completed_total"
+    family(counter, "counter", "Tasks completed by worker threads.")
+    lines.append(f"mtds_tasks_completed_total {snapshot['tasks_completed']}")
+    
+    family("mtds_queue_depth", "gauge", "Tasks waiting in the shared queue.")
+    lines.append(f"mtds_queue_depth {snapshot['queue_depth']}")
+    
+    counter = "mtds_thread_busy_seconds" if openmetrics else "mtds_thread_busy_seconds_total"
+    family(counter, "counter", "Time each worker thread spent running tasks.")
+    for thread_id, busy in snapshot["busy_time"].items():
+        lines.append(f'mtds_thread_busy_seconds_total{{thread="{thread_id}"}} {busy:.6f}')
+        
+    family("mtds_wait_seconds", "histogram", "Time tasks waited in the queue and for shared locks.")
+    for kind, (counts, total) in snapshot["wait"].items():
+        cumulative = 0
+        for bound, count in zip(list(buckets) + ["+Inf"], counts):
+            cumulative += count
+            le = bound if bound == "+Inf" else repr(float(bound))
+            lines.append(f'mtds_wait_seconds_bucket{{kind="{kind}",le="{le}"}} {cumulative}')
+        lines.append(f'mtds_wait_seconds_count{{kind="{kind}"}} {cumulative}')
+        lines.append(f'mtds_wait_seconds_sum{{kind="{kind}"}} {total:.6f}')
+        
+    counter = "mtds_deadlocks_detected" if openmetrics else "mtds_deadlocks_detected_total"
+    family(counter, "counter", "Deadlocks reported by the lock watchdog.")
+    lines.append(f"mtds_deadlocks_detected_total {snapshot['deadlocks']}")
+    
+    if openmetrics:
+        lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        metrics = self.server.metrics
+        openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+        body = format_metrics(metrics.snapshot, metrics.buckets, openmetrics).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", OPENMETRICS_TYPE if openmetrics else PROMETHEUS_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer:
+    def __init__(self, metrics, host="127.0.0.1", port=DEFAULT_PORT):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+        
+    def start(self):
+        if self.httpd:
+            return
+        self.httpd = HTTPServer((self.host, self.port), MetricsHandler)
+        self.httpd.metrics = self.metrics
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="MetricsServer", daemon=True)
+        self.thread.start()
+        
+    def stop(self):
+        if not self.httpd:
+            return
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.httpd = None
+        self.thread = None
+        
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/metrics"
+
+
+def scrape(url, openmetrics=False, timeout=2.0):
+    request = urllib.request.Request(url, headers={"Accept": OPENMETRICS_TYPE if openmetrics else "text/plain"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read().decode("utf-8")
+
+
+def run_demo(num_threads=4, num_tasks=200, scrape_interval=0.05, port=0):
+    # Headless stand-in for the Thread Simulator: workers record into the
+    # same counters while a local scraper polls the endpoint
+    metrics = SimulatorMetrics()
+    server = MetricsServer(metrics, port=port)
+    server.start()
+    tasks = queue.Queue()
+    enqueued = time.perf_counter()
+    for i in range(num_tasks):
+        tasks.put(i)
+        
+    def worker(thread_id):
+        counters = metrics.worker(thread_id)
+        while True:
+            try:
+                tasks.get_nowait()
+            except queue.Empty:
+                return
+            started = time.perf_counter()
+            counters.queue_wait.observe(started - enqueued)
+            time.sleep(random.uniform(0.001, 0.005))
+            counters.busy_time += time.perf_counter() - started
+            counters.tasks_completed += 1
+            
+    workers = [threading.Thread(target=worker, args=(i,), name=f"Worker {i}") for i in range(num_threads)]
+    for thread in workers:
+        thread.start()
+        
+    scrape_times = []
+    while any(thread.is_alive() for thread in workers):
+        metrics.publish(tasks.qsize())
+        t0 = time.perf_counter()
+        scrape(server.url)
+        scrape_times.append(time.perf_counter() - t0)
+        time.sleep(scrape_interval)
+    metrics.publish(tasks.qsize())
+    text = scrape(server.url, openmetrics=True)
+    server.stop()
+    return text, scrape_times
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve simulator metrics from a headless run and scrape them locally")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+    
+    text, scrape_times = run_demo(args.threads, args.tasks, port=args.port)
+    print(text, end="")
+    scrape_times.sort()
+    print(f"{len(scrape_times)} scrapes during the run, median {scrape_times[len(scrape_times) // 2] * 1000:.2f} ms, "
+          f"max {scrape_times[-1] * 1000:.2f} ms")
@@ -0,0 +1,230 @@
+import json
+import os
+import sys
+import threading
+import time
+import tkinter as tk
+from collections import Counter, deque
+
+class PerfMonitor:
+    def __init__(self, root, heartbeat_ms=16, stall_threshold=0.05, profile_seconds=5.0):
+        self.root = root
+        self.heartbeat_ms = heartbeat_ms
+        self.stall_threshold = stall_threshold
+        self.profile_seconds = profile_seconds
+        
+        self.frame_times = deque(maxlen=120)
+        self.stalls = deque(maxlen=20)
+        self.redraw_times = {}
+        self.backlog = 0
+        self.last_beat = None
+        self.running = False
+        self.heartbeat_id = None
+        
+        self.overlay = None
+        self.overlay_id = None
+        self.message = ""
+        self.profiler = None
+        
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.last_beat = time.perf_counter()
+        self.heartbeat_id = self.root.after(self.heartbeat_ms, self.heartbeat)
+        
+    def stop(self):
+        self.running = False
+        if self.heartbeat_id:
+            self.root.after_cancel(self.heartbeat_id)
+            self.heartbeat_id = None
+        
+    def heartbeat(self):
+        if not self.running:
+            return
+            
+        # The gap between heartbeats is how long the Tk loop took to get back
+        # to us; anything well past the requested delay is a main-thread stall.
+        now = time.perf_counter()
+        frame_time = now - self.last_beat
+        self.last_beat = now
+        self.frame_times.append(frame_time)
+        stall = frame_time - self.heartbeat_ms / 1000
+        if stall > self.stall_threshold:
+            self.stalls.append((time.strftime('%H:%M:%S'), stall))
+            
+        self.backlog = len(self.root.tk.splitlist(self.root.tk.call('after', 'info')))
+        self.heartbeat_id = self.root.after(self.heartbeat_ms, self.heartbeat)
+        
+    def record(self, name, seconds):
+        samples = self.redraw_times.get(name)
+        if samples is None:
+            samples = self.redraw_times[name] = deque(maxlen=60)
+        samples.append(seconds)
+        
+    def instrument(self, obj, method_name):
+        method = getattr(obj, method_name, None)
+        if method is None or getattr(method, "perf_instrumented", False):
+            return
+            
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.record(method_name, time.perf_counter() - t0)
+                
+        timed.perf_instrumented = True
+        setattr(obj, method_name, timed)
+        
+    def watch(self, view, name):
+        # A RasterView redraws on its own thread, so timing the update method
+        # only covers the hand-off; the view reports each redraw it presents
+        view.on_render = lambda seconds: self.record(name, seconds)
+        
+    def toggle_overlay(self, event=None):
+        if self.overlay is None:
+            self.start()
+            self.overlay = tk.Label(self.root, justify=tk.LEFT, anchor=tk.NW, font=('Consolas', 9),
+                                    bg='#1C2833', fg='#2ECC71', padx=8, pady=6)
+            self.overlay.place(relx=1.0, rely=0.0, x=-10, y=10, anchor=tk.NE)
+            self.refresh_overlay()
+        else:
+            # The heartbeat only feeds the overlay, so it stops with it
+            self.stop()
+            if self.overlay_id:
+                self.root.after_cancel(self.overlay_id)
+                self.overlay_id = None
+            self.overlay.destroy()
+            self.overlay = None
+            
+    def summary_lines(self):
+        lines = []
+        if self.frame_times:
+            recent = list(self.frame_times)
+            mean = sum(recent) / len(recent)
+            lines.append(f"Frame time   {mean * 1000:6.1f} ms avg  {max(recent) * 1000:6.1f} ms max")
+            lines.append(f"Loop rate    {1 / mean if mean else 0:6.1f} /s")
+        lines.append(f"Event backlog {self.backlog:5d} pending after() calls")
+        for name, samples in sorted(self.redraw_times.items()):
+            if samples:
+                lines.append(f"{name:<16}{samples[-1] * 1000:6.1f} ms last  {max(samples) * 1000:6.1f} ms max")
+        if self.stalls:
+            worst = max(s for _, s in self.stalls)
+            lines.append(f"Stalls       {len(self.stalls):3d} recent, worst {worst * 1000:.0f} ms")
+            for stamp, stall in list(self.stalls)[-3:]:
+                lines.append(f"  {stamp}  {stall * 1000:6.0f} ms")
+        lines.append(f"Threads      {threading.active_count():3d}")
+        if self.profiler and self.profiler.is_alive():
+            lines.append(f"Profiling... {self.profiler.remaining():.1f} s left")
+        elif self.message:
+            lines.append(self.message)
+        lines.append("F12 hide HUD, F9 profile")
+        return lines
+        
+    def refresh_overlay(self):
+        if self.overlay is None:
+            return
+        self.overlay.config(text="\n".join(self.summary_lines()))
+        self.overlay.lift()
+        self.overlay_id = self.root.after(250, self.refresh_overlay)
+        
+    def start_profile(self, event=None, duration=None, output_dir=None):
+        if self.profiler and self.profiler.is_alive():
+            return
+        duration = duration or self.profile_seconds
+        output_dir = output_dir or os.getcwd()
+        stem = os.path.join(output_dir, time.strftime("profile_%Y%m%d_%H%M%S"))
+        self.message = f"Profiling all threads for {duration:g} s"
+        self.profiler = SamplingProfiler(duration, on_complete=lambda p: self.root.after(0, self.profile_complete, p, stem))
+        self.profiler.start()
+        if self.overlay is None:
+            self.toggle_overlay()
+        
+    def profile_complete(self, profiler, stem):
+        collapsed = profiler.save_collapsed(stem + ".collapsed")
+        speedscope = profiler.save_speedscope(stem + ".speedscope.json")
+        self.message = f"Saved {profiler.sample_count} samples to\n  {os.path.basename(collapsed)}\n  {os.path.basename(speedscope)}"
+
+
+class SamplingProfiler(threading.Thread):
+    def __init__(self, duration=5.0, interval=0.005, on_complete=None):
+        super().__init__(name="SamplingProfiler", daemon=True)
+        self.duration = duration
+        self.interval = interval
+        self.on_complete = on_complete
+        self.stacks = Counter()
+        self.sample_count = 0
+        self.started_at = 0.0
+        self.elapsed = 0.0
+        
+    def remaining(self):
+        return max(0.0, self.duration - (time.perf_counter() - self.started_at))
+        
+    def run(self):
+        own_ident = threading.get_ident()
+        self.started_at = time.perf_counter()
+        deadline = self.started_at + self.duration
+        
+        while time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_name, code.co_filename, frame.f_lineno))
+                    frame = frame.f_back
+                stack.reverse()
+                self.stacks[(names.get(ident, f"Thread-{ident}"), tuple(stack))] += 1
+            self.sample_count += 1
+            time.sleep(self.interval)
+            
+        self.elapsed = time.perf_counter() - self.started_at
+        if self.on_complete:
+            self.on_complete(self)
+            
+    def save_collapsed(self, path):
+        with open(path, "w") as f:
+            for (thread_name, stack), count in self.stacks.most_common():
+                frames = ";".join(f"{name} ({os.path.basename(filename)}:{line})" for name, filename, line in stack)
+                f.write(f"{thread_name};{frames} {count}\n")
+        return path
+        
+    def save_speedscope(self, path):
+        frame_index = {}
+        frames = []
+        profiles = {}
+        weight = self.elapsed / self.sample_count if self.sample_count else self.interval
+        
+        for (thread_name, stack), count in self.stacks.items():
+            indices = []
+            for name, filename, line in stack:
+                key = (name, filename, line)
+                if key not in frame_index:
+                    frame_index[key] = len(frames)
+                    frames.append({"name": name, "file": filename, "line": line})
+                indices.append(frame_index[key])
+            profile = profiles.setdefault(thread_name, {"samples": [], "weights": []})
+            profile["samples"].append(indices)
+            profile["weights"].append(count * weight)
+            
+        data = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": os.path.basename(path),
+            "exporter": "Multi-Threading & Deadlock Simulator",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": thread_name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(profile["weights"]),
+                "samples": profile["samples"],
+                "weights": profile["weights"],
+            } for thread_name, profile in profiles.items()],
+        }
+        with open(path, "w") as f:
+            json.dump(data, f)
+        return path
@@ -0,0 +1,406 @@
+import argparse
+import heapq
+
+NO_PROTOCOL = "No Protocol"
+INHERITANCE = "Priority Inheritance"
+CEILING = "Priority Ceiling"
+PROTOCOLS = [NO_PROTOCOL, INHERITANCE, CEILING]
+
+MAX_HORIZON = 20000
+
+class ScenarioError(ValueError):
+    pass
+
+
+class SimThread:
+    # Times are integer ticks and priority 1 is the highest, as in
+    # rt_scheduler. `steps` is a script of ("run", ticks), ("lock", mutex)
+    # and ("unlock", mutex); locking and unlocking take no time.
+    def __init__(self, name, priority, steps, release=0, period=None, deadline=None):
+        self.name = name
+        self.priority = priority
+        self.steps = steps
+        self.release = release
+        self.period = period
+        self.deadline = deadline if deadline is not None else period
+        
+    def mutexes(self):
+        return {arg for kind, arg in self.steps if kind == "lock"}
+        
+    def work(self):
+        return sum(arg for kind, arg in self.steps if kind == "run")
+        
+    def critical_sections(self):
+        # Length of the outermost critical section around each mutex
+        sections = {}
+        opened = {}
+        elapsed = 0
+        for kind, arg in self.steps:
+            if kind == "run":
+                elapsed += arg
+            elif kind == "lock":
+                opened[arg] = elapsed
+            else:
+                sections[arg] = max(sections.get(arg, 0), elapsed - opened.pop(arg))
+        return sections
+        
+    def to_line(self):
+        fields = [self.name, f"P={self.priority}", f"R={self.release}"]
+        if self.period:
+            fields.append(f"T={self.period}")
+        if self.deadline and self.deadline != self.period:
+            fields.append(f"D={self.deadline}")
+        script = ", ".join(f"{kind} {arg}" for kind, arg in self.steps)
+        return " ".join(fields) + ": " + script
+
+
+class ThreadJob:
+    def __init__(self, thread, index, release):
+        self.thread = thread
+        self.index = index
+        self.release = release
+        self.deadline = release + thread.deadline if thread.deadline else None
+        self.step = 0
+        self.left = None
+        self.held = []
+        self.waiting_for = None
+        self.start = None
+        self.finish = None
+        self.blocking = 0
+        self.lock_wait = 0
+        
+    @property
+    def name(self):
+        return f"{self.thread.name},{self.index}"
+        
+    def missed(self, horizon):
+        if self.deadline is None:
+            return False
+        if self.finish is not None:
+            return self.finish > self.deadline
+        return self.deadline < horizon
+
+
+def parse_scenario(text):
+    threads = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split("#")[0].strip()
+        if not line:
+            continue
+        header, colon, script = line.partition(":")
+        fields = header.split()
+        if not colon or not fields:
+            raise ScenarioError(f"Line {number}: expected 'name P=priority [R=] [T=] [D=]: steps'")
+        if any(thread.name == fields[0] for thread in threads):
+            raise ScenarioError(f"Line {number}: there is already a thread called {fields[0]}")
+            
+        values = {}
+        for field in fields[1:]:
+            key, _, value = field.partition("=")
+            if key.upper() not in ("P", "R", "T", "D") or not value.isdigit():
+                raise ScenarioError(f"Line {number}: expected P=, R=, T= or D= with a whole number, got '{field}'")
+            values[key.upper()] = int(value)
+        if "P" not in values:
+            raise ScenarioError(f"Line {number}: a thread needs a priority (P=)")
+            
+        steps = []
+        held = []
+        for step in script.split(","):
+            parts = step.split()
+            if len(parts) != 2 or parts[0].lower() not in ("run", "lock", "unlock"):
+                raise ScenarioError(f"Line {number}: expected 'run N', 'lock M' or 'unlock M', got '{step.strip()}'")
+            kind, arg = parts[0].lower(), parts[1]
+            if kind == "run":
+                if not arg.isdigit() or not int(arg):
+                    raise ScenarioError(f"Line {number}: 'run' needs a positive number of ticks")
+                steps.append((kind, int(arg)))
+                continue
+            if kind == "lock":
+                if arg in held:
+                    raise ScenarioError(f"Line {number}: {arg} is already held; mutexes are not recursive")
+                held.append(arg)
+            elif arg not in held:
+                raise ScenarioError(f"Line {number}: {arg} is unlocked without being held")
+            else:
+                held.remove(arg)
+            steps.append((kind, arg))
+        if held:
+            raise ScenarioError(f"Line {number}: the script ends still holding {', '.join(held)}")
+        if not any(kind == "run" for kind, _ in steps):
+            raise ScenarioError(f"Line {number}: the script never runs")
+        threads.append(SimThread(fields[0], values["P"], steps, values.get("R", 0), values.get("T"), values.get("D")))
+    if not threads:
+        raise ScenarioError("The scenario is empty")
+    return threads
+
+
+def priority_ceilings(threads):
+    ceilings = {}
+    for thread in threads:
+        for mutex in thread.mutexes():
+            ceilings[mutex] = min(ceilings.get(mutex, thread.priority), thread.priority)
+    return ceilings
+
+
+def default_horizon(threads):
+    last = max(thread.release + 3 * (thread.period or 0) for thread in threads)
+    return min(last + sum(thread.work() for thread in threads), MAX_HORIZON)
+
+
+class InversionResult:
+    def __init__(self, threads, protocol, horizon, ceilings):
+        self.threads = threads
+        self.protocol = protocol
+        self.horizon = horizon
+        self.ceilings = ceilings
+        self.jobs = []
+        self.segments = []
+        self.waits = []
+        self.events = []
+        self.deadlocked = []
+        
+    def missed_jobs(self):
+        return [job for job in self.jobs if job.missed(self.horizon)]
+        
+    def thread_stats(self):
+        stats = {thread.name: {"jobs": 0, "missed": 0, "worst_blocking": 0, "total_blocking": 0,
+                               "worst_lock_wait": 0, "worst_response": 0} for thread in self.threads}
+        for job in self.jobs:
+            entry = stats[job.thread.name]
+            entry["jobs"] += 1
+            if job.missed(self.horizon):
+                entry["missed"] += 1
+            entry["worst_blocking"] = max(entry["worst_blocking"], job.blocking)
+            entry["total_blocking"] += job.blocking
+            entry["worst_lock_wait"] = max(entry["worst_lock_wait"], job.lock_wait)
+            end = job.finish if job.finish is not None else self.horizon
+            entry["worst_response"] = max(entry["worst_response"], end - job.release)
+        return stats
+
+
+def blocking_bounds(threads, protocol):
+    # Worst-case blocking from lower-priority threads (Sha, Rajkumar and
+    # Lehoczky): under inheritance each of them can block a thread once for
+    # one critical section on a mutex whose ceiling is at least its priority,
+    # under the ceiling protocol only the longest such section counts. With
+    # no protocol a medium-priority thread can stretch it without bound.
+    if protocol == NO_PROTOCOL:
+        return {thread.name: None for thread in threads}
+    ceilings = priority_ceilings(threads)
+    bounds = {}
+    for thread in threads:
+        sections = []
+        for lower in threads:
+            if lower.priority <= thread.priority:
+                continue
+            lengths = [length for mutex, length in lower.critical_sections().items()
+                       if ceilings[mutex] <= thread.priority]
+            if lengths:
+                sections.append(max(lengths))
+        if protocol == INHERITANCE:
+            bounds[thread.name] = sum(sections)
+        else:
+            bounds[thread.name] = max(sections, default=0)
+    return bounds
+
+
+def simulate_inversion(threads, protocol, horizon=None):
+    # Preemptive fixed-priority scheduling on one core. Each tick the
+    # highest-priority job that is not waiting for a mutex runs; lock and
+    # unlock steps are settled first since they take no time. A job's
+    # blocking is the number of ticks a lower-priority thread ran while it
+    # was pending.
+    horizon = min(horizon or default_horizon(threads), MAX_HORIZON)
+    ceilings = priority_ceilings(threads)
+    result = InversionResult(threads, protocol, horizon, ceilings)
+    owner = {}
+    waiters = {}
+    active = []
+    order = {thread.name: i for i, thread in enumerate(threads)}
+    counts = [0] * len(threads)
+    releases = [(thread.release, i) for i, thread in enumerate(threads)]
+    heapq.heapify(releases)
+    
+    def effective(job, seen=()):
+        priority = job.thread.priority
+        for mutex in job.held:
+            if protocol == CEILING:
+                priority = min(priority, ceilings[mutex])
+            elif protocol == INHERITANCE:
+                for waiter in waiters.get(mutex, ()):
+                    if waiter not in seen:
+                        priority = min(priority, effective(waiter, seen + (job,)))
+        return priority
+        
+    def pick():
+        # Jobs of one thread run in release order
+        eligible = {}
+        for job in active:
+            eligible.setdefault(job.thread.name, job)
+        runnable = [job for job in eligible.values() if job.waiting_for is None]
+        if not runnable:
+            return None
+        return min(runnable, key=lambda job: (effective(job), job.release, order[job.thread.name]))
+        
+    def acquire(job, mutex):
+        owner[mutex] = job
+        job.held.append(mutex)
+        job.step += 1
+        
+    def settle(now):
+        # Apply lock and unlock steps until the chosen job has work to run
+        while True:
+            job = pick()
+            if job is None:
+                return None
+            if job.step == len(job.thread.steps):
+                job.finish = now
+                active.remove(job)
+                continue
+            kind, arg = job.thread.steps[job.step]
+            if kind == "run":
+                if job.left is None:
+                    job.left = arg
+                return job
+            if kind == "lock":
+                holder = owner.get(arg)
+                if holder is None:
+                    acquire(job, arg)
+                    continue
+                job.waiting_for = arg
+                waiters.setdefault(arg, []).append(job)
+                result.waits.append([job, arg, now, None])
+                result.events.append((now, f"{job.name} blocks on {arg} held by {holder.name}"))
+                continue
+            owner.pop(arg)
+            job.held.remove(arg)
+            job.step += 1
+            queue = waiters.get(arg)
+            if queue:
+                # Hand the mutex straight to the most urgent waiter
+                waiter = min(queue, key=lambda w: (effective(w), w.release, order[w.thread.name]))
+                queue.remove(waiter)
+                waiter.waiting_for = None
+                for wait in result.waits:
+                    if wait[0] is waiter and wait[3] is None:
+                        wait[3] = now
+                acquire(waiter, arg)
+                result.events.append((now, f"{waiter.name} takes {arg} from {job.name}"))
+                
+    now = 0
+    segment = None
+    while now <= horizon:
+        while releases and releases[0][0] <= now:
+            release, i = heapq.heappop(releases)
+            thread = threads[i]
+            job = ThreadJob(thread, counts[i], release)
+            counts[i] += 1
+            active.append(job)
+            result.jobs.append(job)
+            if thread.period:
+                heapq.heappush(releases, (release + thread.period, i))
+                
+        job = settle(now)
+        if now == horizon:
+            break
+        if job is None:
+            segment = None
+            if active and not result.deadlocked:
+                result.deadlocked = [job.name for job in active if job.waiting_for is not None]
+                result.events.append((now, "Deadlock: " + ", ".join(result.deadlocked) + " wait on each other"))
+            # Nothing can run until the next release
+            idle_until = min(releases[0][0] if releases else horizon, horizon)
+            now = max(idle_until, now + 1) if active else idle_until
+            continue
+            
+        if job.start is None:
+            job.start = now
+        priority = effective(job)
+        if priority < job.thread.priority and (segment is None or segment[0] is not job or segment[3] > priority):
+            result.events.append((now, f"{job.name} runs at priority {priority} "
+                                       f"({'ceiling' if protocol == CEILING else 'inherited'})"))
+        for other in active:
+            if other.thread.priority < job.thread.priority:
+                other.blocking += 1
+            if other.waiting_for is not None:
+                other.lock_wait += 1
+                
+        held = tuple(job.held)
+        if segment is not None and segment[0] is job and segment[2] == now and segment[3] == priority and segment[4] == held:
+            segment[2] = now + 1
+        else:
+            segment = [job, now, now + 1, priority, held]
+            result.segments.append(segment)
+        job.left -= 1
+        if not job.left:
+            job.left = None
+            job.step += 1
+        now += 1
+        
+    for wait in result.waits:
+        if wait[3] is None:
+            wait[3] = horizon
+    result.segments = [tuple(segment) for segment in result.segments]
+    result.waits = [tuple(wait) for wait in result.waits]
+    return result
+
+
+def compare_protocols(threads, horizon=None):
+    return {protocol: simulate_inversion(threads, protocol, horizon) for protocol in PROTOCOLS}
+
+
+def format_comparison(threads, results):
+    lines = [f"{'Protocol':<22}{'Thread':<10}{'P':>3}{'Block':>7}{'Bound':>7}{'Wait':>6}{'Resp':>6}{'Missed':>9}"]
+    for protocol, result in results.items():
+        stats = result.thread_stats()
+        bounds = blocking_bounds(threads, protocol)
+        for thread in sorted(threads, key=lambda t: t.priority):
+            entry = stats[thread.name]
+            bound = bounds[thread.name]
+            lines.append(f"{protocol:<22}{thread.name:<10}{thread.priority:>3}{entry['worst_blocking']:>7}"
+                         f"{'-' if bound is None else bound:>7}{entry['worst_lock_wait']:>6}"
+                         f"{entry['worst_response']:>6}{entry['missed']:>5}/{entry['jobs']:<3}")
+        if result.deadlocked:
+            lines.append(f"{'':<22}Deadlocked: {', '.join(result.deadlocked)}")
+        lines.append("")
+    lines.append("Block: worst ticks a lower-priority thread ran while the job was pending; "
+                 "Bound: analytic worst case; Wait: worst ticks waiting for a mutex")
+    return "\n".join(lines)
+
+
+PRESETS = {
+    "Mars Pathfinder": ("# The bus manager shares the information bus with the low-priority weather task;\n"
+                        "# the long-running communications task starves it without a protocol\n"
+                        "Bus P=1 R=2 T=25: run 1, lock bus, run 2, unlock bus, run 1\n"
+                        "Comms P=2 R=3: run 30\n"
+                        "Weather P=3 R=0: run 1, lock bus, run 4, unlock bus, run 1\n"),
+    "Chained blocking": ("# Under inheritance High is blocked once per mutex, under the ceiling only once\n"
+                         "High P=1 R=2: run 1, lock A, run 1, unlock A, lock B, run 1, unlock B, run 1\n"
+                         "Mid P=2 R=1: lock B, run 3, unlock B, run 1\n"
+                         "Low P=3 R=0: lock A, run 3, unlock A, run 1\n"),
+    "Nested locks deadlock": ("# Opposite lock order: inheritance still deadlocks, the ceiling protocol cannot\n"
+                              "High P=1 R=2: lock B, run 2, lock A, run 1, unlock A, unlock B\n"
+                              "Low P=2 R=0: run 1, lock A, run 2, lock B, run 1, unlock B, unlock A, run 1\n"),
+    "Several medium threads": ("Sensor P=1 R=1 T=25 D=12: run 1, lock data, run 2, unlock data, run 1\n"
+                               "Planner P=2 R=2: run 8\n"
+                               "Telemetry P=3 R=3: run 6\n"
+                               "Camera P=4 R=4: run 5\n"
+                               "Logger P=5 R=0: lock data, run 3, unlock data, run 2\n"),
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare mutex protocols on a priority inversion scenario")
+    parser.add_argument("preset", nargs="?", choices=sorted(PRESETS), default="Mars Pathfinder")
+    parser.add_argument("--horizon", type=int, default=None)
+    parser.add_argument("--events", action="store_true", help="print the lock events of each run")
+    args = parser.parse_args()
+    
+    threads = parse_scenario(PRESETS[args.preset])
+    results = compare_protocols(threads, args.horizon)
+    print(format_comparison(threads, results))
+    if args.events:
+        for protocol, result in results.items():
+            print(f"\n== {protocol} ==")
+            for time, text in result.events:
+                print(f"{time:>5}  {text}")
@@ -0,0 +1,707 @@
+import argparse
+import concurrent.futures._base
+import concurrent.futures.thread
+import linecache
+import os
+import queue
+import re
+import runpy
+import selectors
+import socket
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+from instrumented_lock import InstrumentedLock, InstrumentedRLock, WaitForGraph, get_ident
+from session_store import history_to_events
+
+TASK = "task"
+LOCK = "lock"
+IO = "io"
+KINDS = (TASK, LOCK, IO)
+
+PROFILE = "profile"
+SAMPLE = "sample"
+MODES = (PROFILE, SAMPLE)
+
+clock = time.perf_counter
+
+# Builtins that can block, keyed by the __qualname__ a profile function sees
+BLOCKING_CALLS = {
+    "lock.acquire": LOCK, "lock.acquire_lock": LOCK, "RLock.acquire": LOCK,
+    "sleep": IO, "select": IO, "poll.poll": IO, "epoll.poll": IO, "input": IO, "read": IO, "waitpid": IO,
+    "socket.recv": IO, "socket.recv_into": IO, "socket.recvfrom": IO, "socket._accept": IO,
+    "socket.connect": IO, "socket.send": IO, "socket.sendall": IO,
+    "FileIO.read": IO, "FileIO.readinto": IO, "BufferedReader.read": IO, "BufferedReader.readline": IO,
+    "TextIOWrapper.read": IO, "TextIOWrapper.readline": IO,
+}
+
+# The sampler only sees Python frames, so it goes by the name being called
+BLOCKING_NAMES = {
+    "acquire": LOCK, "wait": LOCK, "join": LOCK,
+    "sleep": IO, "select": IO, "poll": IO, "input": IO, "read": IO, "readline": IO, "waitpid": IO,
+    "recv": IO, "recv_into": IO, "recvfrom": IO, "_accept": IO, "connect": IO, "send": IO, "sendall": IO,
+}
+
+# Waits inside these modules are named after the call the program made into
+# them, e.g. Queue.get rather than the lock.acquire it ends in
+LIBRARY_FILES = {module.__file__ for module in (threading, queue, concurrent.futures._base, concurrent.futures.thread,
+                                                socket, selectors, subprocess)}
+THREAD_RUN = threading.Thread.run.__code__
+WORK_ITEM_RUN = concurrent.futures.thread._WorkItem.run.__code__
+OWN_CODES = {InstrumentedLock.acquire.__code__, InstrumentedRLock.acquire.__code__}
+CALLEE = re.compile(r"([A-Za-z_]\w*)\s*\(")
+
+class TracedLock(InstrumentedLock):
+    # Stands in for threading.Lock while a program is traced: `with lock:`
+    # never reaches a profile function, so the lock reports its own waits and
+    # keeps the wait-for graph the deadlock view draws
+    def __init__(self, name, tracer):
+        super().__init__(name, tracer.graph)
+        self.tracer = tracer
+        
+    def acquire(self, blocking=True, timeout=-1):
+        self.tracer.lock_calls += 1
+        if not blocking or not self.locked():
+            return super().acquire(blocking, timeout)
+        state = self.tracer.begin_wait(LOCK, self.name)
+        try:
+            return super().acquire(blocking, timeout)
+        finally:
+            self.tracer.end_wait(state)
+
+
+class TracedRLock(TracedLock, InstrumentedRLock):
+    # Condition uses these to wait on a reentrant lock held more than once
+    def _is_owned(self):
+        return self._count > 0 and self._owners.get(self.name) == get_ident()
+        
+    def _release_save(self):
+        count = self._count
+        for _ in range(count):
+            self.release()
+        return count
+        
+    def _acquire_restore(self, count):
+        for _ in range(count):
+            self.acquire()
+
+
+class ThreadTrace:
+    def __init__(self, index, thread):
+        self.index = index
+        self.thread = thread
+        self.name = thread.name if thread is not None else f"Thread {index}"
+        self.spans = []
+        self.tasks = []
+        # A builtin call in progress (callable, start, kind, frame) and a
+        # traced lock being waited for (start, kind, label)
+        self.pending = None
+        self.blocked = None
+        # What the sampler last saw: (start, kind, label) and (start, frame, label)
+        self.sampled_wait = None
+        self.sampled_task = None
+
+
+class TraceResult:
+    def __init__(self, target, mode, elapsed, threads, labels, history, hook_calls, call_cost, lock_calls,
+                 lock_cost, samples, sample_time, dropped, degraded, error, deadlocks, finished, sample_errors=None):
+        self.target = target
+        self.mode = mode
+        self.elapsed = elapsed
+        self.threads = threads
+        self.labels = labels
+        self.history = history
+        self.hook_calls = hook_calls
+        self.call_cost = call_cost
+        self.lock_calls = lock_calls
+        self.lock_cost = lock_cost
+        self.samples = samples
+        self.sample_time = sample_time
+        self.dropped = dropped
+        self.degraded = degraded
+        self.error = error
+        self.deadlocks = deadlocks
+        self.finished = finished
+        # (count, first traceback) for thread samples the sampler skipped
+        self.sample_errors = sample_errors
+        
+    @property
+    def hook_time(self):
+        return self.hook_calls * self.call_cost
+        
+    @property
+    def lock_time(self):
+        return self.lock_calls * self.lock_cost
+        
+    @property
+    def overhead(self):
+        return (self.hook_time + self.lock_time + self.sample_time) / self.elapsed if self.elapsed else 0.0
+        
+    def events(self):
+        return history_to_events(self.history, self.elapsed)
+        
+    def info(self):
+        return {"target": self.target, "mode": self.mode, "labels": [list(label) for label in self.labels],
+                "threads": list(self.threads), "overhead": self.overhead}
+                
+    def totals(self):
+        # Seconds per (thread, kind), and per label for the waits
+        by_thread = {index: dict.fromkeys(KINDS, 0.0) for index in self.history}
+        task_counts = Counter()
+        by_label = Counter()
+        wait_counts = Counter()
+        for index, spans in self.history.items():
+            for start, end, label in spans:
+                kind = self.labels[label][0]
+                by_thread[index][kind] += end - start
+                if kind == TASK:
+                    task_counts[index] += 1
+                else:
+                    by_label[label] += end - start
+                    wait_counts[label] += 1
+        return by_thread, task_counts, by_label, wait_counts
+
+
+class ProgramTracer:
+    def __init__(self, mode=PROFILE, interval=0.002, budget=0.2, min_wait=2e-4, max_events=200000,
+                 graph=None, task_names=()):
+        if mode not in MODES:
+            raise ValueError(f"Unknown trace mode: {mode}")
+        self.mode = mode
+        self.interval = interval
+        self.budget = budget
+        self.min_wait = min_wait
+        self.max_events = max_events
+        self.graph = graph if graph is not None else WaitForGraph()
+        self.task_names = set(task_names)
+        
+        self.mutex = threading.Lock()
+        self.states = {}
+        self.threads = []
+        self.labels = []
+        self.label_ids = {}
+        self.task_codes = {WORK_ITEM_RUN: True, THREAD_RUN: True}
+        self.callees = {}
+        self.lock_sites = Counter()
+        self.event_count = 0
+        self.dropped = 0
+        
+        self.hooked = False
+        self.calls = 0
+        self.call_cost = 0.0
+        self.lock_calls = 0
+        self.lock_cost = 0.0
+        self.window = (0, 0.0)
+        self.degraded = None
+        self.samples = 0
+        self.sample_time = 0.0
+        self.sample_errors = 0
+        self.sample_error = None
+        self.sampler = None
+        self.stopping = threading.Event()
+        
+        self.t0 = None
+        self.target = None
+        self.runner = None
+        self.error = None
+        self.ignored = set()
+        self.saved = None
+        self.result = None
+        
+    def calibrate(self, n=20000):
+        # Cost of one profile event and of one traced lock acquisition, used
+        # to report the overhead without timing every call
+        timings = []
+        for lock in (threading.Lock(), TracedLock("calibration", self)):
+            t0 = clock()
+            for _ in range(n):
+                lock.acquire()
+                lock.release()
+            timings.append(clock() - t0)
+        self.lock_cost = max(0.0, timings[1] - timings[0]) / n
+        self.lock_calls = 0
+        
+        def noop():
+            pass
+            
+        t0 = clock()
+        for _ in range(n):
+            noop()
+        base = clock() - t0
+        self.hooked = True
+        sys.setprofile(self.profile)
+        t0 = clock()
+        for _ in range(n):
+            noop()
+        hooked = clock() - t0
+        sys.setprofile(None)
+        self.hooked = False
+        self.calls = 0
+        self.call_cost = max(0.0, hooked - base) / (2 * n)
+        
+    def start(self):
+        self.calibrate()
+        self.ignored = {thread.ident for thread in threading.enumerate()}
+        self.saved = (threading.Lock, threading.RLock)
+        threading.Lock = self.make_lock
+        threading.RLock = self.make_rlock
+        self.t0 = clock()
+        self.window = (0, self.t0)
+        if self.mode == PROFILE:
+            self.hooked = True
+            threading.setprofile(self.profile)
+        else:
+            self.start_sampler()
+            
+    def run(self, target, *args, label=None):
+        # Runs target on its own thread so a program that hangs or deadlocks
+        # can still be stopped and shown. It is not a daemon, so the threads
+        # the program starts default to non-daemon as they would on its own.
+        self.target = label or getattr(target, "__qualname__", repr(target))
+        if self.t0 is None:
+            self.start()
+        self.runner = threading.Thread(target=self.run_target, args=(target, args), name="Traced main")
+        self.runner.start()
+        return self.runner
+        
+    def run_target(self, target, args):
+        try:
+            target(*args)
+        except SystemExit:
+            pass
+        except BaseException:
+            self.error = traceback.format_exc()
+            
+    def run_script(self, path, argv=()):
+        path = os.path.abspath(path)
+        
+        def main():
+            saved_argv, saved_path = sys.argv, list(sys.path)
+            sys.argv = [path] + list(argv)
+            sys.path.insert(0, os.path.dirname(path))
+            try:
+                runpy.run_path(path, run_name="__main__")
+            finally:
+                sys.argv = saved_argv
+                sys.path[:] = saved_path
+                
+        return self.run(main, label=os.path.basename(path))
+        
+    def program_threads(self):
+        return [thread for thread in threading.enumerate()
+                if thread.ident not in self.ignored and thread is not self.sampler]
+                
+    def finished(self):
+        # Done once the script has returned and its non-daemon threads exited
+        if self.runner is None or self.runner.is_alive():
+            return False
+        return not any(not thread.daemon for thread in self.program_threads())
+        
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else clock() + timeout
+        while not self.finished():
+            if deadline is not None and clock() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+        
+    def stop(self):
+        if self.result is not None:
+            return self.result
+        end = clock()
+        self.stopping.set()
+        if self.hooked:
+            self.hooked = False
+            threading.setprofile(None)
+        if self.saved:
+            threading.Lock, threading.RLock = self.saved
+        if self.sampler is not None:
+            self.sampler.join(1.0)
+            
+        # Whatever is still open ran until the end; for a hung program these
+        # are the waits it is stuck in
+        cutoff = self.degraded[0] if self.degraded else None
+        for state in self.threads:
+            for frame, start, label in state.tasks:
+                self.add_span(state, start, self.t0 + cutoff if cutoff is not None else end, TASK, label)
+            state.tasks = []
+            self.close_samples(state, end)
+            pending, state.pending = state.pending, None
+            if pending is not None and cutoff is None:
+                self.add_span(state, pending[1], end, pending[2], self.wait_label(pending[3], pending[0]))
+            blocked, state.blocked = state.blocked, None
+            if blocked is not None:
+                self.add_span(state, blocked[0], end, blocked[1], blocked[2])
+                
+        deadlocks = [[self.graph.name_of(ident) for ident in cycle] for cycle in self.graph.find_deadlocks()]
+        self.result = TraceResult(self.target, self.mode, end - self.t0, [state.name for state in self.threads],
+                                  list(self.labels), {state.index: list(state.spans) for state in self.threads},
+                                  self.calls, self.call_cost, self.lock_calls, self.lock_cost, self.samples, self.sample_time, self.dropped,
+                                  self.degraded, self.error, deadlocks, self.finished(),
+                                  (self.sample_errors, self.sample_error) if self.sample_errors else None)
+        return self.result
+        
+    def state(self, ident=None, thread=None):
+        if ident is None:
+            ident = get_ident()
+            thread = threading.current_thread()
+        if ident in self.ignored:
+            return None
+        state = self.states.get(ident)
+        if state is None or (thread is not None and state.thread is not thread):
+            # A new thread, or an old ident reused by one
+            with self.mutex:
+                state = ThreadTrace(len(self.threads), thread)
+                self.threads.append(state)
+                self.states[ident] = state
+        return state
+        
+    def label_id(self, kind, name):
+        key = (kind, name)
+        label = self.label_ids.get(key)
+        if label is None:
+            with self.mutex:
+                label = self.label_ids.get(key)
+                if label is None:
+                    label = len(self.labels)
+                    self.labels.append(key)
+                    self.label_ids[key] = label
+        return label
+        
+    def add_span(self, state, start, end, kind, name):
+        if state is None:
+            return
+        if self.event_count >= self.max_events:
+            self.dropped += 1
+            return
+        self.event_count += 1
+        state.spans.append((start - self.t0, end - self.t0, self.label_id(kind, name)))
+        
+    def begin_wait(self, kind, label):
+        state = self.state()
+        if state is not None:
+            state.blocked = (clock(), kind, label)
+        return state
+        
+    def end_wait(self, state):
+        if state is None or state.blocked is None:
+            return
+        start, kind, label = state.blocked
+        state.blocked = None
+        end = clock()
+        if end - start >= self.min_wait:
+            self.add_span(state, start, end, kind, label)
+            
+    def make_lock(self):
+        return TracedLock(self.lock_name("Lock"), self)
+        
+    def make_rlock(self, *args, **kwargs):
+        return TracedRLock(self.lock_name("RLock"), self)
+        
+    def lock_name(self, kind):
+        # Named after the line in the program that created it
+        frame = sys._getframe(2)
+        while frame.f_back is not None and frame.f_code.co_filename in LIBRARY_FILES:
+            frame = frame.f_back
+        site = f"{kind} {os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno}"
+        self.lock_sites[site] += 1
+        count = self.lock_sites[site]
+        return site if count == 1 else f"{site} #{count}"
+        
+    def is_task(self, frame):
+        code = frame.f_code
+        if code.co_name in self.task_names or code.co_qualname in self.task_names:
+            return True
+        # Thread subclasses that override run()
+        return code.co_name == "run" and isinstance(frame.f_locals.get("self"), threading.Thread)
+        
+    def task_label(self, frame):
+        code = frame.f_code
+        if code is THREAD_RUN:
+            thread = frame.f_locals["self"]
+            if thread is self.runner:
+                return self.target
+            # Thread.run deletes _target in its finally block
+            target = getattr(thread, "_target", None)
+            return getattr(target, "__qualname__", None) or "Thread.run"
+        if code is WORK_ITEM_RUN:
+            return getattr(frame.f_locals["self"].fn, "__qualname__", "work item")
+        return code.co_qualname
+        
+    def wait_label(self, frame, func):
+        if frame.f_code.co_filename in LIBRARY_FILES:
+            while frame.f_back is not None and frame.f_back.f_code.co_filename in LIBRARY_FILES:
+                frame = frame.f_back
+            return frame.f_code.co_qualname
+        name = func.__qualname__ if func is not None else self.callee(frame)
+        if BLOCKING_CALLS.get(name) == LOCK or BLOCKING_NAMES.get(name) == LOCK:
+            return f"{name} at {os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno}"
+        return name
+        
+    def profile(self, frame, event, arg):
+        if not self.hooked:
+            self.detach()
+            return
+        self.calls += 1
+        if not self.calls & 1023:
+            self.check_budget()
+            
+        if event == "call":
+            code = frame.f_code
+            is_task = self.task_codes.get(code)
+            if is_task is None:
+                is_task = self.task_codes[code] = self.is_task(frame)
+            if is_task:
+                state = self.state()
+                if state is not None:
+                    state.tasks.append((frame, clock(), self.task_label(frame)))
+        elif event == "return":
+            if self.task_codes.get(frame.f_code):
+                state = self.state()
+                if state is not None and state.tasks and state.tasks[-1][0] is frame:
+                    _, start, label = state.tasks.pop()
+                    self.add_span(state, start, clock(), TASK, label)
+        elif event == "c_call":
+            kind = BLOCKING_CALLS.get(getattr(arg, "__qualname__", None))
+            if kind is not None and frame.f_code not in OWN_CODES:
+                state = self.state()
+                if state is not None:
+                    state.pending = (arg, clock(), kind, frame)
+        elif BLOCKING_CALLS.get(getattr(arg, "__qualname__", None)) is not None:
+            state = self.state()
+            pending = state.pending if state is not None else None
+            if pending is not None and pending[0] is arg:
+                state.pending = None
+                end = clock()
+                if end - pending[1] >= self.min_wait:
+                    self.add_span(state, pending[1], end, pending[2], self.wait_label(frame, arg))
+                    
+    def check_budget(self):
+        # Measured over short windows so that a call-heavy phase trips it even
+        # after a long quiet one
+        if self.t0 is None:
+            return
+        now = clock()
+        calls, since = self.window
+        if now - since < 0.02:
+            return
+        self.window = (self.calls, now)
+        overhead = (self.calls - calls) * self.call_cost / (now - since)
+        if overhead > self.budget and self.hooked:
+            self.hooked = False
+            threading.setprofile(None)
+            self.degraded = (now - self.t0, overhead)
+            self.start_sampler()
+            
+    def detach(self):
+        # Each thread drops the hook itself the next time it runs; what it had
+        # open ends where the sampler took over
+        sys.setprofile(None)
+        state = self.states.get(get_ident())
+        if state is None or self.degraded is None:
+            return
+        end = self.t0 + self.degraded[0]
+        while state.tasks:
+            _, start, label = state.tasks.pop()
+            self.add_span(state, start, end, TASK, label)
+        state.pending = None
+        
+    def start_sampler(self):
+        self.sampler = threading.Thread(target=self.sample_loop, name="TraceSampler", daemon=True)
+        self.sampler.start()
+        
+    def sample_loop(self):
+        own_ident = get_ident()
+        delay = self.interval
+        while not self.stopping.wait(delay):
+            t0 = clock()
+            threads = {thread.ident: thread for thread in threading.enumerate()}
+            seen = set()
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident or ident in self.ignored:
+                    continue
+                try:
+                    state = self.state(ident, threads.get(ident))
+                    if state is not None:
+                        seen.add(state)
+                        self.observe(state, frame, t0)
+                except Exception:
+                    # A frame that changed under the walk must not stop the
+                    # sampler for the rest of the trace
+                    self.sample_errors += 1
+                    if self.sample_error is None:
+                        self.sample_error = traceback.format_exc()
+            for state in self.threads:
+                # Threads that have exited since the last sample
+                if state not in seen and (state.sampled_wait or state.sampled_task):
+                    self.close_samples(state, t0)
+            cost = clock() - t0
+            self.samples += 1
+            self.sample_time += cost
+            # The sampler holds the GIL while it walks stacks, so it backs off
+            # rather than exceed the overhead budget
+            delay = max(self.interval, cost / self.budget - cost)
+            
+    def observe(self, state, frame, now):
+        wait = self.classify(frame)
+        current = state.sampled_wait
+        if current is not None and (wait is None or current[1:] != wait):
+            self.add_span(state, current[0], now, current[1], current[2])
+            current = state.sampled_wait = None
+        if wait is not None and current is None:
+            state.sampled_wait = (now,) + wait
+            
+        task = frame
+        while task is not None:
+            code = task.f_code
+            is_task = self.task_codes.get(code)
+            if is_task is None:
+                is_task = self.task_codes[code] = self.is_task(task)
+            if is_task:
+                break
+            task = task.f_back
+        current = state.sampled_task
+        if current is not None and current[1] is not task:
+            self.add_span(state, current[0], now, TASK, current[2])
+            current = state.sampled_task = None
+        if task is not None and current is None:
+            state.sampled_task = (now, task, self.task_label(task))
+            
+    def close_samples(self, state, end):
+        if state.sampled_wait is not None:
+            start, kind, label = state.sampled_wait
+            self.add_span(state, start, end, kind, label)
+        if state.sampled_task is not None:
+            self.add_span(state, state.sampled_task[0], end, TASK, state.sampled_task[2])
+        state.sampled_wait = state.sampled_task = None
+        
+    def classify(self, frame):
+        code = frame.f_code
+        if code in OWN_CODES:
+            # Traced locks time their own waits
+            return None
+        name = self.callee(frame)
+        kind = BLOCKING_NAMES.get(name)
+        if kind is None:
+            return None
+        if code.co_filename in (threading.__file__, queue.__file__):
+            kind = LOCK
+        return kind, self.wait_label(frame, None)
+        
+    def callee(self, frame):
+        # Name of the function a frame is calling, from the source span of
+        # the call instruction it stopped on
+        code = frame.f_code
+        key = (code, frame.f_lasti)
+        name = self.callees.get(key)
+        if name is None:
+            name = ""
+            positions = list(code.co_positions())
+            index = frame.f_lasti // 2
+            if 0 <= index < len(positions) and positions[index][0]:
+                line, end_line, col, end_col = positions[index]
+                text = linecache.getline(code.co_filename, line)
+                if col is not None:
+                    text = text[col:end_col if end_line == line else None]
+                match = CALLEE.search(text)
+                if match:
+                    name = match.group(1)
+            self.callees[key] = name
+        return name
+        
+    def elapsed(self):
+        return clock() - self.t0 if self.t0 is not None else 0.0
+        
+    def thread_history(self):
+        # A copy for drawing while the program runs; spans still open end None
+        history = {}
+        for state in list(self.threads):
+            spans = list(state.spans)
+            for frame, start, label in list(state.tasks):
+                spans.append((start - self.t0, None, self.label_id(TASK, label)))
+            sampled = state.sampled_task
+            if sampled is not None:
+                spans.append((sampled[0] - self.t0, None, self.label_id(TASK, sampled[2])))
+            blocked = state.blocked or state.sampled_wait
+            if blocked is not None:
+                spans.append((blocked[0] - self.t0, None, self.label_id(blocked[1], blocked[2])))
+            history[state.index] = spans
+        return history
+        
+    def info(self):
+        return {"target": self.target, "mode": self.mode, "labels": [list(label) for label in self.labels],
+                "threads": [state.name for state in self.threads], "overhead": None}
+
+
+def trace_script(path, argv=(), timeout=None, **options):
+    tracer = ProgramTracer(**options)
+    tracer.run_script(path, argv)
+    tracer.wait(timeout)
+    return tracer.stop()
+
+
+def format_trace(result, top=8):
+    by_thread, task_counts, by_label, wait_counts = result.totals()
+    status = "finished" if result.finished else "still running when the trace stopped"
+    lines = [f"Traced {result.target} for {result.elapsed:.2f} s ({result.mode} mode, {status})",
+             f"{'Thread':<24}{'Tasks':>7}{'Task s':>9}{'Lock wait s':>13}{'I/O s':>9}"]
+    for index, totals in by_thread.items():
+        lines.append(f"{result.threads[index][:23]:<24}{task_counts[index]:>7}{totals[TASK]:>9.3f}"
+                     f"{totals[LOCK]:>13.3f}{totals[IO]:>9.3f}")
+                     
+    if by_label:
+        lines.append("")
+        lines.append("Longest waits:")
+        for label, seconds in by_label.most_common(top):
+            kind, name = result.labels[label]
+            lines.append(f"  {kind:<5}{name[:48]:<49}{seconds:>8.3f} s over {wait_counts[label]}")
+            
+    lines.append("")
+    overhead = [f"Overhead about {result.overhead * 100:.1f}% of the run"]
+    if result.hook_calls:
+        overhead.append(f"{result.hook_calls:,} hook calls x {result.call_cost * 1e6:.2f} us")
+    if result.lock_calls:
+        overhead.append(f"{result.lock_calls:,} lock acquisitions x {result.lock_cost * 1e6:.2f} us")
+    if result.samples:
+        overhead.append(f"{result.samples:,} samples in {result.sample_time * 1000:.0f} ms")
+    lines.append(", ".join(overhead))
+    if result.degraded:
+        at, peak = result.degraded
+        lines.append(f"Profile hook reached {peak * 100:.0f}% overhead at {at:.2f} s; sampled from then on")
+    if result.dropped:
+        lines.append(f"Dropped {result.dropped:,} events past the limit")
+    if result.sample_errors:
+        count, error = result.sample_errors
+        lines.append(f"Skipped {count:,} thread samples after errors; the first was:")
+        lines.append(error.rstrip())
+    for cycle in result.deadlocks:
+        lines.append("Deadlock: " + " -> ".join(cycle + cycle[:1]))
+    if result.error:
+        lines.append("")
+        lines.append(result.error.rstrip())
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trace the threads of a Python script: tasks, lock waits and blocking I/O")
+    parser.add_argument("--mode", choices=MODES, default=PROFILE)
+    parser.add_argument("--interval-ms", type=float, default=2.0, help="sampling interval")
+    parser.add_argument("--budget", type=float, default=0.2, help="overhead allowed before profiling falls back to sampling")
+    parser.add_argument("--min-wait-ms", type=float, default=0.2, help="shorter waits are not recorded")
+    parser.add_argument("--timeout", type=float, default=60.0, help="stop tracing after this many seconds")
+    parser.add_argument("--task", action="append", default=[], help="function name to record as a task")
+    parser.add_argument("script")
+    parser.add_argument("args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+    
+    result = trace_script(args.script, args.args, args.timeout, mode=args.mode, interval=args.interval_ms / 1000,
+                          budget=args.budget, min_wait=args.min_wait_ms / 1000, task_names=args.task)
+    print(format_trace(result))
+    if not result.finished:
+        # The program's threads are still blocked and would keep us alive
+        sys.stdout.flush()
+        os._exit(1)
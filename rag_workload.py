@@ -0,0 +1,193 @@
+import argparse
+import random
+import time
+import tracemalloc
+import numpy as np
+
+from deadlock_detector import DeadlockDetector
+
+class RAGWorkloadGenerator:
+    def __init__(self, num_processes=8, num_resources=8, request_probability=0.6,
+                 cycle_density=0.2, seed=None):
+        if num_processes < 1 or num_resources < 1:
+            raise ValueError("A workload needs at least one process and one resource")
+        if not 0 <= request_probability <= 1 or not 0 <= cycle_density <= 1:
+            raise ValueError("Probabilities must be between 0 and 1")
+        self.num_processes = num_processes
+        self.num_resources = num_resources
+        self.request_probability = request_probability
+        self.cycle_density = cycle_density
+        self.seed = seed
+        
+        self.processes = [f"P{i + 1}" for i in range(num_processes)]
+        self.resources = [f"R{i + 1}" for i in range(num_resources)]
+        
+    def generate(self, num_events):
+        rng = random.Random(self.seed)
+        detector = DeadlockDetector()
+        for process in self.processes:
+            detector.add_process(process)
+        for resource in self.resources:
+            detector.add_resource(resource)
+            
+        events = []
+        while len(events) < num_events:
+            event = None
+            if len(detector.waiting) * 2 < self.num_processes:
+                event = self.next_event(rng, detector)
+            if event is None:
+                # Deadlocked processes never release, so abort a blocked victim
+                # once half the processes are stuck to keep the workload moving
+                event = ('abort', rng.choice(sorted(detector.waiting)), None)
+                
+            apply_event(detector, event)
+            events.append(event)
+            
+        return events
+        
+    def next_event(self, rng, detector):
+        process = rng.choice(self.processes)
+        if detector.is_blocked(process):
+            # Retrying at random can take a long time when most processes are
+            # blocked, so choose among the runnable ones instead
+            runnable = [p for p in self.processes if not detector.is_blocked(p)]
+            if not runnable:
+                return None
+            process = rng.choice(runnable)
+            
+        held = detector.held[process]
+        if held and rng.random() >= self.request_probability:
+            return ('release', process, rng.choice(sorted(held)))
+            
+        if held and detector.waiting and rng.random() < self.cycle_density:
+            resource = self.cycle_closing_resource(rng, detector, process)
+            if resource is not None:
+                return ('request', process, resource)
+                
+        resource = rng.choice(self.resources)
+        if resource in held:
+            free = [r for r in self.resources if r not in held]
+            if not free:
+                # Holding everything leaves nothing to request
+                return ('release', process, rng.choice(sorted(held)))
+            resource = rng.choice(free)
+        return ('request', process, resource)
+        
+    def cycle_closing_resource(self, rng, detector, process, attempts=4):
+        blocked = list(detector.waiting)
+        for _ in range(attempts):
+            candidate = rng.choice(blocked)
+            current = candidate
+            for _ in range(self.num_processes):
+                owner = detector.holders.get(detector.waiting.get(current))
+                if owner is None:
+                    break
+                if owner == process:
+                    held = detector.held[candidate]
+                    if held:
+                        return rng.choice(sorted(held))
+                    break
+                current = owner
+        return None
+
+
+def apply_event(detector, event):
+    op, process, resource = event
+    if op == 'request':
+        return detector.request(process, resource)
+    if op == 'release':
+        detector.release(process, resource)
+    elif op == 'abort':
+        detector.abort(process)
+    return None
+
+
+EVENT_OPS = ('request', 'release', 'abort')
+
+
+def encode_events(events):
+    # One row of (op, process, resource) indices per event; -1 for no resource
+    encoded = np.empty((len(events), 3), dtype=np.int32)
+    for i, (op, process, resource) in enumerate(events):
+        encoded[i] = (EVENT_OPS.index(op), int(process[1:]), int(resource[1:]) if resource else -1)
+    return encoded
+
+
+def decode_events(encoded):
+    return [(EVENT_OPS[op], f"P{process}", f"R{resource}" if resource >= 0 else None)
+            for op, process, resource in encoded.tolist()]
+
+
+def run_stress(events, track_memory=True):
+    detector = DeadlockDetector()
+    latencies = np.empty(len(events), dtype=np.int64)
+    clock = time.perf_counter_ns
+    
+    start = clock()
+    for i, event in enumerate(events):
+        t0 = clock()
+        apply_event(detector, event)
+        latencies[i] = clock() - t0
+    total_ns = clock() - start
+    
+    report = {
+        "events": len(events),
+        "deadlocks": len(detector.deadlocks),
+        "largest_cycle": max((len(c) for c in detector.deadlocks), default=0),
+        "total_s": total_ns / 1e9,
+        "events_per_s": len(events) / (total_ns / 1e9) if total_ns else 0.0,
+        "mean_us": 0.0,
+        "p50_us": 0.0,
+        "p99_us": 0.0,
+        "max_us": 0.0,
+        "peak_bytes": 0,
+        "bytes_per_event": 0.0,
+    }
+    if len(events):
+        report["mean_us"] = float(latencies.mean()) / 1000
+        report["p50_us"] = float(np.percentile(latencies, 50)) / 1000
+        report["p99_us"] = float(np.percentile(latencies, 99)) / 1000
+        report["max_us"] = float(latencies.max()) / 1000
+        
+    if track_memory and len(events):
+        # tracemalloc slows every allocation down, so memory is measured on a
+        # separate replay to keep it out of the latency numbers above.
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        detector = DeadlockDetector()
+        for event in events:
+            apply_event(detector, event)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report["peak_bytes"] = peak - baseline
+        report["bytes_per_event"] = (peak - baseline) / len(events)
+        
+    return report
+
+
+def format_report(report):
+    return (f"Events: {report['events']:,}  Deadlocks detected: {report['deadlocks']:,}  "
+            f"Largest cycle: {report['largest_cycle']}\n"
+            f"Throughput: {report['events_per_s']:,.0f} events/s over {report['total_s']:.3f} s\n"
+            f"Detection latency (us): mean {report['mean_us']:.2f}, p50 {report['p50_us']:.2f}, "
+            f"p99 {report['p99_us']:.2f}, max {report['max_us']:.2f}\n"
+            f"Memory: peak {report['peak_bytes'] / 1024:,.1f} KiB, "
+            f"{report['bytes_per_event']:.2f} bytes/event")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay random resource-allocation workloads through the deadlock detector")
+    parser.add_argument("--processes", type=int, default=200)
+    parser.add_argument("--resources", type=int, default=200)
+    parser.add_argument("--request-probability", type=float, default=0.6)
+    parser.add_argument("--cycle-density", type=float, default=0.2)
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    try:
+        generator = RAGWorkloadGenerator(args.processes, args.resources, args.request_probability,
+                                         args.cycle_density, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    print(format_report(run_stress(generator.generate(args.events))))
@@ -0,0 +1,143 @@
+import threading
+import time
+import traceback
+import tkinter as tk
+from PIL import Image, ImageTk
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+POLL_MS = 10
+
+class RasterView:
+    # A figure that is built and rasterized on a background thread so large
+    # redraws never block the Tk loop. There are two Agg buffers, each with its
+    # own photo image: the render thread fills the back one while the front one
+    # is on screen, and the main thread only copies finished pixels into Tk.
+    # Tk is only touched from the main thread, which polls for finished frames
+    # while any are on the way.
+    def __init__(self, master, figsize=(8, 4), dpi=100, on_render=None):
+        self.dpi = dpi
+        self.size = (int(figsize[0] * dpi), int(figsize[1] * dpi))
+        self.widget = tk.Canvas(master, width=self.size[0], height=self.size[1], bg='white',
+                                highlightthickness=0)
+                                
+        self.buffers = []
+        for _ in range(2):
+            fig = Figure(figsize=figsize, dpi=dpi)
+            photo = ImageTk.PhotoImage("RGBA", self.size, master=self.widget)
+            self.buffers.append((fig, FigureCanvasAgg(fig), photo))
+        self.front = 0
+        self.image_id = self.widget.create_image(0, 0, anchor=tk.NW, image=self.buffers[0][2])
+        
+        self.pending = None
+        self.last_request = None
+        self.rendering = False
+        self.ready = None
+        self.presenting = False
+        self.closed = False
+        self.poll_id = None
+        self.frames = 0
+        self.dropped = 0
+        self.render_time = 0.0
+        # Called on the main thread with each presented frame's render time
+        self.on_render = on_render
+        self.condition = threading.Condition()
+        
+        self.widget.bind("<Configure>", self.on_resize)
+        self.widget.bind("<Destroy>", lambda e: self.close())
+        
+        self.thread = threading.Thread(target=self.render_loop, daemon=True)
+        self.thread.start()
+        
+    def render(self, draw, *args):
+        # draw(fig, *args) runs on the render thread, so args must be copies
+        # the caller will not change. Only the newest request is kept.
+        with self.condition:
+            if self.pending is not None:
+                self.dropped += 1
+            self.pending = self.last_request = (draw, args)
+            self.condition.notify()
+        if self.poll_id is None and not self.closed:
+            self.poll_id = self.widget.after(POLL_MS, self.poll)
+            
+    def on_resize(self, event):
+        with self.condition:
+            if (event.width, event.height) == self.size or event.width < 2 or event.height < 2:
+                return
+            self.size = (event.width, event.height)
+            request = self.pending or self.last_request
+        if request is not None:
+            self.render(request[0], *request[1])
+            
+    def render_loop(self):
+        while True:
+            with self.condition:
+                # The back buffer is busy until the main thread has copied it
+                while not self.closed and (self.pending is None or self.presenting):
+                    self.condition.wait()
+                if self.closed:
+                    return
+                draw, args = self.pending
+                self.pending = None
+                self.rendering = True
+                width, height = self.size
+                back = 1 - self.front
+                
+            fig, agg, _ = self.buffers[back]
+            t0 = time.perf_counter()
+            try:
+                fig.set_size_inches(width / self.dpi, height / self.dpi)
+                draw(fig, *args)
+                agg.draw()
+            except Exception:
+                traceback.print_exc()
+                with self.condition:
+                    self.rendering = False
+                continue
+                
+            with self.condition:
+                self.render_time = time.perf_counter() - t0
+                self.rendering = False
+                self.ready = back
+                self.presenting = True
+                
+    def poll(self):
+        with self.condition:
+            ready, self.ready = self.ready, None
+        if ready is not None:
+            self.present(ready)
+        with self.condition:
+            busy = self.pending is not None or self.rendering or self.ready is not None
+        self.poll_id = self.widget.after(POLL_MS, self.poll) if busy and not self.closed else None
+        
+    def present(self, index):
+        # One copy from the Agg buffer into the photo image, then the
+        # finished buffer becomes the front one
+        fig, agg, photo = self.buffers[index]
+        size = agg.get_width_height()
+        if (photo.width(), photo.height()) != size:
+            # A photo image cannot change size, so a resize gets a new one
+            photo = ImageTk.PhotoImage("RGBA", size, master=self.widget)
+            self.buffers[index] = (fig, agg, photo)
+        photo.paste(Image.frombuffer("RGBA", size, agg.buffer_rgba()))
+        self.widget.itemconfig(self.image_id, image=photo)
+        
+        with self.condition:
+            self.front = index
+            self.presenting = False
+            self.frames += 1
+            render_time = self.render_time
+            self.condition.notify()
+        if self.on_render:
+            self.on_render(render_time)
+            
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        if self.poll_id is not None:
+            try:
+                self.widget.after_cancel(self.poll_id)
+            except tk.TclError:
+                pass
+            self.poll_id = None
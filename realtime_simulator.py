@@ -0,0 +1,229 @@
+import threading
+import tkinter as tk
+from tkinter import ttk
+import time
+
+from rt_scheduler import (POLICIES, PRESETS, TaskSetError, parse_tasks, simulate, analyze,
+                          format_analysis, MAX_HORIZON)
+from raster_view import RasterView
+
+CORE_COLORS = ['#2980B9', '#16A085', '#8E44AD', '#2C3E50', '#D35400', '#27AE60', '#7F8C8D', '#34495E']
+
+class RealTimeSimulator:
+    def __init__(self, parent):
+        self.parent = parent
+        self.frame = ttk.Frame(parent)
+        
+        self.policy = tk.StringVar(value=POLICIES[0])
+        self.num_cores = tk.IntVar(value=1)
+        self.horizon = tk.IntVar(value=0)
+        self.seed = tk.IntVar(value=0)
+        self.preset = tk.StringVar(value=next(iter(PRESETS)))
+        self.result = None
+        self.analysis = None
+        self.run_id = 0
+        self.visible = True
+        
+        self.create_control_panel()
+        self.create_visualization_area()
+        
+        self.load_preset()
+        
+    def create_control_panel(self):
+        control_frame = ttk.Frame(self.frame, padding=10)
+        control_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        preset_label = ttk.Label(control_frame, text="Task Set:")
+        preset_label.grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
+        
+        preset_combo = ttk.Combobox(control_frame, textvariable=self.preset, values=list(PRESETS),
+                                   state="readonly", width=30)
+        preset_combo.grid(row=0, column=1, padx=5, pady=5, sticky=tk.W)
+        preset_combo.bind("<<ComboboxSelected>>", lambda e: self.load_preset())
+        
+        policy_label = ttk.Label(control_frame, text="Policy:")
+        policy_label.grid(row=0, column=2, padx=5, pady=5, sticky=tk.W)
+        
+        policy_combo = ttk.Combobox(control_frame, textvariable=self.policy, values=POLICIES,
+                                   state="readonly", width=22)
+        policy_combo.grid(row=0, column=3, padx=5, pady=5, sticky=tk.W)
+        policy_combo.bind("<<ComboboxSelected>>", lambda e: self.run_schedule())
+        
+        cores_label = ttk.Label(control_frame, text="Cores:")
+        cores_label.grid(row=0, column=4, padx=5, pady=5, sticky=tk.W)
+        
+        cores_spinbox = ttk.Spinbox(control_frame, from_=1, to=16, textvariable=self.num_cores, width=5)
+        cores_spinbox.grid(row=0, column=5, padx=5, pady=5, sticky=tk.W)
+        
+        horizon_label = ttk.Label(control_frame, text="Horizon (0 = auto):")
+        horizon_label.grid(row=0, column=6, padx=5, pady=5, sticky=tk.W)
+        
+        horizon_spinbox = ttk.Spinbox(control_frame, from_=0, to=MAX_HORIZON, increment=10,
+                                      textvariable=self.horizon, width=7)
+        horizon_spinbox.grid(row=0, column=7, padx=5, pady=5, sticky=tk.W)
+        
+        seed_label = ttk.Label(control_frame, text="Seed:")
+        seed_label.grid(row=0, column=8, padx=5, pady=5, sticky=tk.W)
+        
+        seed_spinbox = ttk.Spinbox(control_frame, from_=0, to=99999, textvariable=self.seed, width=6)
+        seed_spinbox.grid(row=0, column=9, padx=5, pady=5, sticky=tk.W)
+        
+        self.run_button = ttk.Button(control_frame, text="Schedule", command=self.run_schedule)
+        self.run_button.grid(row=0, column=10, padx=5, pady=5)
+        
+    def create_visualization_area(self):
+        viz_frame = ttk.Frame(self.frame, padding=10)
+        viz_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        timeline_frame = ttk.LabelFrame(viz_frame, text="Schedule (red jobs missed their deadline)", padding=10)
+        timeline_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        self.timeline_view = RasterView(timeline_frame, figsize=(8, 4), dpi=100)
+        self.timeline_view.widget.pack(fill=tk.BOTH, expand=True)
+        
+        bottom_frame = ttk.Frame(viz_frame)
+        bottom_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        tasks_frame = ttk.LabelFrame(bottom_frame, text="Tasks (name C=wcet T=period [D=deadline] [P=priority] [sporadic])", padding=10)
+        tasks_frame.pack(fill=tk.BOTH, expand=True, side=tk.LEFT, padx=(0, 5))
+        
+        self.tasks_text = tk.Text(tasks_frame, height=8, width=40, wrap=tk.NONE, font=('Consolas', 10))
+        self.tasks_text.pack(fill=tk.BOTH, expand=True)
+        
+        analysis_frame = ttk.LabelFrame(bottom_frame, text="Schedulability", padding=10)
+        analysis_frame.pack(fill=tk.BOTH, expand=True, side=tk.LEFT, padx=(5, 0))
+        
+        self.analysis_text = tk.Text(analysis_frame, height=8, width=60, wrap=tk.NONE, font=('Consolas', 10))
+        self.analysis_text.pack(fill=tk.BOTH, expand=True)
+        self.analysis_text.config(state=tk.DISABLED)
+        
+    def load_preset(self):
+        cores, text = PRESETS[self.preset.get()]
+        self.num_cores.set(cores)
+        self.horizon.set(0)
+        self.tasks_text.delete(1.0, tk.END)
+        self.tasks_text.insert(tk.END, text)
+        self.run_schedule()
+        
+    def show_analysis(self, text):
+        self.analysis_text.config(state=tk.NORMAL)
+        self.analysis_text.delete(1.0, tk.END)
+        self.analysis_text.insert(tk.END, text)
+        self.analysis_text.config(state=tk.DISABLED)
+        
+    def run_schedule(self):
+        # Any earlier run still simulating is now stale
+        self.run_id += 1
+        try:
+            tasks = parse_tasks(self.tasks_text.get(1.0, tk.END))
+        except TaskSetError as e:
+            self.run_button.config(state=tk.NORMAL)
+            self.show_analysis(f"Invalid task set: {e}")
+            return
+            
+        # Long horizons take seconds to simulate, so that happens off the Tk
+        # thread and the answer is dropped if a newer run has started
+        self.run_button.config(state=tk.DISABLED)
+        self.show_analysis("Simulating...")
+        threading.Thread(target=self.schedule_worker,
+                         args=(self.run_id, tasks, self.policy.get(), max(1, self.num_cores.get()),
+                               self.horizon.get() or None, self.seed.get()),
+                         name="Real-time schedule", daemon=True).start()
+        
+    def schedule_worker(self, run_id, tasks, policy, cores, horizon, seed):
+        t0 = time.perf_counter()
+        result = simulate(tasks, policy, cores, horizon, seed)
+        analysis = analyze(tasks, policy, cores)
+        elapsed = time.perf_counter() - t0
+        self.frame.after(0, self.schedule_complete, run_id, tasks, result, analysis, elapsed)
+        
+    def schedule_complete(self, run_id, tasks, result, analysis, elapsed):
+        if run_id != self.run_id:
+            return
+        self.run_button.config(state=tk.NORMAL)
+        self.result = result
+        self.analysis = analysis
+        self.show_analysis(format_analysis(tasks, analysis, result)
+                           + f"\n\nSimulated in {elapsed * 1000:.0f} ms")
+        self.update_timeline()
+        
+    def update_timeline(self):
+        # Skip redraws while the module is hidden; resume() catches up
+        if not self.visible:
+            return
+            
+        # A finished result is never changed, so the render thread can share it
+        self.timeline_view.render(self.render_timeline, self.result)
+        
+    def render_timeline(self, fig, result):
+        ax = fig.axes[0] if fig.axes else fig.add_subplot(111)
+        self.draw_timeline(ax, result)
+        
+    def draw_timeline(self, ax, result):
+        ax.clear()
+        if result is None:
+            ax.set_title("No schedule")
+            return
+            
+        rows = {task.name: i for i, task in enumerate(result.tasks)}
+        missed = set(map(id, result.missed_jobs()))
+        
+        # One broken_barh call per task and colour keeps long horizons cheap
+        bars = {}
+        for job, core, start, end in result.segments:
+            color = '#E74C3C' if id(job) in missed else CORE_COLORS[core % len(CORE_COLORS)]
+            bars.setdefault((rows[job.task.name], color), []).append((start, end - start))
+        for (row, color), spans in bars.items():
+            ax.broken_barh(spans, (row - 0.3, 0.6), facecolors=color, alpha=0.85)
+            
+        # Label segments with their core when there is room to read them
+        if len(result.segments) <= 150 and result.cores > 1:
+            for job, core, start, end in result.segments:
+                if (end - start) / result.horizon > 0.015:
+                    ax.text((start + end) / 2, rows[job.task.name], f"C{core}",
+                            ha='center', va='center', color='white', fontsize=7)
+                            
+        if len(result.jobs) <= 400:
+            for job in result.jobs:
+                row = rows[job.task.name]
+                ax.plot(job.release, row - 0.4, marker='^', color='gray', markersize=4)
+                if id(job) in missed:
+                    ax.plot(job.deadline, row, marker='x', color='black', markersize=8, mew=2)
+                    
+        ax.set_yticks(list(rows.values()))
+        ax.set_yticklabels(list(rows))
+        ax.invert_yaxis()
+        ax.set_xlim(0, result.horizon)
+        ax.set_xlabel("Time (ticks)")
+        ax.set_title(f"{result.policy} on {result.cores} core(s): "
+                     f"{len(missed)} of {len(result.jobs)} jobs missed their deadline")
+        ax.grid(True, axis='x', linestyle='--', alpha=0.7)
+        
+    def session_state(self):
+        meta = {
+            "preset": self.preset.get(),
+            "policy": self.policy.get(),
+            "cores": self.num_cores.get(),
+            "horizon": self.horizon.get(),
+            "seed": self.seed.get(),
+            "tasks": self.tasks_text.get(1.0, tk.END + "-1c"),
+            "summary": self.analysis_text.get(1.0, tk.END + "-1c"),
+        }
+        return meta, {}
+        
+    def restore_session(self, meta, session):
+        self.preset.set(meta["preset"])
+        self.policy.set(meta["policy"])
+        self.num_cores.set(meta["cores"])
+        self.horizon.set(meta["horizon"])
+        self.seed.set(meta["seed"])
+        self.tasks_text.delete(1.0, tk.END)
+        self.tasks_text.insert(tk.END, meta["tasks"])
+        self.run_schedule()
+        
+    def suspend(self):
+        self.visible = False
+        
+    def resume(self):
+        self.visible = True
+        self.update_timeline()
\ No newline at end of file
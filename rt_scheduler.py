@@ -0,0 +1,366 @@
+import argparse
+import heapq
+import math
+import random
+
+RATE_MONOTONIC = "Rate Monotonic"
+EDF = "Earliest Deadline First"
+FIXED_PRIORITY = "Fixed Priority"
+POLICIES = [RATE_MONOTONIC, EDF, FIXED_PRIORITY]
+
+MAX_HORIZON = 100000
+
+class TaskSetError(ValueError):
+    pass
+
+
+class RTTask:
+    # All times are integer ticks. Sporadic tasks are released at least
+    # `period` ticks apart; priority 1 is the highest.
+    def __init__(self, name, wcet, period, deadline=None, priority=None, sporadic=False):
+        self.name = name
+        self.wcet = wcet
+        self.period = period
+        self.deadline = deadline if deadline is not None else period
+        self.priority = priority
+        self.sporadic = sporadic
+        
+    @property
+    def utilization(self):
+        return self.wcet / self.period
+        
+    @property
+    def density(self):
+        return self.wcet / min(self.deadline, self.period)
+        
+    def to_line(self):
+        line = f"{self.name} C={self.wcet} T={self.period} D={self.deadline}"
+        if self.priority is not None:
+            line += f" P={self.priority}"
+        if self.sporadic:
+            line += " sporadic"
+        return line
+
+
+class Job:
+    def __init__(self, task, index, release):
+        self.task = task
+        self.index = index
+        self.release = release
+        self.deadline = release + task.deadline
+        self.remaining = task.wcet
+        self.start = None
+        self.finish = None
+        self.core = None
+        
+    @property
+    def name(self):
+        return f"{self.task.name},{self.index}"
+        
+    def missed(self, horizon):
+        if self.finish is not None:
+            return self.finish > self.deadline
+        return self.deadline < horizon
+
+
+def parse_tasks(text):
+    tasks = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split("#")[0].strip()
+        if not line:
+            continue
+        fields = line.split()
+        values = {}
+        sporadic = False
+        for field in fields[1:]:
+            if field.lower() == "sporadic":
+                sporadic = True
+                continue
+            key, _, value = field.partition("=")
+            if key.upper() not in ("C", "T", "D", "P") or not value.isdigit():
+                raise TaskSetError(f"Line {number}: expected C=, T=, D= or P= with a whole number, got '{field}'")
+            values[key.upper()] = int(value)
+        if "C" not in values or "T" not in values:
+            raise TaskSetError(f"Line {number}: a task needs at least C= (WCET) and T= (period)")
+        if values["T"] <= 0 or values.get("D", 1) <= 0:
+            raise TaskSetError(f"Line {number}: the period and deadline must be positive")
+        if not 0 < values["C"] <= values.get("D", values["T"]):
+            raise TaskSetError(f"Line {number}: WCET must be positive and no larger than the deadline")
+        tasks.append(RTTask(fields[0], values["C"], values["T"], values.get("D"), values.get("P"), sporadic))
+    if not tasks:
+        raise TaskSetError("The task set is empty")
+    return tasks
+
+
+def priority_order(tasks, policy):
+    # Highest priority first, for the fixed-priority policies
+    if policy == RATE_MONOTONIC:
+        return sorted(tasks, key=lambda t: (t.period, tasks.index(t)))
+    return sorted(tasks, key=lambda t: (t.priority if t.priority is not None else len(tasks) + tasks.index(t),
+                                        tasks.index(t)))
+
+
+def default_horizon(tasks):
+    hyperperiod = 1
+    for task in tasks:
+        hyperperiod = hyperperiod * task.period // math.gcd(hyperperiod, task.period)
+    longest = max(task.period for task in tasks)
+    return max(2 * longest, min(hyperperiod, 50 * longest, MAX_HORIZON))
+
+
+class ScheduleResult:
+    def __init__(self, tasks, policy, cores, horizon):
+        self.tasks = tasks
+        self.policy = policy
+        self.cores = cores
+        self.horizon = horizon
+        self.jobs = []
+        self.segments = []
+        self.preemptions = 0
+        self.migrations = 0
+        
+    def missed_jobs(self):
+        return [job for job in self.jobs if job.missed(self.horizon)]
+        
+    def task_stats(self):
+        stats = {task.name: {"jobs": 0, "missed": 0, "worst_response": 0} for task in self.tasks}
+        for job in self.jobs:
+            if job.deadline > self.horizon and job.finish is None:
+                continue
+            entry = stats[job.task.name]
+            entry["jobs"] += 1
+            if job.missed(self.horizon):
+                entry["missed"] += 1
+            end = job.finish if job.finish is not None else self.horizon
+            entry["worst_response"] = max(entry["worst_response"], end - job.release)
+        return stats
+
+
+def simulate(tasks, policy, cores=1, horizon=None, seed=0):
+    # Global preemptive scheduling on identical cores: at every release and
+    # completion the `cores` highest-priority ready jobs run. A job keeps its
+    # core while it stays in that set, otherwise it prefers the core it last
+    # ran on.
+    rng = random.Random(seed)
+    horizon = min(horizon or default_horizon(tasks), MAX_HORIZON)
+    result = ScheduleResult(tasks, policy, cores, horizon)
+    rank = {task.name: i for i, task in enumerate(priority_order(tasks, policy))}
+    
+    if policy == EDF:
+        def key(job):
+            return (job.deadline, job.release, rank[job.task.name])
+    else:
+        def key(job):
+            return (rank[job.task.name], job.release)
+            
+    releases = [(0, i) for i in range(len(tasks))]
+    heapq.heapify(releases)
+    counts = [0] * len(tasks)
+    ready = []
+    running = [None] * cores
+    open_segments = {}
+    now = 0
+    
+    while now < horizon:
+        while releases and releases[0][0] <= now:
+            release, i = heapq.heappop(releases)
+            task = tasks[i]
+            job = Job(task, counts[i], release)
+            counts[i] += 1
+            ready.append(job)
+            result.jobs.append(job)
+            gap = task.period + (rng.randint(0, task.period // 2) if task.sporadic else 0)
+            heapq.heappush(releases, (release + gap, i))
+            
+        # Jobs of one task run in release order, never in parallel
+        eligible = {}
+        for job in ready:
+            eligible.setdefault(job.task.name, job)
+        chosen = sorted(eligible.values(), key=key)[:cores]
+        chosen_set = set(map(id, chosen))
+        assignment = [job if job is not None and id(job) in chosen_set else None for job in running]
+        for core, job in enumerate(running):
+            if job is not None and assignment[core] is None and job.remaining:
+                result.preemptions += 1
+        placed = set(id(job) for job in assignment if job is not None)
+        for job in chosen:
+            if id(job) in placed:
+                continue
+            free = [c for c in range(cores) if assignment[c] is None]
+            core = job.core if job.core in free else free[0]
+            if job.core is not None and job.core != core:
+                result.migrations += 1
+            assignment[core] = job
+            job.core = core
+            if job.start is None:
+                job.start = now
+        running = assignment
+        
+        next_release = releases[0][0] if releases else horizon
+        step = min([next_release, horizon] + [now + job.remaining for job in running if job is not None]) - now
+        
+        for core, job in enumerate(running):
+            segment = open_segments.get(core)
+            if job is None:
+                open_segments.pop(core, None)
+                continue
+            if segment is not None and segment[0] is job and segment[3] == now:
+                segment[3] = now + step
+            else:
+                segment = open_segments[core] = [job, core, now, now + step]
+                result.segments.append(segment)
+            job.remaining -= step
+        now += step
+        
+        for core, job in enumerate(running):
+            if job is not None and not job.remaining:
+                job.finish = now
+                ready.remove(job)
+                running[core] = None
+                
+    result.segments = [tuple(segment) for segment in result.segments]
+    return result
+
+
+def liu_layland_bound(n):
+    return n * (2 ** (1 / n) - 1)
+
+
+def response_times(tasks, policy, cores=1):
+    # Classic response-time analysis on one core; on several cores the
+    # sufficient global fixed-priority test of Bertogna and Cirinei, where
+    # higher-priority tasks may carry work into the window.
+    ordered = priority_order(tasks, policy)
+    bounds = {}
+    for k, task in enumerate(ordered):
+        higher = ordered[:k]
+        if any(bounds[t.name] is None for t in higher) and cores > 1:
+            bounds[task.name] = None
+            continue
+        response = task.wcet
+        while True:
+            if cores == 1:
+                demand = task.wcet + sum(math.ceil(response / t.period) * t.wcet for t in higher)
+            else:
+                interference = 0
+                for t in higher:
+                    carried = response + bounds[t.name] - t.wcet
+                    n = carried // t.period
+                    workload = n * t.wcet + min(t.wcet, carried - n * t.period)
+                    interference += min(workload, response - task.wcet + 1)
+                demand = task.wcet + interference // cores
+            if demand > task.deadline:
+                bounds[task.name] = None
+                break
+            if demand == response:
+                bounds[task.name] = response
+                break
+            response = demand
+    return bounds
+
+
+def analyze(tasks, policy, cores=1):
+    utilization = sum(t.utilization for t in tasks)
+    density = sum(t.density for t in tasks)
+    u_max = max(t.utilization for t in tasks)
+    implicit = all(t.deadline == t.period for t in tasks)
+    analysis = {"utilization": utilization, "density": density, "cores": cores,
+                "bound_name": None, "bound": None, "bound_ok": None, "response_times": None}
+                
+    if utilization > cores or u_max > 1:
+        analysis["verdict"] = "Unschedulable: total utilization exceeds the number of cores"
+        return analysis
+        
+    if policy == EDF:
+        if cores == 1:
+            analysis["bound_name"] = "EDF utilization bound" if implicit else "EDF density test"
+            analysis["bound"] = 1.0
+            analysis["bound_ok"] = (utilization if implicit else density) <= 1.0
+        else:
+            # Goossens, Funk and Baruah bound for global EDF
+            delta_max = max(t.density for t in tasks)
+            analysis["bound_name"] = "Global EDF density bound (GFB)"
+            analysis["bound"] = cores - (cores - 1) * delta_max
+            analysis["bound_ok"] = density <= analysis["bound"]
+        if analysis["bound_ok"]:
+            analysis["verdict"] = f"Schedulable by the {analysis['bound_name']}"
+        elif cores == 1 and implicit:
+            analysis["verdict"] = "Unschedulable: EDF is optimal on one core and U > 1"
+        else:
+            analysis["verdict"] = "Inconclusive: the sufficient test fails"
+        return analysis
+        
+    if policy == RATE_MONOTONIC and implicit:
+        if cores == 1:
+            analysis["bound_name"] = "Liu & Layland bound"
+            analysis["bound"] = liu_layland_bound(len(tasks))
+        else:
+            # Bertogna, Cirinei and Lipari bound for global RM
+            analysis["bound_name"] = "Global RM bound"
+            analysis["bound"] = cores / 2 * (1 - u_max) + u_max
+        analysis["bound_ok"] = utilization <= analysis["bound"]
+        
+    bounds = analysis["response_times"] = response_times(tasks, policy, cores)
+    if analysis["bound_ok"]:
+        analysis["verdict"] = f"Schedulable by the {analysis['bound_name']}"
+    elif all(r is not None for r in bounds.values()):
+        analysis["verdict"] = "Schedulable by response-time analysis"
+    elif cores == 1:
+        analysis["verdict"] = "Unschedulable: response-time analysis finds a deadline miss"
+    else:
+        analysis["verdict"] = "Inconclusive: the sufficient response-time test fails"
+    return analysis
+
+
+def format_analysis(tasks, analysis, result=None):
+    lines = [f"U = {analysis['utilization']:.3f} on {analysis['cores']} core(s), density {analysis['density']:.3f}"]
+    if analysis["bound_name"]:
+        lines.append(f"{analysis['bound_name']}: {analysis['bound']:.3f} -> {'pass' if analysis['bound_ok'] else 'fail'}")
+    lines.append(analysis["verdict"])
+    if result is not None:
+        missed = len(result.missed_jobs())
+        lines.append(f"Observed over {result.horizon} ticks: {len(result.jobs)} jobs, {missed} missed, "
+                     f"{result.preemptions} preemptions, {result.migrations} migrations")
+        if missed and analysis["verdict"].startswith("Schedulable"):
+            lines.append("Warning: jobs missed deadlines although the analysis says the set is schedulable")
+            
+    stats = result.task_stats() if result is not None else {}
+    bounds = analysis["response_times"] or {}
+    lines.append("")
+    lines.append(f"{'Task':<8}{'C':>4}{'T':>6}{'D':>6}{'U':>7}{'RTA':>6}{'Worst':>7}{'Missed':>9}")
+    for task in tasks:
+        bound = bounds.get(task.name, "") if analysis["response_times"] is not None else "-"
+        bound = "miss" if bound is None else bound
+        entry = stats.get(task.name)
+        observed = f"{entry['worst_response']:>7}{entry['missed']:>4}/{entry['jobs']:<4}" if entry else ""
+        lines.append(f"{task.name:<8}{task.wcet:>4}{task.period:>6}{task.deadline:>6}{task.utilization:>7.3f}"
+                     f"{bound:>6}{observed}")
+    return "\n".join(lines)
+
+
+PRESETS = {
+    "Above the Liu & Layland bound": (1, "T1 C=1 T=4\nT2 C=2 T=6\nT3 C=3 T=12\n"),
+    "RM misses, EDF meets": (1, "T1 C=2 T=5\nT2 C=4 T=7\n"),
+    "Dhall effect (2 cores)": (2, "L1 C=2 T=10\nL2 C=2 T=10\nH C=10 T=11\n"),
+    "Constrained deadlines": (1, "T1 C=1 T=5 D=3\nT2 C=2 T=8 D=6\nT3 C=3 T=12 D=12\n"),
+    "Sporadic mix (4 cores)": (4, "A C=3 T=10\nB C=5 T=15\nC C=8 T=20\nD C=4 T=12 sporadic\n"
+                                  "E C=6 T=25 sporadic\nF C=10 T=30\nG C=2 T=8 sporadic\nH C=12 T=40\n"),
+    "Poorly chosen fixed priorities": (1, "Sensor C=1 T=5 P=3\nControl C=2 T=10 P=2\nLogger C=4 T=20 P=1\n"),
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate a real-time task set and compare it with schedulability tests")
+    parser.add_argument("preset", nargs="?", choices=sorted(PRESETS), default="RM misses, EDF meets")
+    parser.add_argument("--cores", type=int, default=None)
+    parser.add_argument("--horizon", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    default_cores, text = PRESETS[args.preset]
+    tasks = parse_tasks(text)
+    cores = args.cores or default_cores
+    for policy in POLICIES:
+        print(f"== {policy} ==")
+        print(format_analysis(tasks, analyze(tasks, policy, cores), simulate(tasks, policy, cores, args.horizon, args.seed)))
+        print()
@@ -0,0 +1,112 @@
+import time
+from collections import deque
+import numpy as np
+
+from session_store import history_to_events
+
+PERCENTILES = (50, 90, 99)
+
+class RunRecord:
+    def __init__(self, label, config, events):
+        self.label = label
+        self.config = config
+        self.events = events
+        self.finished = time.strftime('%H:%M:%S')
+        
+    @classmethod
+    def from_history(cls, label, config, thread_history):
+        events, _ = history_to_events({k: list(v) for k, v in thread_history.items()})
+        return cls(label, config, events)
+        
+    def makespan(self):
+        return float(self.events["end"].max()) if len(self.events) else 0.0
+        
+    def durations(self):
+        return self.events["end"] - self.events["start"]
+        
+    def waits(self):
+        # Every task is queued at time zero, so its wait is its start time
+        return self.events["start"]
+        
+    def busy_time(self):
+        return np.bincount(self.events["thread"], weights=self.durations(),
+                           minlength=self.config.get("threads", 0))
+                           
+    def utilization(self):
+        makespan = self.makespan()
+        busy = self.busy_time()
+        return busy / makespan if makespan else np.zeros_like(busy)
+        
+    def throughput_curve(self, until, bins=None):
+        # Completed tasks per second in equal-width windows up to `until`,
+        # with about four completions per window for short runs
+        if bins is None:
+            bins = int(np.clip(len(self.events) // 4, 5, 50))
+        edges = np.linspace(0.0, max(until, 1e-9), bins + 1)
+        counts, _ = np.histogram(self.events["end"], bins=edges)
+        width = edges[1] - edges[0]
+        return (edges[:-1] + edges[1:]) / 2, counts / width
+        
+    def summary(self):
+        makespan = self.makespan()
+        durations = self.durations()
+        waits = self.waits()
+        summary = {
+            "Tasks": float(len(self.events)),
+            "Makespan (s)": makespan,
+            "Throughput (tasks/s)": len(self.events) / makespan if makespan else 0.0,
+            "Mean utilization (%)": float(self.utilization().mean() * 100) if len(self.events) else 0.0,
+        }
+        for p in PERCENTILES:
+            summary[f"Task time p{p} (s)"] = float(np.percentile(durations, p)) if len(durations) else 0.0
+        for p in PERCENTILES:
+            summary[f"Queue wait p{p} (s)"] = float(np.percentile(waits, p)) if len(waits) else 0.0
+        return summary
+
+
+class RunHistory:
+    def __init__(self, limit=8):
+        self.runs = deque(maxlen=limit)
+        self.count = 0
+        
+    def add(self, config, thread_history):
+        self.count += 1
+        label = f"Run {self.count}: {config['threads']} threads, {config['tasks']} tasks"
+        if config.get("shared_locks"):
+            label += ", locks"
+        if config.get("cpu_model"):
+            label += f", {config['cpu_model']['cores']} cores" + (" + GIL" if config["cpu_model"]["gil"] else "")
+        if config.get("primitive"):
+            label += f", {config['primitive']['kind']}"
+        run = RunRecord.from_history(label, config, thread_history)
+        self.runs.append(run)
+        return run
+        
+    def __len__(self):
+        return len(self.runs)
+        
+    def __getitem__(self, index):
+        return self.runs[index]
+        
+    def labels(self):
+        return [run.label for run in self.runs]
+
+
+def compare_runs(runs):
+    # Rows of (metric, values, deltas) where deltas are relative to the first run
+    summaries = [run.summary() for run in runs]
+    rows = []
+    for metric in summaries[0]:
+        values = [summary[metric] for summary in summaries]
+        base = values[0]
+        deltas = [(value - base) / base * 100 if base else None for value in values[1:]]
+        rows.append((metric, values, deltas))
+    return rows
+
+
+def format_value(value):
+    return f"{value:.0f}" if value == int(value) and abs(value) >= 10 else f"{value:.3f}"
+
+
+def format_delta(delta):
+    return "n/a" if delta is None else f"{delta:+.1f}%"
@@ -0,0 +1,152 @@
+import json
+import struct
+import time
+import zlib
+import numpy as np
+from numpy.lib.format import dtype_to_descr, descr_to_dtype
+
+MAGIC = b"MTDSSESS"
+VERSION = 1
+ALIGNMENT = 64
+PREAMBLE = struct.Struct("<8sII")
+
+# Packed 22-byte record; events are sorted by thread and then start time so
+# each thread's spans are one contiguous, searchable slice of the file.
+EVENT_DTYPE = np.dtype([("thread", "<u2"), ("task", "<u4"), ("start", "<f8"), ("end", "<f8")])
+
+class SessionFormatError(Exception):
+    pass
+
+
+def history_to_events(thread_history, current_time=None):
+    count = sum(len(events) for events in thread_history.values())
+    events = np.empty(count, dtype=EVENT_DTYPE)
+    offsets = {}
+    i = 0
+    for thread_id in sorted(thread_history):
+        spans = sorted(thread_history[thread_id], key=lambda e: e[0])
+        offsets[str(thread_id)] = [i, i + len(spans)]
+        if spans:
+            # None ends become NaN: tasks still running end at current_time
+            rows = np.array(spans, dtype=float).reshape(-1, 3)
+            block = events[i:i + len(spans)]
+            block["thread"] = thread_id
+            block["start"] = rows[:, 0]
+            block["end"] = np.where(np.isnan(rows[:, 1]), rows[:, 0] if current_time is None else current_time, rows[:, 1])
+            block["task"] = rows[:, 2]
+        i += len(spans)
+    return events, offsets
+
+
+def save_session(path, modules, arrays, compress_level=6):
+    # Small arrays are compressed; anything marked mappable is written raw and
+    # aligned so that it can be memory-mapped straight from the file.
+    # Array offsets are relative to the aligned start of the data section
+    header = {"version": VERSION, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "modules": modules, "arrays": {}}
+    blobs = []
+    offset = 0
+    for name, (array, mappable) in arrays.items():
+        array = np.ascontiguousarray(array)
+        data = array.tobytes()
+        if not mappable:
+            data = zlib.compress(data, compress_level)
+        padding = -offset % ALIGNMENT
+        offset += padding
+        header["arrays"][name] = {"dtype": dtype_to_descr(array.dtype), "shape": list(array.shape),
+                                  "offset": offset, "nbytes": len(data), "compressed": not mappable}
+        blobs.append((padding, data))
+        offset += len(data)
+        
+    header_bytes = zlib.compress(json.dumps(header).encode("utf-8"), compress_level)
+    data_start = PREAMBLE.size + len(header_bytes)
+    data_start += -data_start % ALIGNMENT
+    
+    with open(path, "wb") as f:
+        f.write(PREAMBLE.pack(MAGIC, VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * (data_start - f.tell()))
+        for padding, data in blobs:
+            f.write(b"\0" * padding)
+            f.write(data)
+        return f.tell()
+
+
+class Session:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            preamble = f.read(PREAMBLE.size)
+            if len(preamble) < PREAMBLE.size:
+                raise SessionFormatError(f"{path} is not a session file")
+            magic, version, header_length = PREAMBLE.unpack(preamble)
+            if magic != MAGIC:
+                raise SessionFormatError(f"{path} is not a session file")
+            if version > VERSION:
+                raise SessionFormatError(f"{path} was saved by a newer version (format {version})")
+            header = json.loads(zlib.decompress(f.read(header_length)).decode("utf-8"))
+            
+        data_start = PREAMBLE.size + header_length
+        self.data_start = data_start + (-data_start % ALIGNMENT)
+        self.version = version
+        self.created = header.get("created")
+        self.modules = header["modules"]
+        self.arrays = header["arrays"]
+        
+    def array(self, name):
+        info = self.arrays.get(name)
+        if info is None:
+            return None
+        dtype = descr_to_dtype(info["dtype"])
+        shape = tuple(info["shape"])
+        if info["compressed"]:
+            with open(self.path, "rb") as f:
+                f.seek(self.data_start + info["offset"])
+                data = zlib.decompress(f.read(info["nbytes"]))
+            return np.frombuffer(data, dtype=dtype).reshape(shape)
+        if not info["nbytes"]:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(self.path, dtype=dtype, mode="r", offset=self.data_start + info["offset"], shape=shape)
+
+
+def load_session(path):
+    return Session(path)
+
+
+class SessionHistory:
+    def __init__(self, events, offsets):
+        self.events = events
+        self.offsets = {int(k): v for k, v in offsets.items()}
+        
+    def __len__(self):
+        return len(self.events)
+        
+    def __bool__(self):
+        return len(self.events) > 0
+        
+    def thread_ids(self):
+        return sorted(self.offsets)
+        
+    def makespan(self):
+        if not len(self.events):
+            return 0.0
+        return float(self.events["end"].max())
+        
+    def spans(self, thread_id, until, min_gap=0.0):
+        lo, hi = self.offsets[thread_id]
+        events = self.events[lo:hi]
+        count = int(np.searchsorted(events["start"], until, side="right"))
+        starts = np.asarray(events["start"][:count])
+        ends = np.minimum(np.asarray(events["end"][:count]), until)
+        tasks = np.asarray(events["task"][:count])
+        
+        if min_gap > 0 and count > 1:
+            # Merge spans separated by less than min_gap so the number of bars
+            # drawn is bounded by the pixel width rather than the event count
+            gaps = starts[1:] - ends[:-1]
+            breaks = gaps > min_gap
+            keep_start = np.concatenate(([True], breaks))
+            keep_end = np.concatenate((breaks, [True]))
+            if not keep_start.all():
+                return starts[keep_start], ends[keep_end], None
+        return starts, ends, tasks
@@ -0,0 +1,221 @@
+import argparse
+import multiprocessing
+import queue
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+from session_store import EVENT_DTYPE
+
+# Head and tail counters sit on separate cache lines so that the producer
+# and the collector never write to the same line
+HEADER_BYTES = 128
+BACKOFF = 0.0005
+
+# Each ring is single-producer, single-consumer and publishes by ordering
+# plain stores: the record before the head, the copy-out before the tail.
+# Neither CPython nor numpy emits a memory fence, so this relies on the CPU
+# keeping those stores in program order, which x86 and x86-64 do. A weakly
+# ordered CPU such as ARM may let the other process see the new head before
+# the record it covers; porting there needs a real barrier, for example
+# publishing the head under a multiprocessing lock.
+class Ring:
+    def __init__(self, buf, offset, capacity):
+        self.capacity = capacity
+        self.head = np.ndarray((1,), dtype="<u8", buffer=buf, offset=offset)
+        self.stalls = np.ndarray((1,), dtype="<u8", buffer=buf, offset=offset + 8)
+        self.tail = np.ndarray((1,), dtype="<u8", buffer=buf, offset=offset + 64)
+        self.records = np.ndarray((capacity,), dtype=EVENT_DTYPE, buffer=buf, offset=offset + HEADER_BYTES)
+        
+    @staticmethod
+    def nbytes(capacity):
+        size = HEADER_BYTES + capacity * EVENT_DTYPE.itemsize
+        return size + (-size % 64)
+        
+    def __len__(self):
+        return int(self.head[0]) - int(self.tail[0])
+        
+    def put(self, thread, task, start, end):
+        # Only the owning worker writes records and the head; the record is
+        # stored before the head is advanced so the collector never sees a
+        # slot that is still being written
+        head = int(self.head[0])
+        while head - int(self.tail[0]) >= self.capacity:
+            # Back-pressure: the ring is full, so wait for the collector
+            self.stalls[0] += 1
+            time.sleep(BACKOFF)
+        self.records[head % self.capacity] = (thread, task, start, end)
+        self.head[0] = head + 1
+        
+    def put_many(self, records):
+        done = 0
+        while done < len(records):
+            head = int(self.head[0])
+            free = self.capacity - (head - int(self.tail[0]))
+            if not free:
+                self.stalls[0] += 1
+                time.sleep(BACKOFF)
+                continue
+            index = head % self.capacity
+            count = min(free, len(records) - done, self.capacity - index)
+            self.records[index:index + count] = records[done:done + count]
+            done += count
+            self.head[0] = head + count
+            
+    def drain(self):
+        # Only the collector advances the tail. The records are copied out
+        # before their slots are handed back to the producer.
+        tail = int(self.tail[0])
+        count = int(self.head[0]) - tail
+        if not count:
+            return self.records[:0].copy()
+        index = tail % self.capacity
+        first = min(count, self.capacity - index)
+        data = np.concatenate((self.records[index:index + first], self.records[:count - first]))
+        self.tail[0] = tail + count
+        return data
+
+
+class EventChannel:
+    def __init__(self, num_workers, capacity=4096, name=None):
+        self.num_workers = num_workers
+        self.capacity = capacity
+        ring_bytes = Ring.nbytes(capacity)
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=num_workers * ring_bytes)
+            self.shm.buf[:num_workers * ring_bytes] = bytes(num_workers * ring_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.rings = [Ring(self.shm.buf, i * ring_bytes, capacity) for i in range(num_workers)]
+        
+    @property
+    def name(self):
+        return self.shm.name
+        
+    @classmethod
+    def attach(cls, name, num_workers, capacity):
+        return cls(num_workers, capacity, name)
+        
+    def writer(self, index):
+        return self.rings[index]
+        
+    def pending(self):
+        return sum(len(ring) for ring in self.rings)
+        
+    def stalls(self):
+        return sum(int(ring.stalls[0]) for ring in self.rings)
+        
+    def drain(self):
+        return np.concatenate([ring.drain() for ring in self.rings])
+        
+    def close(self):
+        # The numpy views hold exports of the buffer and must go first
+        self.rings = []
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def process_worker(channel_name, num_workers, capacity, index, tasks, durations, start_time, stop):
+    # Runs in a child process: tasks come from a multiprocessing queue of
+    # task ids and completed spans go back through this worker's ring
+    channel = EventChannel.attach(channel_name, num_workers, capacity)
+    ring = channel.writer(index)
+    try:
+        while not stop.is_set():
+            try:
+                task_id = tasks.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if task_id is None:
+                break
+            started = time.time() - start_time
+            time.sleep(durations[task_id])
+            ring.put(index, task_id, started, time.time() - start_time)
+    finally:
+        ring = None
+        channel.close()
+
+
+def ring_producer(channel_name, num_workers, capacity, index, count, batch):
+    channel = EventChannel.attach(channel_name, num_workers, capacity)
+    ring = channel.writer(index)
+    records = np.zeros(batch, dtype=EVENT_DTYPE)
+    records["thread"] = index
+    for done in range(0, count, batch):
+        n = min(batch, count - done)
+        now = time.perf_counter()
+        records["task"][:n] = np.arange(done, done + n)
+        records["start"][:n] = now
+        records["end"][:n] = now
+        if batch == 1:
+            ring.put(index, done, now, now)
+        else:
+            ring.put_many(records[:n])
+    ring = None
+    channel.close()
+
+
+def queue_producer(events, index, count):
+    for i in range(count):
+        now = time.perf_counter()
+        events.put((index, i, now, now))
+
+
+def benchmark(num_workers=2, count=200000, capacity=4096, batch=1):
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    
+    channel = EventChannel(num_workers, capacity)
+    workers = [context.Process(target=ring_producer, args=(channel.name, num_workers, capacity, i, count, batch))
+               for i in range(num_workers)]
+    t0 = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    received = 0
+    while received < num_workers * count:
+        data = channel.drain()
+        if len(data):
+            received += len(data)
+        else:
+            time.sleep(BACKOFF)
+    elapsed = time.perf_counter() - t0
+    for worker in workers:
+        worker.join()
+    stalls = channel.stalls()
+    channel.close()
+    results["shared memory ring"] = (received / elapsed, elapsed, stalls)
+    
+    events = context.Queue(maxsize=capacity)
+    workers = [context.Process(target=queue_producer, args=(events, i, count)) for i in range(num_workers)]
+    t0 = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    history = []
+    for _ in range(num_workers * count):
+        history.append(events.get())
+    elapsed = time.perf_counter() - t0
+    for worker in workers:
+        worker.join()
+    results["pickled Queue"] = (len(history) / elapsed, elapsed, None)
+    return results
+
+
+def format_benchmark(results, num_workers, count):
+    lines = [f"{num_workers} producer processes x {count} events (includes process start-up)",
+             f"{'Channel':<22}{'Events/s':>12}{'Seconds':>10}{'Stalls':>9}"]
+    for name, (rate, elapsed, stalls) in results.items():
+        lines.append(f"{name:<22}{rate:>12,.0f}{elapsed:>10.2f}{'' if stalls is None else stalls:>9}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the shared-memory event channel with a pickled multiprocessing.Queue")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--capacity", type=int, default=4096)
+    parser.add_argument("--batch", type=int, default=1, help="records written per ring update")
+    args = parser.parse_args()
+    
+    print(format_benchmark(benchmark(args.workers, args.events, args.capacity, args.batch), args.workers, args.events))
@@ -0,0 +1,346 @@
+import argparse
+import linecache
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import numpy as np
+
+from cpu_model import CoreModel, simulate_cpu
+
+REAL = "real"
+VIRTUAL = "virtual"
+CLOCKS = (REAL, VIRTUAL)
+
+WINDOWS = 6
+MIN_GROWTH = 0.05
+DECAY_TOLERANCE = 0.1
+# Detection needs at least two samples in every window
+MIN_SAMPLES = 2 * WINDOWS
+
+def rss_bytes():
+    # Current resident set size of this process, or None if it cannot be read
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+        
+        class Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in ("PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                                                     "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                                                     "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+                                                     
+        counters = Counters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return None
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Only the peak is available on macOS and the BSDs; it still shows growth
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def format_bytes(n):
+    return f"{n / 1e6:.1f} MB" if abs(n) >= 1e5 else f"{n / 1e3:.1f} KB"
+
+
+class SoakSample:
+    def __init__(self, elapsed, wall, rss, traced, completed, throughput, wall_throughput, probes):
+        self.elapsed = elapsed
+        self.wall = wall
+        self.rss = rss
+        self.traced = traced
+        self.completed = completed
+        self.throughput = throughput
+        self.wall_throughput = wall_throughput
+        self.probes = probes
+
+
+class SoakMonitor:
+    # Samples memory and throughput against whatever clock the engine runs
+    # on; `now` is passed in so the same monitor works for virtual time.
+    # Probes are named callables returning the size of something suspected
+    # of growing, e.g. the number of history spans.
+    def __init__(self, probes=None, trace_frames=1, top=10):
+        self.probes = probes or {}
+        self.trace_frames = trace_frames
+        self.top = top
+        self.samples = []
+        self.baseline = None
+        self.started_tracing = False
+        self.t0 = 0.0
+        self.wall0 = 0.0
+        self.last = None
+        
+    def start(self, now=0.0):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+            self.started_tracing = True
+        self.baseline = self.snapshot()
+        self.t0 = now
+        self.wall0 = time.perf_counter()
+        self.last = (now, self.wall0, 0)
+        return self.sample(now, 0)
+        
+    def snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        
+    def sample(self, now, completed):
+        wall = time.perf_counter()
+        last_now, last_wall, last_completed = self.last
+        done = completed - last_completed
+        traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        sample = SoakSample(now - self.t0, wall - self.wall0, rss_bytes(), traced, completed,
+                            done / (now - last_now) if now > last_now else 0.0,
+                            done / (wall - last_wall) if wall > last_wall else 0.0,
+                            {name: probe() for name, probe in self.probes.items()})
+        self.samples.append(sample)
+        self.last = (now, wall, completed)
+        return sample
+        
+    def finish(self, now, completed, clock=REAL):
+        if now > self.last[0]:
+            self.sample(now, completed)
+        final = self.snapshot() if self.baseline is not None and tracemalloc.is_tracing() else None
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+        allocators = final.compare_to(self.baseline, "lineno")[:self.top] if final is not None else []
+        return SoakReport(clock, self.samples, allocators)
+
+
+class SoakReport:
+    def __init__(self, clock, samples, allocators):
+        self.clock = clock
+        self.samples = samples
+        self.allocators = allocators
+        self.growth, self.decay = find_problems(samples, clock)
+        
+    @property
+    def judged(self):
+        # Throughput skips the first sample, so one more is needed
+        return len(self.samples) > MIN_SAMPLES
+        
+    @property
+    def ok(self):
+        return self.judged and not self.growth and not self.decay
+
+
+def detect_growth(times, values, windows=WINDOWS, min_growth=MIN_GROWTH):
+    # Growth is monotonic when the median of every window of samples is above
+    # the one before it. Returns (slope per second, relative rise) or None.
+    if len(values) < 2 * windows or any(value is None for value in values):
+        return None
+    medians = [float(np.median(chunk)) for chunk in np.array_split(np.asarray(values, dtype=float), windows)]
+    if not all(later > earlier for earlier, later in zip(medians, medians[1:])):
+        return None
+    rise = (medians[-1] - medians[0]) / max(abs(medians[0]), 1.0)
+    if rise < min_growth:
+        return None
+    return float(np.polyfit(times, values, 1)[0]), rise
+
+
+def detect_decay(times, values, windows=WINDOWS, tolerance=DECAY_TOLERANCE):
+    # Throughput has decayed when the last window is down by more than the
+    # tolerance and the second half of the run is slower than the first;
+    # a dip that recovers does not count. Returns (slope, drop) or None.
+    if len(values) < 2 * windows:
+        return None
+    medians = [float(np.median(chunk)) for chunk in np.array_split(np.asarray(values, dtype=float), windows)]
+    if medians[0] <= 0:
+        return None
+    drop = 1 - medians[-1] / medians[0]
+    half = windows // 2
+    if drop < tolerance or np.mean(medians[half:]) > np.mean(medians[:half]) * (1 - tolerance / 2):
+        return None
+    return float(np.polyfit(times, values, 1)[0]), drop
+
+
+def find_problems(samples, clock=REAL):
+    growth = []
+    times = [s.elapsed for s in samples]
+    series = [("RSS", [s.rss for s in samples], True), ("Traced Python memory", [s.traced for s in samples], True)]
+    for name in samples[0].probes if samples else ():
+        series.append((name, [s.probes[name] for s in samples], False))
+    for name, values, in_bytes in series:
+        found = detect_growth(times, values)
+        if found:
+            growth.append((name, values[0], values[-1], found[0], found[1], in_bytes))
+            
+    # The first sample has no window behind it
+    decay = []
+    rates = [("Throughput", times[1:], [s.throughput for s in samples[1:]])]
+    if clock == VIRTUAL:
+        # Virtual time hides engine slowdowns; tasks simulated per wall second
+        # show them
+        rates.append(("Simulation rate", [s.wall for s in samples[1:]], [s.wall_throughput for s in samples[1:]]))
+    for name, rate_times, values in rates:
+        found = detect_decay(rate_times, values)
+        if found:
+            decay.append((name, values[0], values[-1], found[0], found[1]))
+    return growth, decay
+
+
+def run_soak(duration, clock=VIRTUAL, workers=4, cores=8, samples=60, seed=0, time_scale=0.01, batch=200,
+             top=10, model=None, on_sample=None, should_stop=None):
+    # A headless copy of the simulator's engine: workers record every span in
+    # thread_history and every start/finish in a status log, both unbounded,
+    # exactly as the Thread Simulator does
+    rng = random.Random(seed)
+    history = {worker: [] for worker in range(workers)}
+    log = []
+    monitor = SoakMonitor({"History spans": lambda: sum(len(spans) for spans in list(history.values())),
+                           "Status lines": lambda: len(log)}, top=top)
+    sample_every = duration / samples
+    next_sample = sample_every
+    completed = 0
+    monitor.start(0.0)
+    
+    if clock == VIRTUAL:
+        model = model or CoreModel(cores=cores, seed=seed)
+        now = 0.0
+        # The first batch measures how much virtual time a task takes; later
+        # ones are sized to the sample interval so short soaks still get
+        # their samples. The size is then fixed, since the drain at the end of
+        # each batch would otherwise show up as a throughput change.
+        size = min(batch, 4 * workers)
+        sized = False
+        while now < duration and not (should_stop and should_stop()):
+            durations = [rng.uniform(0.5, 2.0) for _ in range(size)]
+            result = simulate_cpu(durations, workers, model)
+            if not sized:
+                size = max(1, min(batch, int(sample_every * size / result.makespan))) if result.makespan else batch
+                sized = True
+            for worker, spans in result.thread_history().items():
+                for start, end, task in spans:
+                    history[worker].append((now + start, now + end, completed + task))
+                    log.append(f"Thread {worker} completed task {completed + task}")
+            completed += len(durations)
+            now += result.makespan
+            if now >= next_sample:
+                sample = monitor.sample(now, completed)
+                next_sample = now + sample_every
+                if on_sample:
+                    on_sample(sample, duration)
+        return monitor.finish(now, completed, clock)
+        
+    task_queue = queue.Queue()
+    stop = threading.Event()
+    t0 = time.perf_counter()
+    
+    def worker_thread(worker):
+        while not stop.is_set():
+            try:
+                task_id, seconds = task_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            log.append(f"Thread {worker} started task {task_id}")
+            start = time.perf_counter() - t0
+            time.sleep(seconds)
+            history[worker].append((start, time.perf_counter() - t0, task_id))
+            log.append(f"Thread {worker} completed task {task_id}")
+            
+    threads = [threading.Thread(target=worker_thread, args=(i,), name=f"Soak {i}", daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    next_id = 0
+    now = 0.0
+    while now < duration and not (should_stop and should_stop()):
+        # Arrivals keep the queue topped up so the workers never run dry
+        while task_queue.qsize() < 2 * workers:
+            task_queue.put((next_id, rng.uniform(0.5, 2.0) * time_scale))
+            next_id += 1
+        time.sleep(min(0.05, sample_every))
+        now = time.perf_counter() - t0
+        if now >= next_sample:
+            sample = monitor.sample(now, sum(len(spans) for spans in list(history.values())))
+            next_sample = now + sample_every
+            if on_sample:
+                on_sample(sample, duration)
+    stop.set()
+    for thread in threads:
+        thread.join(1.0)
+    return monitor.finish(time.perf_counter() - t0, sum(len(spans) for spans in history.values()), clock)
+
+
+def format_duration(seconds):
+    if seconds >= 3600:
+        return f"{seconds / 3600:.1f} h"
+    return f"{seconds / 60:.1f} min" if seconds >= 120 else f"{seconds:.1f} s"
+
+
+def format_soak_report(report):
+    samples = report.samples
+    first, last = samples[0], samples[-1]
+    rates = [s.throughput for s in samples[1:]]
+    lines = [f"Soak ran {format_duration(last.elapsed)} on a {report.clock} clock"
+             + (f" ({format_duration(last.wall)} wall)" if report.clock == VIRTUAL else "")
+             + f": {last.completed:,} tasks, {len(samples)} samples"]
+    if rates:
+        lines.append(f"Throughput {rates[0]:,.2f} tasks/s in the first window, {rates[-1]:,.2f} in the last")
+    if first.rss is not None and last.rss is not None:
+        lines.append(f"RSS {format_bytes(first.rss)} -> {format_bytes(last.rss)}, "
+                     f"traced Python memory {format_bytes(first.traced)} -> {format_bytes(last.traced)}")
+    for name in first.probes:
+        lines.append(f"{name} {first.probes[name]:,} -> {last.probes[name]:,}")
+        
+    lines.append("")
+    if not report.judged:
+        lines.append(f"Too few samples to judge: {len(samples)}, need more than {MIN_SAMPLES}")
+    for name, start, end, slope, rise, in_bytes in report.growth:
+        per_hour = format_bytes(slope * 3600) if in_bytes else f"{slope * 3600:,.0f}"
+        lines.append(f"GROWTH: {name} rose in every window, {rise * 100:,.0f}% overall ({per_hour} per hour)")
+    for name, start, end, slope, drop in report.decay:
+        lines.append(f"DECAY: {name} fell {drop * 100:.0f}%, from {start:,.2f} to {end:,.2f} tasks/s")
+    if report.judged and not report.growth and not report.decay:
+        lines.append("No monotonic memory growth or throughput decay")
+        
+    if report.allocators:
+        lines.append("")
+        lines.append("Top allocators since the start:")
+        for stat in report.allocators:
+            frame = stat.traceback[0]
+            size = ('+' if stat.size_diff >= 0 else '-') + format_bytes(abs(stat.size_diff))
+            source = linecache.getline(frame.filename, frame.lineno).strip()
+            lines.append(f"  {size:>10} {stat.count_diff:>+9,} blocks  {os.path.basename(frame.filename)}:{frame.lineno}"
+                         f"  {source[:60]}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the simulator engine for a long time and look for memory growth and throughput decay")
+    parser.add_argument("--duration", type=float, default=3600.0, help="seconds on the chosen clock")
+    parser.add_argument("--clock", choices=CLOCKS, default=VIRTUAL)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--cores", type=int, default=8, help="simulated cores for the virtual clock")
+    parser.add_argument("--samples", type=int, default=60)
+    parser.add_argument("--time-scale", type=float, default=0.01, help="task length factor on the real clock")
+    parser.add_argument("--top", type=int, default=10, help="allocators to list")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    def progress(sample, duration):
+        rss = format_bytes(sample.rss) if sample.rss is not None else "n/a"
+        print(f"{sample.elapsed / duration * 100:5.1f}%  {sample.completed:>10,} tasks  {sample.throughput:>9,.2f}/s  "
+              f"RSS {rss}", file=sys.stderr)
+              
+    report = run_soak(args.duration, args.clock, args.workers, args.cores, args.samples, args.seed, args.time_scale,
+                      top=args.top, on_sample=progress)
+    print(format_soak_report(report))
+    sys.exit(0 if report.ok else 1)
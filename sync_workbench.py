@@ -0,0 +1,280 @@
+import argparse
+import random
+import threading
+import time
+from collections import deque
+import numpy as np
+
+MUTEX = "Mutex"
+RLOCK = "RLock"
+READ_WRITE = "Read-Write Lock"
+SEMAPHORE = "Semaphore"
+BARRIER = "Barrier"
+CONDITION = "Condition"
+SHARDED = "Sharded Lock"
+PRIMITIVES = [MUTEX, RLOCK, READ_WRITE, SEMAPHORE, BARRIER, CONDITION, SHARDED]
+
+SPIN = "spin"
+SLEEP = "sleep"
+THREAD_COUNTS = (1, 2, 4, 8, 16, 32)
+PERCENTILES = (50, 90, 99)
+
+class ReadWriteLock:
+    # Writer-preferring: once a writer is waiting, new readers queue behind
+    # it so a steady stream of readers cannot starve writes
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+        
+    def acquire_read(self, timeout=None):
+        with self._cond:
+            if not self._cond.wait_for(lambda: not self._writer and not self._writers_waiting, timeout):
+                return False
+            self._readers += 1
+            return True
+            
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+                
+    def acquire_write(self, timeout=None):
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                acquired = self._cond.wait_for(lambda: not self._writer and not self._readers, timeout)
+            finally:
+                self._writers_waiting -= 1
+            if acquired:
+                self._writer = True
+            else:
+                # Readers held back for this writer can go ahead
+                self._cond.notify_all()
+            return acquired
+            
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+
+class SharedPrimitive:
+    # One object that every worker contends on. operation() acquires it for a
+    # read or a write, holds it for the critical section and returns the time
+    # spent acquiring, or None if the timeout expired first.
+    def __init__(self, kind, parties, permits=4, shards=8, hold_mode=SLEEP):
+        self.kind = kind
+        self.parties = parties
+        self.hold_mode = hold_mode
+        self.closed = False
+        if kind == MUTEX:
+            self.lock = threading.Lock()
+        elif kind == RLOCK:
+            self.lock = threading.RLock()
+        elif kind == READ_WRITE:
+            self.lock = ReadWriteLock()
+        elif kind == SEMAPHORE:
+            self.lock = threading.BoundedSemaphore(permits)
+        elif kind == BARRIER:
+            self.barrier = threading.Barrier(parties)
+        elif kind == CONDITION:
+            self.cond = threading.Condition()
+            self.items = deque()
+            self.capacity = 2 * parties
+        elif kind == SHARDED:
+            self.shards = [threading.Lock() for _ in range(shards)]
+        else:
+            raise ValueError(f"Unknown primitive: {kind}")
+            
+    def choose_write(self, index, rng, read_ratio):
+        # A condition variable needs producers and consumers, so there the
+        # ratio splits the threads into roles rather than the operations
+        if self.kind != CONDITION:
+            return rng.random() >= read_ratio
+        if self.parties == 1:
+            return not self.items
+        return index < max(1, round(self.parties * (1 - read_ratio)))
+        
+    def hold(self, seconds):
+        if self.hold_mode == SPIN:
+            # CPU work keeps the GIL, the way a hot path in Python does
+            end = time.perf_counter() + seconds
+            while time.perf_counter() < end:
+                pass
+        elif seconds > 0:
+            time.sleep(seconds)
+            
+    def operation(self, write, seconds, timeout=2.0, key=0):
+        t0 = time.perf_counter()
+        kind = self.kind
+        
+        if kind == BARRIER:
+            # Everyone meets at the barrier, then works in parallel
+            try:
+                self.barrier.wait(timeout)
+            except threading.BrokenBarrierError:
+                if not self.closed:
+                    self.barrier.reset()
+                return None
+            latency = time.perf_counter() - t0
+            self.hold(seconds)
+            return latency
+            
+        if kind == CONDITION:
+            # A bounded work queue: writes wait for room and produce an item,
+            # reads wait for an item and consume it
+            with self.cond:
+                if write:
+                    ready = self.cond.wait_for(lambda: len(self.items) < self.capacity or self.closed, timeout)
+                else:
+                    ready = self.cond.wait_for(lambda: self.items or self.closed, timeout)
+                if not ready or self.closed:
+                    return None
+                latency = time.perf_counter() - t0
+                self.hold(seconds)
+                if write:
+                    self.items.append(key)
+                else:
+                    self.items.popleft()
+                self.cond.notify_all()
+            return latency
+            
+        if kind == READ_WRITE:
+            acquire, release = ((self.lock.acquire_write, self.lock.release_write) if write
+                                else (self.lock.acquire_read, self.lock.release_read))
+        else:
+            lock = self.shards[key % len(self.shards)] if kind == SHARDED else self.lock
+            acquire, release = lock.acquire, lock.release
+        if not acquire(timeout=timeout):
+            return None
+        latency = time.perf_counter() - t0
+        try:
+            if kind == RLOCK:
+                # The critical section calls a helper that takes the lock again
+                with self.lock:
+                    self.hold(seconds)
+            else:
+                self.hold(seconds)
+        finally:
+            release()
+        return latency
+        
+    def close(self):
+        # Wakes anyone still waiting once the run is over
+        self.closed = True
+        if self.kind == BARRIER:
+            self.barrier.abort()
+        elif self.kind == CONDITION:
+            with self.cond:
+                self.cond.notify_all()
+
+
+class BenchResult:
+    def __init__(self, kind, threads, elapsed, ops, latencies, timeouts):
+        self.kind = kind
+        self.threads = threads
+        self.elapsed = elapsed
+        self.ops = ops
+        self.latencies = latencies
+        self.timeouts = timeouts
+        
+    @property
+    def throughput(self):
+        return self.ops / self.elapsed if self.elapsed else 0.0
+        
+    def percentile(self, p):
+        return float(np.percentile(self.latencies, p)) if len(self.latencies) else 0.0
+
+
+def run_benchmark(kind, threads, duration=0.5, hold=20e-6, outside=20e-6, read_ratio=0.8,
+                  hold_mode=SPIN, seed=0):
+    primitive = SharedPrimitive(kind, threads, hold_mode=hold_mode)
+    start = threading.Barrier(threads + 1)
+    stop = threading.Event()
+    samples = [[] for _ in range(threads)]
+    timeouts = [0] * threads
+    
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        record = samples[index].append
+        start.wait()
+        while not stop.is_set():
+            latency = primitive.operation(primitive.choose_write(index, rng, read_ratio), hold, timeout=0.25,
+                                          key=rng.randrange(1 << 20))
+            if latency is None:
+                # Waiters woken by close() at the end are not timeouts
+                if not stop.is_set():
+                    timeouts[index] += 1
+            else:
+                record(latency)
+            primitive.hold(outside)
+            
+    workers = [threading.Thread(target=worker, args=(i,), name=f"Bench {i}", daemon=True) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    start.wait()
+    t0 = time.perf_counter()
+    time.sleep(duration)
+    stop.set()
+    elapsed = time.perf_counter() - t0
+    primitive.close()
+    for thread in workers:
+        thread.join(1.0)
+        
+    latencies = np.fromiter((x for s in samples for x in s), dtype=np.float64)
+    return BenchResult(kind, threads, elapsed, len(latencies), latencies, sum(timeouts))
+
+
+def sweep(kinds=PRIMITIVES, thread_counts=THREAD_COUNTS, on_progress=None, **params):
+    results = {}
+    total = len(kinds) * len(thread_counts)
+    for kind in kinds:
+        results[kind] = []
+        for threads in thread_counts:
+            results[kind].append(run_benchmark(kind, threads, **params))
+            if on_progress:
+                on_progress(sum(map(len, results.values())), total)
+    return results
+
+
+def collapse(runs):
+    # Throughput at the largest thread count as a share of the peak
+    peak = max(runs, key=lambda run: run.throughput)
+    last = runs[-1]
+    return peak, last.throughput / peak.throughput if peak.throughput else 0.0
+
+
+def format_sweep(results):
+    lines = [f"{'Primitive':<17}{'Threads':>8}{'Ops/s':>11}" + "".join(f"{f'p{p} us':>10}" for p in PERCENTILES)
+             + f"{'Timeouts':>10}"]
+    for kind, runs in results.items():
+        for run in runs:
+            lines.append(f"{kind:<17}{run.threads:>8}{run.throughput:>11,.0f}"
+                         + "".join(f"{run.percentile(p) * 1e6:>10.1f}" for p in PERCENTILES)
+                         + f"{run.timeouts:>10}")
+    lines.append("")
+    for kind, runs in results.items():
+        peak, share = collapse(runs)
+        lines.append(f"{kind}: peak {peak.throughput:,.0f} ops/s at {peak.threads} threads, "
+                     f"{share * 100:.0f}% of peak at {runs[-1].threads}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure acquire latency and throughput of shared primitives as threads are added")
+    parser.add_argument("--primitives", nargs="*", choices=PRIMITIVES, default=PRIMITIVES)
+    parser.add_argument("--threads", default=",".join(map(str, THREAD_COUNTS)), help="comma-separated thread counts")
+    parser.add_argument("--duration", type=float, default=0.5, help="seconds per measurement")
+    parser.add_argument("--hold-us", type=float, default=20.0, help="critical section length")
+    parser.add_argument("--outside-us", type=float, default=20.0, help="work between operations")
+    parser.add_argument("--read-ratio", type=float, default=0.8)
+    parser.add_argument("--mode", choices=(SPIN, SLEEP), default=SPIN,
+                        help="spin keeps the GIL like CPU work, sleep releases it like I/O")
+    args = parser.parse_args()
+    
+    counts = [int(n) for n in args.threads.split(",")]
+    print(format_sweep(sweep(args.primitives, counts, duration=args.duration, hold=args.hold_us / 1e6,
+                             outside=args.outside_us / 1e6, read_ratio=args.read_ratio, hold_mode=args.mode)))
@@ -1,13 +1,33 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+import os
 import threading
+import multiprocessing
 import queue
 import time
 import random
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.patches import Patch
 import numpy as np
 
+from instrumented_lock import InstrumentedLock, DeadlockWatchdog, default_graph
+from lock_order import default_checker
+from animation_export import export_timeline, format_export_report
+from session_store import SessionHistory, history_to_events
+from metrics_server import SimulatorMetrics, MetricsServer
+from run_history import RunHistory, compare_runs, format_value, format_delta
+from shm_channel import EventChannel, process_worker
+from cpu_model import CoreModel, simulate_cpu, format_summary
+from raster_view import RasterView
+from sync_workbench import PRIMITIVES, THREAD_COUNTS, SPIN, SLEEP, SharedPrimitive, sweep, format_sweep
+from program_tracer import ProgramTracer, format_trace, MODES, PROFILE, KINDS, TASK, LOCK, IO
+from soak_monitor import SoakMonitor, run_soak, format_soak_report, REAL, VIRTUAL
+
+NO_PRIMITIVE = "None"
+TRACE_COLORS = {TASK: '#2980B9', LOCK: '#C0392B', IO: '#F39C12'}
+TRACE_HEIGHTS = {TASK: 0.5, LOCK: 0.3, IO: 0.3}
+
 class ThreadSimulator:
     def __init__(self, parent):
         self.parent = parent
@@ -22,6 +42,58 @@ class ThreadSimulator:
         self.thread_history = {}
         self.start_time = 0
         
+        self.seed = tk.IntVar(value=0)
+        self.task_durations = []
+        self.session_history = None
+        
+        self.use_locks = tk.BooleanVar(value=False)
+        self.locks = []
+        self.lock_timeout = 2.0
+        self.watchdog = None
+        self.reported_violations = 0
+        self.visible = True
+        
+        self.metrics = SimulatorMetrics()
+        self.metrics_server = None
+        self.serve_metrics = tk.BooleanVar(value=False)
+        
+        self.run_history = RunHistory(limit=8)
+        self.compare_window = None
+        
+        self.use_processes = tk.BooleanVar(value=False)
+        self.processes = []
+        self.channel = None
+        self.process_completed = 0
+        self.process_tasks = None
+        self.process_stop = None
+        
+        self.use_cpu_model = tk.BooleanVar(value=False)
+        self.num_cores = tk.IntVar(value=8)
+        self.quantum_ms = tk.DoubleVar(value=10.0)
+        self.switch_us = tk.DoubleVar(value=20.0)
+        self.migration_us = tk.DoubleVar(value=200.0)
+        self.use_gil = tk.BooleanVar(value=False)
+        self.virtual_time = None
+        
+        self.primitive_kind = tk.StringVar(value=NO_PRIMITIVE)
+        self.critical_ms = tk.DoubleVar(value=100.0)
+        self.read_percent = tk.IntVar(value=80)
+        self.primitive = None
+        self.primitive_waits = []
+        self.primitive_timeouts = []
+        self.bench_window = None
+        self.bench_thread = None
+        
+        self.trace_mode = tk.StringVar(value=PROFILE)
+        self.tracer = None
+        self.trace = None
+        self.trace_deadlocks = set()
+        
+        self.soak = tk.BooleanVar(value=False)
+        self.soak_minutes = tk.DoubleVar(value=10.0)
+        self.soak_monitor = None
+        self.soak_until = 0.0
+        
         self.create_control_panel()
         self.create_visualization_area()
         
@@ -32,13 +104,13 @@ class ThreadSimulator:
         thread_label = ttk.Label(control_frame, text="Worker Threads:")
         thread_label.grid(row=0, column=0, padx=5, pady=5, sticky=tk.W)
         
-        thread_spinbox = ttk.Spinbox(control_frame, from_=1, to=16, textvariable=self.num_threads, width=5)
+        thread_spinbox = ttk.Spinbox(control_frame, from_=1, to=64, textvariable=self.num_threads, width=5)
         thread_spinbox.grid(row=0, column=1, padx=5, pady=5, sticky=tk.W)
         
         task_label = ttk.Label(control_frame, text="Tasks:")
         task_label.grid(row=0, column=2, padx=5, pady=5, sticky=tk.W)
         
-        task_spinbox = ttk.Spinbox(control_frame, from_=1, to=100, textvariable=self.num_tasks, width=5)
+        task_spinbox = ttk.Spinbox(control_frame, from_=1, to=1000, textvariable=self.num_tasks, width=5)
         task_spinbox.grid(row=0, column=3, padx=5, pady=5, sticky=tk.W)
         
         self.start_button = ttk.Button(control_frame, text="Start", command=self.start_simulation)
@@ -50,6 +122,98 @@ class ThreadSimulator:
         self.clear_button = ttk.Button(control_frame, text="Clear", command=self.clear_simulation)
         self.clear_button.grid(row=0, column=6, padx=5, pady=5)
         
+        lock_check = ttk.Checkbutton(control_frame, text="Shared Locks", variable=self.use_locks)
+        lock_check.grid(row=0, column=7, padx=5, pady=5)
+        
+        self.export_button = ttk.Button(control_frame, text="Export", command=self.export_animation)
+        self.export_button.grid(row=0, column=8, padx=5, pady=5)
+        
+        seed_label = ttk.Label(control_frame, text="Seed:")
+        seed_label.grid(row=0, column=9, padx=5, pady=5, sticky=tk.W)
+        
+        seed_spinbox = ttk.Spinbox(control_frame, from_=0, to=99999, textvariable=self.seed, width=6)
+        seed_spinbox.grid(row=0, column=10, padx=5, pady=5, sticky=tk.W)
+        
+        metrics_check = ttk.Checkbutton(control_frame, text="Metrics Endpoint", variable=self.serve_metrics,
+                                        command=self.toggle_metrics_server)
+        metrics_check.grid(row=0, column=11, padx=5, pady=5)
+        
+        self.compare_button = ttk.Button(control_frame, text="Compare Runs", command=self.open_comparison)
+        self.compare_button.grid(row=0, column=12, padx=5, pady=5)
+        
+        process_check = ttk.Checkbutton(control_frame, text="Worker Processes", variable=self.use_processes)
+        process_check.grid(row=1, column=0, columnspan=2, padx=5, pady=5, sticky=tk.W)
+        
+        cpu_check = ttk.Checkbutton(control_frame, text="CPU Model", variable=self.use_cpu_model)
+        cpu_check.grid(row=1, column=2, columnspan=2, padx=5, pady=5, sticky=tk.W)
+        
+        cores_label = ttk.Label(control_frame, text="Cores:")
+        cores_label.grid(row=1, column=4, padx=5, pady=5, sticky=tk.W)
+        
+        cores_spinbox = ttk.Spinbox(control_frame, from_=1, to=64, textvariable=self.num_cores, width=5)
+        cores_spinbox.grid(row=1, column=5, padx=5, pady=5, sticky=tk.W)
+        
+        quantum_label = ttk.Label(control_frame, text="Quantum (ms):")
+        quantum_label.grid(row=1, column=6, padx=5, pady=5, sticky=tk.W)
+        
+        quantum_spinbox = ttk.Spinbox(control_frame, from_=1, to=100, textvariable=self.quantum_ms, width=5)
+        quantum_spinbox.grid(row=1, column=7, padx=5, pady=5, sticky=tk.W)
+        
+        switch_label = ttk.Label(control_frame, text="Switch (us):")
+        switch_label.grid(row=1, column=8, padx=5, pady=5, sticky=tk.W)
+        
+        switch_spinbox = ttk.Spinbox(control_frame, from_=0, to=1000, textvariable=self.switch_us, width=6)
+        switch_spinbox.grid(row=1, column=9, padx=5, pady=5, sticky=tk.W)
+        
+        migration_label = ttk.Label(control_frame, text="Migration (us):")
+        migration_label.grid(row=1, column=10, padx=5, pady=5, sticky=tk.W)
+        
+        migration_spinbox = ttk.Spinbox(control_frame, from_=0, to=10000, textvariable=self.migration_us, width=6)
+        migration_spinbox.grid(row=1, column=11, padx=5, pady=5, sticky=tk.W)
+        
+        gil_check = ttk.Checkbutton(control_frame, text="GIL", variable=self.use_gil)
+        gil_check.grid(row=1, column=12, padx=5, pady=5, sticky=tk.W)
+        
+        primitive_label = ttk.Label(control_frame, text="Shared Primitive:")
+        primitive_label.grid(row=2, column=0, columnspan=2, padx=5, pady=5, sticky=tk.W)
+        
+        primitive_combo = ttk.Combobox(control_frame, textvariable=self.primitive_kind, values=[NO_PRIMITIVE] + PRIMITIVES,
+                                      state="readonly", width=16)
+        primitive_combo.grid(row=2, column=2, columnspan=2, padx=5, pady=5, sticky=tk.W)
+        
+        critical_label = ttk.Label(control_frame, text="Critical Section (ms):")
+        critical_label.grid(row=2, column=4, columnspan=2, padx=5, pady=5, sticky=tk.W)
+        
+        critical_spinbox = ttk.Spinbox(control_frame, from_=0, to=2000, increment=10, textvariable=self.critical_ms, width=6)
+        critical_spinbox.grid(row=2, column=6, padx=5, pady=5, sticky=tk.W)
+        
+        read_label = ttk.Label(control_frame, text="Reads (%):")
+        read_label.grid(row=2, column=7, padx=5, pady=5, sticky=tk.W)
+        
+        read_spinbox = ttk.Spinbox(control_frame, from_=0, to=100, increment=5, textvariable=self.read_percent, width=5)
+        read_spinbox.grid(row=2, column=8, padx=5, pady=5, sticky=tk.W)
+        
+        self.bench_button = ttk.Button(control_frame, text="Benchmark Primitives", command=self.open_benchmark)
+        self.bench_button.grid(row=2, column=9, columnspan=2, padx=5, pady=5)
+        
+        trace_label = ttk.Label(control_frame, text="Trace Mode:")
+        trace_label.grid(row=3, column=0, columnspan=2, padx=5, pady=5, sticky=tk.W)
+        
+        trace_combo = ttk.Combobox(control_frame, textvariable=self.trace_mode, values=MODES, state="readonly", width=10)
+        trace_combo.grid(row=3, column=2, columnspan=2, padx=5, pady=5, sticky=tk.W)
+        
+        self.trace_button = ttk.Button(control_frame, text="Trace Program...", command=self.trace_program)
+        self.trace_button.grid(row=3, column=4, columnspan=2, padx=5, pady=5)
+        
+        soak_check = ttk.Checkbutton(control_frame, text="Soak Test", variable=self.soak)
+        soak_check.grid(row=3, column=6, padx=5, pady=5, sticky=tk.W)
+        
+        soak_label = ttk.Label(control_frame, text="Soak (min):")
+        soak_label.grid(row=3, column=7, padx=5, pady=5, sticky=tk.W)
+        
+        soak_spinbox = ttk.Spinbox(control_frame, from_=1, to=1440, increment=5, textvariable=self.soak_minutes, width=6)
+        soak_spinbox.grid(row=3, column=8, padx=5, pady=5, sticky=tk.W)
+        
     def create_visualization_area(self):
         viz_frame = ttk.Frame(self.frame, padding=10)
         viz_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -57,10 +221,8 @@ class ThreadSimulator:
         timeline_frame = ttk.LabelFrame(viz_frame, text="Thread Activity Timeline", padding=10)
         timeline_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
-        self.fig = Figure(figsize=(8, 4), dpi=100)
-        self.ax = self.fig.add_subplot(111)
-        self.canvas = FigureCanvasTkAgg(self.fig, master=timeline_frame)
-        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.timeline_view = RasterView(timeline_frame, figsize=(8, 4), dpi=100)
+        self.timeline_view.widget.pack(fill=tk.BOTH, expand=True)
         
         self.update_timeline()
         
@@ -90,48 +252,177 @@ class ThreadSimulator:
         self.status_text.config(state=tk.DISABLED)
         
     def update_timeline(self):
-        self.ax.clear()
+        if self.session_history:
+            current_time = self.session_history.makespan()
+        elif self.virtual_time is not None:
+            current_time = self.virtual_time
+        else:
+            current_time = time.time() - self.start_time
+            
+        # The frame is drawn on the render thread, so it gets its own copy of
+        # the live history; restored sessions are read-only and are shared
+        thread_history = {thread_id: list(events) for thread_id, events in list(self.thread_history.items())}
+        self.timeline_view.render(self.render_timeline, current_time, thread_history, self.session_history, self.trace)
+        
+    def render_timeline(self, fig, current_time, thread_history, session_history, trace):
+        ax = fig.axes[0] if fig.axes else fig.add_subplot(111)
+        self.draw_timeline(ax, current_time, thread_history, session_history, trace)
+        
+    def draw_timeline(self, ax, current_time, thread_history, session_history=None, trace=None):
+        ax.clear()
         
-        if not self.thread_history:
-            self.ax.set_title("No thread activity data")
-            self.ax.text(0.5, 0.5, "Start simulation to see thread activity", 
+        if session_history and trace:
+            spans = ((thread_id,) + session_history.spans(thread_id, current_time)
+                     for thread_id in session_history.thread_ids())
+            self.draw_trace_timeline(ax, current_time, spans, trace)
+        elif session_history:
+            self.draw_session_timeline(ax, current_time, session_history)
+        elif trace:
+            self.draw_trace_timeline(ax, current_time, self.trace_spans(thread_history, current_time), trace)
+        elif not thread_history:
+            ax.set_title("No thread activity data")
+            ax.text(0.5, 0.5, "Start simulation to see thread activity", 
                         horizontalalignment='center', verticalalignment='center',
-                        transform=self.ax.transAxes)
+                        transform=ax.transAxes)
         else:
             
-            current_time = time.time() - self.start_time
-            
             y_ticks = []
             y_labels = []
             
-            for thread_id, events in self.thread_history.items():
+            for thread_id, events in thread_history.items():
                 y_pos = thread_id
                 y_ticks.append(y_pos)
                 y_labels.append(f"Thread {thread_id}")
                 
                 
                 for start, end, task_id in events:
-                    if end is None:  
+                    if start > current_time:
+                        continue
+                    if end is None or end > current_time:  
                         end = current_time
-                    self.ax.barh(y_pos, end - start, left=start, height=0.5, 
+                    ax.barh(y_pos, end - start, left=start, height=0.5, 
                                 color='#2980B9', alpha=0.7)
                     
                     
                     if end - start > 0.3:
-                        self.ax.text(start + (end - start) / 2, y_pos, f"Task {task_id}",
+                        ax.text(start + (end - start) / 2, y_pos, f"Task {task_id}",
                                     ha='center', va='center', color='white', fontsize=8)
             
-            self.ax.set_yticks(y_ticks)
-            self.ax.set_yticklabels(y_labels)
-            self.ax.set_xlabel("Time (seconds)")
-            self.ax.set_title("Thread Activity Timeline")
-            self.ax.grid(True, axis='x', linestyle='--', alpha=0.7)
+            ax.set_yticks(y_ticks)
+            ax.set_yticklabels(y_labels)
+            ax.set_xlabel("Time (seconds)")
+            ax.set_title("Thread Activity Timeline")
+            ax.grid(True, axis='x', linestyle='--', alpha=0.7)
+            
             
+            ax.set_xlim(0, max(current_time, 1))
             
-            self.ax.set_xlim(0, max(current_time, 1))
+    def draw_session_timeline(self, ax, current_time, history):
+        # Restored histories can hold millions of spans, so only the visible
+        # window is sliced out of the mapped array and spans closer together
+        # than about a pixel are merged into a single bar
+        min_gap = max(current_time, 1) / 2000
+        thread_ids = history.thread_ids()
         
-        self.canvas.draw()
+        for thread_id in thread_ids:
+            starts, ends, tasks = history.spans(thread_id, current_time, min_gap)
+            ax.broken_barh(list(zip(starts, ends - starts)), (thread_id - 0.25, 0.5),
+                                facecolors='#2980B9', alpha=0.7)
+            if tasks is not None and len(tasks) <= 200:
+                for start, end, task_id in zip(starts, ends, tasks):
+                    if end - start > 0.3:
+                        ax.text(start + (end - start) / 2, thread_id, f"Task {task_id}",
+                                    ha='center', va='center', color='white', fontsize=8)
+                        
+        ax.set_yticks(thread_ids)
+        ax.set_yticklabels([f"Thread {thread_id}" for thread_id in thread_ids])
+        ax.set_xlabel("Time (seconds)")
+        ax.set_title(f"Thread Activity Timeline ({len(history)} tasks, restored)")
+        ax.grid(True, axis='x', linestyle='--', alpha=0.7)
+        ax.set_xlim(0, max(current_time, 1))
         
+    def trace_spans(self, thread_history, current_time):
+        for thread_id, events in thread_history.items():
+            rows = np.array([(start, current_time if end is None else end, label) for start, end, label in events
+                             if start <= current_time], dtype=float).reshape(-1, 3)
+            yield thread_id, rows[:, 0], np.minimum(rows[:, 1], current_time), rows[:, 2].astype(int)
+            
+    def draw_trace_timeline(self, ax, current_time, spans, trace):
+        # Waits are drawn as thinner bars on top of the task they happened in
+        kinds = np.array([kind for kind, _ in trace["labels"]] or [TASK])
+        thread_ids = []
+        for thread_id, starts, ends, labels in spans:
+            thread_ids.append(thread_id)
+            for zorder, kind in enumerate(KINDS, start=2):
+                mask = kinds[labels] == kind
+                height = TRACE_HEIGHTS[kind]
+                ax.broken_barh(list(zip(starts[mask], ends[mask] - starts[mask])), (thread_id - height / 2, height),
+                               facecolors=TRACE_COLORS[kind], alpha=0.8, zorder=zorder)
+            if len(labels) <= 200:
+                for start, end, label in zip(starts, ends, labels):
+                    kind, name = trace["labels"][label]
+                    if kind == TASK and end - start > max(current_time, 1) / 8:
+                        ax.text(start + (end - start) / 2, thread_id, name, ha='center', va='center',
+                                color='white', fontsize=8, zorder=5)
+                                
+        ax.set_yticks(thread_ids)
+        ax.set_yticklabels([trace["threads"][thread_id] for thread_id in thread_ids])
+        ax.invert_yaxis()
+        ax.set_xlabel("Time (seconds)")
+        ax.set_title(f"Traced {trace['target']} ({trace['mode']} mode)")
+        ax.legend(handles=[Patch(color=TRACE_COLORS[kind], label=kind) for kind in KINDS], loc='upper right', fontsize=8)
+        ax.grid(True, axis='x', linestyle='--', alpha=0.7)
+        ax.set_xlim(0, max(current_time, 1e-3))
+        
+    def export_animation(self):
+        if not self.thread_history and not self.session_history:
+            messagebox.showinfo("Export", "Run a simulation first to export its timeline.")
+            return
+            
+        output = filedialog.asksaveasfilename(title="Export Timeline", defaultextension=".gif",
+                                              filetypes=[("GIF", "*.gif"), ("MP4", "*.mp4"), ("PNG frames", "*")])
+        if not output:
+            return
+            
+        if self.session_history:
+            events = self.session_history.events
+            history = {thread_id: [] for thread_id in self.session_history.thread_ids()}
+            for thread_id, task_id, start, end in events.tolist():
+                history[thread_id].append((start, end, task_id))
+        else:
+            history = {thread_id: list(events) for thread_id, events in self.thread_history.items()}
+        self.export_button.config(state=tk.DISABLED)
+        self.log_status(f"Exporting timeline to {output}...")
+        threading.Thread(target=self.export_worker, args=(history, output), daemon=True).start()
+        
+    def export_worker(self, history, output):
+        try:
+            message = format_export_report(export_timeline(history, output), output)
+        except Exception as e:
+            message = f"Export failed: {e}"
+        self.frame.after(0, self.export_complete, message)
+        
+    def export_complete(self, message):
+        self.export_button.config(state=tk.NORMAL)
+        self.log_status(message)
+        
+    def toggle_metrics_server(self):
+        if self.serve_metrics.get():
+            server = MetricsServer(self.metrics)
+            try:
+                server.start()
+            except OSError as e:
+                self.serve_metrics.set(False)
+                self.log_status(f"Could not start the metrics endpoint on port {server.port}: {e}")
+                return
+            self.metrics_server = server
+            self.metrics.publish(self.task_queue.qsize())
+            self.log_status(f"Serving Prometheus metrics at {server.url}")
+        elif self.metrics_server:
+            self.metrics_server.stop()
+            self.metrics_server = None
+            self.log_status("Metrics endpoint stopped")
+            
     def log_status(self, message):
         self.status_text.config(state=tk.NORMAL)
         self.status_text.insert(tk.END, f"[{time.strftime('%H:%M:%S')}] {message}\n")
@@ -141,6 +432,7 @@ class ThreadSimulator:
     def worker_thread(self, thread_id):
         self.thread_status[thread_id] = "idle"
         self.thread_history[thread_id] = []
+        counters = self.metrics.worker(thread_id)
         
         while self.running:
             try:
@@ -153,28 +445,43 @@ class ThreadSimulator:
                 
                 
                 start_time = time.time() - self.start_time
+                # Every task is queued when the run starts
+                counters.queue_wait.observe(start_time)
                 
                 
-                work_duration = random.uniform(0.5, 2.0)
-                time.sleep(work_duration)
+                work_duration = self.task_durations[task_id]
+                if self.locks:
+                    done = self.locked_work(thread_id, task_id, work_duration)
+                elif self.primitive:
+                    done = self.primitive_work(thread_id, task_id, work_duration)
+                else:
+                    time.sleep(work_duration)
+                    done = True
                 
                 
                 end_time = time.time() - self.start_time
                 
                 
-                self.thread_history[thread_id].append((start_time, end_time, task_id))
-                
-                
-                self.log_status(f"Thread {thread_id} completed task {task_id}")
+                # A task given up on, or cut short by a stop, never ran to the
+                # end and must not show up in the history or the comparison
+                if done:
+                    self.thread_history[thread_id].append((start_time, end_time, task_id))
+                    counters.busy_time += end_time - start_time
+                    counters.tasks_completed += 1
+                    self.log_status(f"Thread {thread_id} completed task {task_id}")
+                else:
+                    self.log_status(f"Thread {thread_id} abandoned task {task_id}")
                 self.thread_status[thread_id] = "idle"
                 
                 
                 self.task_queue.task_done()
                 
                 
-                completed = self.num_tasks.get() - self.task_queue.qsize()
-                progress = completed / self.num_tasks.get()
-                self.progress_var.set(progress)
+                # A soak has no fixed task count; sample_soak tracks its progress
+                if not self.soak_monitor:
+                    completed = self.num_tasks.get() - self.task_queue.qsize()
+                    progress = completed / self.num_tasks.get()
+                    self.progress_var.set(progress)
                 
             except queue.Empty:
                 
@@ -183,13 +490,76 @@ class ThreadSimulator:
             if thread_id == 0:  
                 self.update_ui()
                 
-    def update_ui(self):
+    def locked_work(self, thread_id, task_id, work_duration):
+        # Take two shared locks in random order so that workers can deadlock
+        first, second = random.sample(self.locks, 2)
+        counters = self.metrics.worker(thread_id)
+        while self.running:
+            t0 = time.perf_counter()
+            with first:
+                counters.lock_wait.observe(time.perf_counter() - t0)
+                time.sleep(work_duration / 2)
+                t0 = time.perf_counter()
+                acquired = second.acquire(timeout=self.lock_timeout)
+                counters.lock_wait.observe(time.perf_counter() - t0)
+                if acquired:
+                    try:
+                        time.sleep(work_duration / 2)
+                    finally:
+                        second.release()
+                    return True
+            self.log_status(f"Thread {thread_id} timed out waiting for {second.name} on task {task_id}, backing off")
+            time.sleep(random.uniform(0.05, 0.2))
+        return False
         
+    def primitive_work(self, thread_id, task_id, work_duration):
+        # The task's critical section runs on the shared primitive and the
+        # rest of its work outside it
+        primitive = self.primitive
+        hold = min(self.primitive_hold, work_duration)
+        rng = random.Random(self.seed.get() * 100003 + task_id)
+        write = primitive.choose_write(thread_id, rng, self.read_ratio)
+        latency = primitive.operation(write, hold, timeout=self.lock_timeout, key=task_id)
+        if latency is None:
+            self.primitive_timeouts.append(task_id)
+            if self.running:
+                self.log_status(f"Thread {thread_id} gave up waiting on the {primitive.kind} for task {task_id}")
+            return False
+        self.metrics.worker(thread_id).lock_wait.observe(latency)
+        self.primitive_waits.append(latency)
+        time.sleep(work_duration - hold)
+        return True
+        
+    def log_primitive_summary(self):
+        waits = np.array(self.primitive_waits)
+        if not len(waits):
+            return
+        p50, p99 = np.percentile(waits, [50, 99]) * 1000
+        self.log_status(f"{self.primitive.kind}: {len(waits)} acquisitions, wait p50 {p50:.1f} ms, p99 {p99:.1f} ms, "
+                        f"max {waits.max() * 1000:.1f} ms, {len(self.primitive_timeouts)} timeouts")
+        
+    def report_lock_order_violations(self):
+        violations = default_checker.violations[self.reported_violations:]
+        self.reported_violations += len(violations)
+        for violation in violations:
+            self.log_status(f"Potential deadlock: {violation['thread']} took {' -> '.join(violation['new_edge'])}, "
+                            f"inverting the order {' -> '.join(violation['cycle'])} used by {', '.join(violation['conflicting_threads'])}")
+            
+    def on_deadlock(self, thread_names):
+        self.metrics.record_deadlock()
+        self.frame.after(0, self.log_status, f"Deadlock detected between {', '.join(thread_names)}")
+        
+    def update_ui(self):
+        # Skip redraws while the module is hidden; the simulation keeps running
+        if not self.visible:
+            return
         
         self.frame.after(100, self.update_timeline)
+        if self.locks:
+            self.frame.after(100, self.report_lock_order_violations)
         
     def start_simulation(self):
-        if self.running:
+        if self.running or self.tracer:
             return
             
         
@@ -203,6 +573,9 @@ class ThreadSimulator:
         
         self.start_time = time.time()
         
+        # Task lengths come from the seed so that a saved run can be repeated
+        rng = random.Random(self.seed.get())
+        self.task_durations = [rng.uniform(0.5, 2.0) for _ in range(self.num_tasks.get())]
         
         for i in range(self.num_tasks.get()):
             self.task_queue.put(i)
@@ -210,21 +583,186 @@ class ThreadSimulator:
         
         self.log_status(f"Starting simulation with {self.num_threads.get()} threads and {self.num_tasks.get()} tasks")
         
-        
+        if self.use_cpu_model.get():
+            if self.soak.get():
+                self.run_virtual_soak()
+            else:
+                self.run_cpu_model()
+            return
+            
+        if self.use_processes.get():
+            if self.soak.get():
+                self.log_status("Soak tests run on worker threads or the CPU model, not worker processes")
+            self.start_worker_processes()
+            return
+            
+        if self.use_locks.get():
+            default_graph.clear()
+            self.locks = [InstrumentedLock(f"Lock {i}", checker=default_checker)
+                          for i in range(max(2, self.num_threads.get() // 2))]
+            self.reported_violations = len(default_checker.violations)
+            self.watchdog = DeadlockWatchdog(on_deadlock=self.on_deadlock)
+            self.watchdog.start()
+            self.log_status(f"Workers share {len(self.locks)} instrumented locks")
+        elif self.primitive_kind.get() != NO_PRIMITIVE:
+            self.primitive = SharedPrimitive(self.primitive_kind.get(), self.num_threads.get())
+            self.primitive_hold = self.critical_ms.get() / 1000
+            self.read_ratio = self.read_percent.get() / 100
+            self.primitive_waits = []
+            self.primitive_timeouts = []
+            self.log_status(f"Workers share a {self.primitive.kind} with {self.critical_ms.get():g} ms critical sections "
+                            f"and {self.read_percent.get()}% reads")
+            
         for i in range(self.num_threads.get()):
-            thread = threading.Thread(target=self.worker_thread, args=(i,), daemon=True)
+            thread = threading.Thread(target=self.worker_thread, args=(i,), name=f"Worker {i}", daemon=True)
             self.threads.append(thread)
             thread.start()
             self.log_status(f"Started worker thread {i}")
             
         
+        if self.soak.get():
+            self.start_soak()
+            
         self.monitor_thread = threading.Thread(target=self.monitor_simulation, daemon=True)
         self.monitor_thread.start()
         
+    def core_model(self):
+        return CoreModel(cores=self.num_cores.get(), quantum=self.quantum_ms.get() / 1000,
+                         switch_cost=self.switch_us.get() / 1e6, migration_penalty=self.migration_us.get() / 1e6,
+                         gil=self.use_gil.get(), seed=self.seed.get())
+                         
+    def run_cpu_model(self):
+        # Runs the whole pool on simulated cores in virtual time; the result
+        # replaces the wall-clock history so metrics and comparisons see it.
+        # Big pools take a while to simulate, so that happens off the Tk thread.
+        model = self.core_model()
+        self.task_queue = queue.Queue()
+        threading.Thread(target=self.cpu_model_worker, args=(self.task_durations, self.num_threads.get(), model),
+                         name="CPU model", daemon=True).start()
+        
+    def cpu_model_worker(self, durations, workers, model):
+        t0 = time.perf_counter()
+        result = simulate_cpu(durations, workers, model)
+        elapsed = time.perf_counter() - t0
+        self.frame.after(0, self.cpu_model_complete, durations, workers, model, result, elapsed)
+        
+    def cpu_model_complete(self, durations, workers, model, result, elapsed):
+        # Stopped, or superseded by a newer run, while the model was running
+        if not self.running or durations is not self.task_durations:
+            return
+            
+        self.thread_history = result.thread_history()
+        self.thread_status = {worker: "idle" for worker in self.thread_history}
+        for worker, events in self.thread_history.items():
+            counters = self.metrics.worker(worker)
+            for start, end, task_id in events:
+                counters.queue_wait.observe(start)
+                counters.tasks_completed += 1
+            counters.busy_time += result.cpu_time[worker]
+        self.metrics.publish(0)
+        
+        self.virtual_time = result.makespan
+        self.progress_var.set(1.0)
+        self.log_status(format_summary(result.summary(), model, workers))
+        self.log_status(f"Simulated {result.slices} time slices in {elapsed * 1000:.0f} ms")
+        self.simulation_complete()
+        
+    def start_worker_processes(self):
+        # Workers run in child processes and report completed tasks through
+        # per-worker shared-memory rings instead of pickling every event
+        num_workers = self.num_threads.get()
+        context = multiprocessing.get_context("spawn")
+        self.channel = EventChannel(num_workers, capacity=1024)
+        self.process_stop = context.Event()
+        
+        # Kept on self: the queue must outlive this call until every child
+        # has attached to it
+        tasks = self.process_tasks = context.Queue()
+        for i in range(self.num_tasks.get()):
+            tasks.put(i)
+        for _ in range(num_workers):
+            tasks.put(None)
+        self.task_queue = queue.Queue()
+        
+        if self.use_locks.get():
+            self.log_status("Shared locks only work between threads and are not used by worker processes")
+            
+        for i in range(num_workers):
+            self.thread_history[i] = []
+            self.thread_status[i] = "idle"
+            process = context.Process(target=process_worker, name=f"Worker {i}", daemon=True,
+                                      args=(self.channel.name, num_workers, self.channel.capacity, i, tasks,
+                                            self.task_durations, self.start_time, self.process_stop))
+            process.start()
+            self.processes.append(process)
+            self.log_status(f"Started worker process {i}")
+            
+        self.process_completed = 0
+        self.monitor_thread = threading.Thread(target=self.collect_process_events, args=(self.num_tasks.get(),),
+                                               daemon=True)
+        self.monitor_thread.start()
+        
+    def record_process_events(self, events):
+        for thread_id, task_id, start, end in events.tolist():
+            self.thread_history[thread_id].append((start, end, task_id))
+            counters = self.metrics.worker(thread_id)
+            counters.queue_wait.observe(start)
+            counters.busy_time += end - start
+            counters.tasks_completed += 1
+            self.log_status(f"Process {thread_id} completed task {task_id}")
+        return len(events)
+        
+    def collect_process_events(self, total):
+        # Only the draining happens here; Tk and the history are touched on
+        # the main thread, which also decides when every task is done
+        while self.running:
+            events = self.channel.drain()
+            if len(events):
+                self.frame.after(0, self.process_events_ready, events, total)
+            time.sleep(0.1)
+            
+    def process_events_ready(self, events, total):
+        # Spans drained just before a stop still belong to this run
+        self.process_completed += self.record_process_events(events)
+        if not self.running:
+            return
+            
+        self.progress_var.set(self.process_completed / total)
+        self.metrics.publish(total - self.process_completed)
+        self.update_ui()
+        
+        if self.process_completed >= total:
+            self.simulation_complete()
+            
+    def stop_worker_processes(self):
+        self.process_stop.set()
+        if self.monitor_thread.is_alive():
+            self.monitor_thread.join(1.0)
+        for process in self.processes:
+            process.join(1.0)
+            if process.is_alive():
+                process.terminate()
+                
+        # Keep anything finished after the collector's last pass
+        self.record_process_events(self.channel.drain())
+        stalls = self.channel.stalls()
+        if stalls:
+            self.log_status(f"Workers waited on full event rings {stalls} times")
+        self.channel.close()
+        self.channel = None
+        self.process_tasks = None
+        self.processes = []
+        
     def monitor_simulation(self):
         while self.running and any(thread.is_alive() for thread in self.threads):
+            self.metrics.publish(self.task_queue.qsize())
             
-            if self.task_queue.empty() and all(status == "idle" for status in self.thread_status.values()):
+            if self.soak_monitor:
+                if time.time() - self.start_time >= self.soak_until:
+                    self.frame.after(0, self.simulation_complete)
+                    break
+                self.top_up_soak()
+            elif self.task_queue.empty() and all(status == "idle" for status in self.thread_status.values()):
                 self.frame.after(0, self.simulation_complete)
                 break
                 
@@ -235,9 +773,18 @@ class ThreadSimulator:
         if not self.running:
             return
             
+        soaking = self.soak_monitor is not None
         self.stop_simulation()
         self.log_status("Simulation completed successfully")
-        messagebox.showinfo("Simulation Complete", "All tasks have been processed!")
+        
+        run = self.run_history.add(self.run_config(), self.thread_history)
+        self.log_status(f"Kept {run.label} for comparison ({len(self.run_history)} of {self.run_history.runs.maxlen} slots)")
+        if self.compare_window:
+            self.refresh_comparison_runs()
+        if soaking:
+            self.show_soak_result()
+        else:
+            messagebox.showinfo("Simulation Complete", "All tasks have been processed!")
         
     def stop_simulation(self):
         if not self.running:
@@ -245,14 +792,31 @@ class ThreadSimulator:
             
         self.running = False
         
+        if self.watchdog:
+            self.watchdog.stop()
+            self.watchdog = None
+            
+        if self.processes:
+            self.stop_worker_processes()
+            
+        if self.primitive:
+            self.primitive.close()
+            
         
         for thread in self.threads:
             if thread.is_alive():
                 thread.join(0.1)
                 
+        if self.primitive:
+            self.log_primitive_summary()
+            
+        if self.soak_monitor:
+            self.finish_soak()
+            
         
         self.start_button.config(state=tk.NORMAL)
         self.stop_button.config(state=tk.DISABLED)
+        self.metrics.publish(self.task_queue.qsize())
         
         
         self.log_status("Simulation stopped")
@@ -269,7 +833,12 @@ class ThreadSimulator:
         self.threads = []
         self.thread_status = {}
         self.thread_history = {}
+        self.session_history = None
+        self.virtual_time = None
+        self.trace = None
         self.task_queue = queue.Queue()
+        self.locks = []
+        self.primitive = None
         self.progress_var.set(0.0)
         
         
@@ -281,4 +850,443 @@ class ThreadSimulator:
         self.update_timeline()
         
         
-        self.log_status("Simulation cleared")
\ No newline at end of file
+        self.log_status("Simulation cleared")
+        
+    def suspend(self):
+        self.visible = False
+        
+    def resume(self):
+        self.visible = True
+        self.update_timeline()
+        
+    def run_config(self):
+        config = {
+            "threads": self.num_threads.get(),
+            "tasks": self.num_tasks.get(),
+            "shared_locks": self.use_locks.get(),
+            "seed": self.seed.get(),
+        }
+        if self.use_cpu_model.get():
+            model = self.core_model()
+            config["cpu_model"] = {"cores": model.cores, "quantum": model.quantum, "switch_cost": model.switch_cost,
+                                   "migration_penalty": model.migration_penalty, "gil": model.gil}
+        if self.primitive_kind.get() != NO_PRIMITIVE and not self.use_locks.get():
+            config["primitive"] = {"kind": self.primitive_kind.get(), "critical_section": self.critical_ms.get() / 1000,
+                                   "read_ratio": self.read_percent.get() / 100}
+        return config
+        
+    def session_events(self):
+        if self.session_history:
+            history = self.session_history
+            return history.events, {str(k): v for k, v in history.offsets.items()}
+        current_time = time.time() - self.start_time if self.running else None
+        return history_to_events({k: list(v) for k, v in self.thread_history.items()}, current_time)
+        
+    def session_state(self):
+        events, offsets = self.session_events()
+        busy = np.bincount(events["thread"], weights=events["end"] - events["start"],
+                           minlength=self.num_threads.get()) if len(events) else np.zeros(0)
+        makespan = float(events["end"].max()) if len(events) else 0.0
+        
+        meta = {
+            "config": self.run_config(),
+            "metrics": {
+                "completed_tasks": int(len(events)),
+                "makespan": makespan,
+                "busy_time": busy.tolist(),
+                "utilization": (busy / makespan).tolist() if makespan else [],
+            },
+            "offsets": offsets,
+            "status": self.status_text.get(1.0, tk.END + "-1c")[-20000:],
+        }
+        if self.trace:
+            meta["trace"] = self.trace
+        return meta, {"thread/events": (events, True)}
+        
+    def restore_session(self, meta, session):
+        self.clear_simulation()
+        
+        config = meta["config"]
+        self.num_threads.set(config["threads"])
+        self.num_tasks.set(config["tasks"])
+        self.use_locks.set(config["shared_locks"])
+        self.seed.set(config["seed"])
+        cpu_model = config.get("cpu_model")
+        self.use_cpu_model.set(cpu_model is not None)
+        if cpu_model:
+            self.num_cores.set(cpu_model["cores"])
+            self.quantum_ms.set(cpu_model["quantum"] * 1000)
+            self.switch_us.set(cpu_model["switch_cost"] * 1e6)
+            self.migration_us.set(cpu_model["migration_penalty"] * 1e6)
+            self.use_gil.set(cpu_model["gil"])
+        primitive = config.get("primitive")
+        self.primitive_kind.set(primitive["kind"] if primitive else NO_PRIMITIVE)
+        if primitive:
+            self.critical_ms.set(primitive["critical_section"] * 1000)
+            self.read_percent.set(round(primitive["read_ratio"] * 100))
+            
+        # The events stay memory-mapped; the timeline reads only what it draws
+        self.session_history = SessionHistory(session.array("thread/events"), meta["offsets"])
+        self.trace = meta.get("trace")
+        
+        self.status_text.config(state=tk.NORMAL)
+        self.status_text.delete(1.0, tk.END)
+        self.status_text.insert(tk.END, meta.get("status", ""))
+        self.status_text.config(state=tk.DISABLED)
+        
+        metrics = meta["metrics"]
+        self.progress_var.set(metrics["completed_tasks"] / config["tasks"] if config["tasks"] else 0.0)
+        self.log_status(f"Restored {metrics['completed_tasks']} tasks on {config['threads']} threads "
+                        f"(makespan {metrics['makespan']:.2f} s, seed {config['seed']}) from {session.path}")
+        self.update_timeline()
+        
+    def open_comparison(self):
+        if not len(self.run_history):
+            messagebox.showinfo("Compare Runs", "Complete at least one simulation run to compare runs.")
+            return
+        if self.compare_window:
+            self.compare_window.lift()
+            return
+            
+        window = tk.Toplevel(self.frame)
+        window.title("Compare Runs")
+        window.geometry("1000x700")
+        window.protocol("WM_DELETE_WINDOW", self.close_comparison)
+        self.compare_window = window
+        
+        list_frame = ttk.LabelFrame(window, text="Completed Runs (select two or more)", padding=10)
+        list_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        self.run_listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED, height=4, exportselection=False)
+        self.run_listbox.pack(fill=tk.X)
+        self.run_listbox.bind("<<ListboxSelect>>", lambda e: self.update_comparison())
+        
+        self.compare_fig = Figure(figsize=(9, 3.5), dpi=100)
+        self.util_ax = self.compare_fig.add_subplot(121)
+        self.throughput_ax = self.compare_fig.add_subplot(122)
+        self.compare_canvas = FigureCanvasTkAgg(self.compare_fig, master=window)
+        self.compare_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        table_frame = ttk.LabelFrame(window, text="Metrics (change relative to the first selected run)", padding=10)
+        table_frame.pack(fill=tk.BOTH, padx=10, pady=5)
+        
+        self.compare_table = ttk.Treeview(table_frame, show="headings", height=10)
+        self.compare_table.pack(fill=tk.BOTH, expand=True)
+        
+        self.refresh_comparison_runs()
+        
+    def close_comparison(self):
+        self.compare_window.destroy()
+        self.compare_window = None
+        
+    def refresh_comparison_runs(self):
+        self.run_listbox.delete(0, tk.END)
+        for run in self.run_history.runs:
+            self.run_listbox.insert(tk.END, f"{run.label} (seed {run.config['seed']}, finished {run.finished})")
+        # Start with the two most recent runs selected
+        self.run_listbox.selection_set(max(0, len(self.run_history) - 2), tk.END)
+        self.update_comparison()
+        
+    def update_comparison(self):
+        runs = [self.run_history[i] for i in self.run_listbox.curselection()]
+        
+        self.util_ax.clear()
+        self.throughput_ax.clear()
+        self.compare_table.delete(*self.compare_table.get_children())
+        if not runs:
+            self.compare_canvas.draw()
+            return
+            
+        until = max(run.makespan() for run in runs)
+        for run in runs:
+            name = run.label.split(":")[0]
+            utilization = run.utilization()
+            self.util_ax.plot(np.arange(len(utilization)), utilization * 100, marker='o', label=name)
+            times, rates = run.throughput_curve(until)
+            self.throughput_ax.plot(times, rates, label=name)
+            
+        self.util_ax.set_title("Per-Thread Utilization")
+        self.util_ax.set_xlabel("Thread")
+        self.util_ax.set_ylabel("Busy (%)")
+        self.util_ax.set_ylim(0, 105)
+        self.util_ax.grid(True, linestyle='--', alpha=0.7)
+        self.util_ax.legend(fontsize=8)
+        
+        self.throughput_ax.set_title("Throughput Over Time")
+        self.throughput_ax.set_xlabel("Time (seconds)")
+        self.throughput_ax.set_ylabel("Tasks/s")
+        self.throughput_ax.grid(True, linestyle='--', alpha=0.7)
+        self.throughput_ax.legend(fontsize=8)
+        self.compare_fig.tight_layout()
+        self.compare_canvas.draw()
+        
+        columns = ["metric"] + [f"run{i}" for i in range(len(runs))] + [f"delta{i}" for i in range(1, len(runs))]
+        self.compare_table.config(columns=columns)
+        self.compare_table.heading("metric", text="Metric")
+        self.compare_table.column("metric", width=180, anchor=tk.W)
+        for i, run in enumerate(runs):
+            self.compare_table.heading(f"run{i}", text=run.label.split(":")[0])
+            self.compare_table.column(f"run{i}", width=90, anchor=tk.E)
+            if i:
+                self.compare_table.heading(f"delta{i}", text=f"\u0394 {run.label.split(':')[0]}")
+                self.compare_table.column(f"delta{i}", width=90, anchor=tk.E)
+                
+        for metric, values, deltas in compare_runs(runs):
+            self.compare_table.insert("", tk.END, values=[metric] + [format_value(v) for v in values]
+                                      + [format_delta(d) for d in deltas])
+                                      
+    def open_benchmark(self):
+        if self.bench_window:
+            self.bench_window.lift()
+            return
+        
+        window = tk.Toplevel(self.frame)
+        window.title("Primitive Benchmark")
+        window.geometry("1000x750")
+        window.protocol("WM_DELETE_WINDOW", self.close_benchmark)
+        self.bench_window = window
+        
+        self.bench_hold_us = tk.DoubleVar(value=20.0)
+        self.bench_outside_us = tk.DoubleVar(value=20.0)
+        self.bench_mode = tk.StringVar(value=SPIN)
+        self.bench_duration = tk.DoubleVar(value=0.3)
+        
+        settings = ttk.Frame(window, padding=10)
+        settings.pack(fill=tk.X, padx=10)
+        
+        fields = (("Critical Section (us):", self.bench_hold_us, 0, 100000, 10),
+                  ("Outside Work (us):", self.bench_outside_us, 0, 100000, 10),
+                  ("Reads (%):", self.read_percent, 0, 100, 5),
+                  ("Seconds per Point:", self.bench_duration, 0.1, 5, 0.1))
+        for i, (text, variable, low, high, step) in enumerate(fields):
+            ttk.Label(settings, text=text).grid(row=0, column=2 * i, padx=5, pady=5, sticky=tk.W)
+            ttk.Spinbox(settings, from_=low, to=high, increment=step, textvariable=variable,
+                        width=7).grid(row=0, column=2 * i + 1, padx=5, pady=5, sticky=tk.W)
+        
+        ttk.Label(settings, text="Hold:").grid(row=0, column=8, padx=5, pady=5, sticky=tk.W)
+        ttk.Combobox(settings, textvariable=self.bench_mode, values=[SPIN, SLEEP], state="readonly",
+                     width=6).grid(row=0, column=9, padx=5, pady=5, sticky=tk.W)
+        
+        self.bench_run_button = ttk.Button(settings, text="Run", command=self.run_benchmark)
+        self.bench_run_button.grid(row=0, column=10, padx=5, pady=5)
+        
+        self.bench_status = ttk.Label(settings, text="spin holds the GIL like CPU work, sleep releases it like I/O",
+                                      foreground='gray')
+        self.bench_status.grid(row=1, column=0, columnspan=11, padx=5, sticky=tk.W)
+        
+        self.bench_fig = Figure(figsize=(9, 3.5), dpi=100)
+        self.bench_throughput_ax = self.bench_fig.add_subplot(121)
+        self.bench_latency_ax = self.bench_fig.add_subplot(122)
+        self.bench_canvas = FigureCanvasTkAgg(self.bench_fig, master=window)
+        self.bench_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        table_frame = ttk.LabelFrame(window, text="Results", padding=10)
+        table_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        
+        self.bench_text = tk.Text(table_frame, height=12, wrap=tk.NONE, font=('Consolas', 9))
+        self.bench_text.pack(fill=tk.BOTH, expand=True)
+        self.bench_text.config(state=tk.DISABLED)
+    
+    def close_benchmark(self):
+        self.bench_window.destroy()
+        self.bench_window = None
+    
+    def run_benchmark(self):
+        if self.bench_thread and self.bench_thread.is_alive():
+            return
+        params = {"duration": self.bench_duration.get(), "hold": self.bench_hold_us.get() / 1e6,
+                  "outside": self.bench_outside_us.get() / 1e6, "read_ratio": self.read_percent.get() / 100,
+                  "hold_mode": self.bench_mode.get(), "seed": self.seed.get()}
+        self.bench_run_button.config(state=tk.DISABLED)
+        self.bench_thread = threading.Thread(target=self.benchmark_worker, args=(params,), daemon=True)
+        self.bench_thread.start()
+    
+    def benchmark_worker(self, params):
+        # Runs off the Tk thread; progress and results are handed back with after()
+        def on_progress(done, total):
+            self.frame.after(0, self.benchmark_progress, f"Measured {done} of {total} points")
+        
+        results = sweep(PRIMITIVES, THREAD_COUNTS, on_progress=on_progress, **params)
+        self.frame.after(0, self.benchmark_complete, results, params)
+    
+    def benchmark_progress(self, text):
+        if self.bench_window:
+            self.bench_status.config(text=text)
+    
+    def benchmark_complete(self, results, params):
+        if not self.bench_window:
+            return
+        self.bench_run_button.config(state=tk.NORMAL)
+        self.bench_status.config(text=f"{params['hold'] * 1e6:g} us critical sections ({params['hold_mode']}), "
+                                      f"{params['outside'] * 1e6:g} us outside, {params['read_ratio'] * 100:.0f}% reads")
+        
+        self.bench_throughput_ax.clear()
+        self.bench_latency_ax.clear()
+        for kind, runs in results.items():
+            self.bench_throughput_ax.plot([run.threads for run in runs], [run.throughput for run in runs],
+                                          marker='o', label=kind)
+            # Acquire latency distribution at the highest thread count
+            latencies = np.sort(runs[-1].latencies) * 1e6
+            if len(latencies):
+                self.bench_latency_ax.plot(np.maximum(latencies, 0.1), np.linspace(0, 1, len(latencies)), label=kind)
+        
+        self.bench_throughput_ax.set_xscale('log', base=2)
+        self.bench_throughput_ax.set_title("Throughput vs Threads")
+        self.bench_throughput_ax.set_xlabel("Threads")
+        self.bench_throughput_ax.set_ylabel("Operations/s")
+        self.bench_throughput_ax.grid(True, linestyle='--', alpha=0.7)
+        self.bench_throughput_ax.legend(fontsize=7)
+        
+        self.bench_latency_ax.set_xscale('log')
+        self.bench_latency_ax.set_title(f"Acquire Latency at {THREAD_COUNTS[-1]} Threads")
+        self.bench_latency_ax.set_xlabel("Latency (us)")
+        self.bench_latency_ax.set_ylabel("Fraction of acquisitions")
+        self.bench_latency_ax.grid(True, linestyle='--', alpha=0.7)
+        self.bench_fig.tight_layout()
+        self.bench_canvas.draw()
+        
+        self.bench_text.config(state=tk.NORMAL)
+        self.bench_text.delete(1.0, tk.END)
+        self.bench_text.insert(tk.END, format_sweep(results))
+        self.bench_text.config(state=tk.DISABLED)
+        
+    def trace_program(self):
+        if self.tracer:
+            self.finish_trace()
+            return
+        if self.running:
+            return
+            
+        path = filedialog.askopenfilename(title="Trace Program", filetypes=[("Python script", "*.py"), ("All files", "*")])
+        if not path:
+            return
+            
+        self.clear_simulation()
+        # Locks the program creates feed the shared wait-for graph, so the
+        # deadlock view's Live Threads scenario shows them as they happen
+        default_graph.clear()
+        self.trace_deadlocks = set()
+        self.tracer = ProgramTracer(mode=self.trace_mode.get(), graph=default_graph)
+        self.start_time = time.time()
+        self.tracer.run_script(path)
+        self.trace = self.tracer.info()
+        
+        self.start_button.config(state=tk.DISABLED)
+        self.trace_button.config(text="Stop Trace")
+        self.log_status(f"Tracing {os.path.basename(path)} in {self.tracer.mode} mode")
+        self.frame.after(200, self.poll_trace)
+        
+    def poll_trace(self):
+        tracer = self.tracer
+        if tracer is None:
+            return
+        if tracer.finished():
+            self.finish_trace()
+            return
+            
+        for cycle in tracer.graph.find_deadlocks():
+            names = tuple(tracer.graph.name_of(ident) for ident in cycle)
+            if frozenset(names) not in self.trace_deadlocks:
+                self.trace_deadlocks.add(frozenset(names))
+                self.log_status(f"Deadlock in traced program between {', '.join(names)}")
+                
+        # The history is read before the labels so every span has its label
+        self.thread_history = tracer.thread_history()
+        self.trace = tracer.info()
+        if self.visible:
+            self.update_timeline()
+        self.frame.after(200, self.poll_trace)
+        
+    def finish_trace(self):
+        result = self.tracer.stop()
+        self.tracer = None
+        self.thread_history = result.history
+        self.trace = result.info()
+        self.virtual_time = result.elapsed
+        
+        self.start_button.config(state=tk.NORMAL)
+        self.trace_button.config(text="Trace Program...")
+        for line in format_trace(result).splitlines():
+            self.log_status(line)
+        if not result.finished:
+            self.log_status("The traced program is still running in the background")
+        self.update_timeline()
+        
+    def start_soak(self):
+        # Runs until the duration is up with the queue kept topped up, while
+        # memory and throughput are sampled from the main thread, where the
+        # status log can be measured
+        self.soak_until = self.soak_minutes.get() * 60
+        self.soak_rng = random.Random(self.seed.get() + 1)
+        self.soak_interval = max(1000, int(self.soak_until * 1000 / 120))
+        self.soak_monitor = SoakMonitor({
+            "History spans": self.completed_tasks,
+            "Status lines": lambda: int(self.status_text.index('end-1c').split('.')[0]),
+            "Task lengths kept": lambda: len(self.task_durations),
+        })
+        self.soak_monitor.start(0.0)
+        self.soak_result = None
+        self.log_status(f"Soaking for {self.soak_minutes.get():g} minutes; tracemalloc slows the workers while it runs")
+        self.frame.after(self.soak_interval, self.sample_soak)
+        
+    def completed_tasks(self):
+        return sum(len(events) for events in list(self.thread_history.values()))
+        
+    def top_up_soak(self):
+        # Called from the monitor thread; each length is stored before its
+        # id is queued so a worker never looks one up too early
+        while self.task_queue.qsize() < 2 * self.num_threads.get():
+            self.task_durations.append(self.soak_rng.uniform(0.5, 2.0))
+            self.task_queue.put(len(self.task_durations) - 1)
+            
+    def sample_soak(self):
+        if not self.soak_monitor or not self.running:
+            return
+        elapsed = time.time() - self.start_time
+        self.soak_monitor.sample(elapsed, self.completed_tasks())
+        self.progress_var.set(min(1.0, elapsed / self.soak_until))
+        self.frame.after(self.soak_interval, self.sample_soak)
+        
+    def finish_soak(self):
+        monitor, self.soak_monitor = self.soak_monitor, None
+        self.soak_result = monitor.finish(time.time() - self.start_time, self.completed_tasks(), REAL)
+        for line in format_soak_report(self.soak_result).splitlines():
+            self.log_status(line)
+            
+    def show_soak_result(self):
+        report = self.soak_result
+        if not report.judged:
+            messagebox.showinfo("Soak Test Complete", f"Too few samples to judge ({len(report.samples)}); "
+                                "run the soak for longer")
+        elif report.ok:
+            messagebox.showinfo("Soak Test Complete", "No monotonic memory growth or throughput decay")
+        else:
+            messagebox.showwarning("Soak Test Complete",
+                                   f"Found {len(report.growth)} growing and {len(report.decay)} decaying series; "
+                                   "see the status log for the top allocators")
+            
+    def run_virtual_soak(self):
+        # The CPU model runs hours of virtual time in minutes, so this soak
+        # uses the headless engine on a background thread
+        model = self.core_model()
+        duration = self.soak_minutes.get() * 60
+        self.task_queue = queue.Queue()
+        self.log_status(f"Soaking for {self.soak_minutes.get():g} virtual minutes on {model.describe()}")
+        threading.Thread(target=self.virtual_soak_worker, args=(duration, model), name="Virtual soak",
+                         daemon=True).start()
+        
+    def virtual_soak_worker(self, duration, model):
+        def on_sample(sample, total):
+            self.frame.after(0, self.progress_var.set, min(1.0, sample.elapsed / total))
+            
+        report = run_soak(duration, VIRTUAL, workers=self.num_threads.get(), seed=self.seed.get(), model=model,
+                          on_sample=on_sample, should_stop=lambda: not self.running)
+        self.frame.after(0, self.virtual_soak_complete, report)
+        
+    def virtual_soak_complete(self, report):
+        for line in format_soak_report(report).splitlines():
+            self.log_status(line)
+        self.soak_result = report
+        if self.running:
+            self.stop_simulation()
+            self.show_soak_result()